@@ -175,12 +175,12 @@ export async function getAllLeads() {
     return enrichedLeads
 }
 
-export async function submitKeithTask(message: string) {
+export async function submitKeithTask(message: string, sessionId?: string) {
     const { data, error } = await supabaseAdmin.from('agent_tasks').insert({
         title: 'Keith Playground Chat',
         assigned_agent: 'Keith',
         status: 'pending',
-        payload: { message }
+        payload: { message, session_id: sessionId }
     }).select().single()
 
     if (error) throw error
@@ -200,22 +200,15 @@ export async function getUsers() {
 }
 
 export async function getResourceCategories() {
-    // Aggregate categories from resources table
-    // Since we don't have a dedicated categories table, we'll fetch all unique categories
+    // Per-category counts are maintained by trigger (see 20260203_catalog_stats.sql)
     const { data, error } = await supabaseAdmin
-        .from('resources')
-        .select('category')
+        .from('resource_category_counts')
+        .select('category, count')
+        .order('category')
 
     if (error) throw error
 
-    // Count occurrences
-    const categories: Record<string, number> = {}
-    data?.forEach((row: any) => {
-        const cat = row.category || 'Uncategorized'
-        categories[cat] = (categories[cat] || 0) + 1
-    })
-
-    return Object.entries(categories).map(([name, count]) => ({ name, count }))
+    return (data || []).map((row: any) => ({ name: row.category || 'Uncategorized', count: Number(row.count) }))
 }
 
 export async function getOrganizationsByCategory(category: string) {
@@ -17,6 +17,8 @@ export default function KeithPlayground() {
     const [input, setInput] = useState('')
     const [isThinking, setIsThinking] = useState(false)
     const endRef = useRef<HTMLDivElement>(null)
+    // Keeps this tab's messages in one worker-side conversation
+    const sessionId = useRef(crypto.randomUUID())
 
     const scrollToBottom = () => endRef.current?.scrollIntoView({ behavior: 'smooth' })
     useEffect(scrollToBottom, [messages])
@@ -32,7 +34,7 @@ export default function KeithPlayground() {
 
         try {
             // Submit Task
-            const task = await submitKeithTask(userMsg)
+            const task = await submitKeithTask(userMsg, sessionId.current)
 
             // Poll for result (Simple polling for MVP)
             const pollInterval = setInterval(async () => {
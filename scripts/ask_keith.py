@@ -7,6 +7,8 @@ import asyncio
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
+from task_queue import wait_for_task
+
 # Load env
 load_dotenv('.env.local')
 if not os.getenv("NEXT_PUBLIC_SUPABASE_URL"):
@@ -17,6 +19,8 @@ SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") # Service role needed to c
 # Let's try ANON key first as tasks might be public? No, typically internal. Use Service Key if available.
 if not SUPABASE_KEY:
     SUPABASE_KEY = os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+# Optional direct DB connection: lets us LISTEN for task updates instead of polling
+SUPABASE_DB_URL = os.getenv("SUPABASE_DB_URL")
 
 if not SUPABASE_URL or not SUPABASE_KEY:
     print("❌ Error: Missing Supabase credentials in .env.local")
@@ -24,59 +28,89 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+def create_task(title, payload):
+    res = supabase.table('agent_tasks').insert({
+        "assigned_agent": "Keith",
+        "title": title,
+        "status": "pending",
+        "payload": payload
+    }).execute()
+    return res.data[0]['id'] if res.data else None
+
+def print_result(task):
+    if not task:
+        print("\ntimeout: Keith did not respond in time (Is the worker running?)")
+    elif task['status'] == 'failed':
+        print(f"\n❌ Task Failed: {task.get('result', {}).get('error', 'Unknown Error')}")
+    else:
+        response = task.get('result', {}).get('response', 'No response text.')
+        print("\n" + "="*40)
+        print(response)
+        print("="*40 + "\n")
+
 async def ask_keith(org_name):
     print(f"🤖 Asking Keith about: '{org_name}'...")
-    
-    # 1. Create Task
-    task_payload = {
-        "message": f"verify org {org_name}"
-    }
-    
+
     try:
-        res = supabase.table('agent_tasks').insert({
-            "assigned_agent": "Keith",
-            "title": f"Verification: {org_name}", 
-            "status": "pending",
-            "payload": task_payload
-        }).execute()
-        
-        if not res.data:
+        # 1. Create Task
+        task_id = create_task(f"Verification: {org_name}", {"message": f"verify org {org_name}"})
+        if not task_id:
             print("❌ Failed to create task.")
             return
-            
-        task_id = res.data[0]['id']
         print(f"   Task Created: {task_id}. Waiting for Keith...")
-        
-        # 2. Poll for Completion
-        for i in range(30): # Wait up to 60s
-            check = supabase.table('agent_tasks').select('*').eq('id', task_id).execute()
-            if check.data:
-                task = check.data[0]
-                status = task['status']
-                
-                if status == 'completed':
-                    result = task.get('result', {})
-                    response = result.get('response', 'No response text.')
-                    print("\n" + "="*40)
-                    print(response)
-                    print("="*40 + "\n")
-                    return
-                elif status == 'failed':
-                    print(f"\n❌ Task Failed: {task.get('result', {}).get('error', 'Unknown Error')}")
-                    return
-            
-            await asyncio.sleep(2)
-            print(".", end="", flush=True)
-            
-        print("\ntimeout: Keith did not respond in time (Is the worker running?)")
-        
+
+        # 2. Wait for Completion
+        task = await wait_for_task(supabase, task_id, db_url=SUPABASE_DB_URL, timeout=60)
+        print_result(task)
+
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+
+async def ask_keith_bulk(path, out_path=None):
+    with open(path) as f:
+        org_names = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    print(f"🤖 Asking Keith to verify {len(org_names)} organizations from {path}...")
+
+    try:
+        task_id = create_task(f"Bulk Verification: {len(org_names)} orgs", {"org_names": org_names})
+        if not task_id:
+            print("❌ Failed to create task.")
+            return
+        print(f"   Task Created: {task_id}. Waiting for Keith...")
+
+        start = time.time()
+        def on_update(task):
+            result = task.get('result') or {}
+            progress, batch = result.get('progress'), result.get('batch')
+            if progress:
+                print(f"   ⏳ {progress['done']}/{progress['total']} checked ({time.time() - start:.1f}s)")
+            if batch and task['status'] not in ('completed', 'failed'):
+                for v in batch['verified']:
+                    print(f"      ✅ {v['query']} → {v['name']}")
+                for q in batch['missing']:
+                    print(f"      ❌ {q}")
+
+        task = await wait_for_task(supabase, task_id, db_url=SUPABASE_DB_URL, timeout=3600, on_update=on_update)
+        print_result(task)
+
+        if task and out_path:
+            result = task.get('result', {})
+            with open(out_path, 'w') as f:
+                json.dump({"verified": result.get('verified', []), "missing": result.get('missing', [])}, f, indent=2)
+            print(f"💾 Results written to {out_path}")
+
     except Exception as e:
         print(f"\n❌ Error: {e}")
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python3 scripts/ask_keith.py \"<Organization Name>\"")
+        print("       python3 scripts/ask_keith.py --file <names.txt> [--out <results.json>]")
         sys.exit(1)
-        
-    org_name = sys.argv[1]
-    asyncio.run(ask_keith(org_name))
+
+    if sys.argv[1] == '--file':
+        out_path = sys.argv[sys.argv.index('--out') + 1] if '--out' in sys.argv else None
+        asyncio.run(ask_keith_bulk(sys.argv[2], out_path))
+    else:
+        org_name = sys.argv[1]
+        asyncio.run(ask_keith(org_name))
@@ -0,0 +1,77 @@
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from supabase import create_client, Client
+from dotenv import load_dotenv
+
+from catalog_stream import stream_rows
+from embeddings import EMBEDDING_COLUMNS, EmbeddingPipeline, make_embedder
+
+# Fills resources.embedding for the existing catalog.
+# Pages through resources, embeds via the cached pipeline and writes only the embedding column back
+# (an upsert would resend name/category and fire the category-count and recommendation triggers per row).
+# Re-running over an unchanged catalog is all cache hits (zero embedder calls).
+# Usage: python3 scripts/backfill_embeddings.py [--all] [--embedder hash|openai] [--page-size 500] [--parallel 8] [--dry-run]
+
+load_dotenv('.env.local')
+
+SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+if not SUPABASE_URL or not SUPABASE_KEY:
+    print("❌ Error: Missing Supabase credentials in .env.local")
+    sys.exit(1)
+
+supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def pages(page_size, only_missing):
+    """Keyset pages; rows leaving the NULL filter as they are written don't shift later pages."""
+    where = (lambda q: q.is_('embedding', 'null')) if only_missing else None
+    rows = stream_rows(supabase, 'resources', EMBEDDING_COLUMNS, page_size=page_size, where=where)
+    while True:
+        page = list(islice(rows, page_size))
+        if not page:
+            return
+        yield page
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill resources.embedding")
+    parser.add_argument('--all', action='store_true', help="Re-embed every row, not just rows with a NULL embedding")
+    parser.add_argument('--embedder', default=None, help="openai|hash (default: EMBEDDER env, else openai if keyed; hash must be explicit)")
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--parallel', type=int, default=8, help="Row updates in flight")
+    parser.add_argument('--dry-run', action='store_true', help="Embed (and cache) but do not write to the database")
+    args = parser.parse_args()
+
+    try:
+        pipeline = EmbeddingPipeline(make_embedder(args.embedder))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"🧮 Backfilling embeddings with {pipeline.embedder.model}...")
+    start = time.time()
+    written = 0
+
+    def write(row, vector):
+        supabase.table('resources').update({'embedding': vector}).eq('id', row['id']).execute()
+
+    with ThreadPoolExecutor(max_workers=args.parallel) as pool:
+        for rows in pages(args.page_size, only_missing=not args.all):
+            vectors = pipeline.embed_records(rows)
+            if not args.dry_run:
+                list(pool.map(write, rows, vectors))  # Raises the first failed update
+            written += len(rows)
+            print(f"   💾 {written} rows ({pipeline.stats['cache_hits']} cached chunks, {pipeline.stats['embedded']} embedded)")
+
+    elapsed = time.time() - start
+    print(f"✅ {'Embedded' if args.dry_run else 'Wrote'} {written} rows in {elapsed:.1f}s")
+    print(f"📊 {json.dumps(pipeline.stats)}")
+
+if __name__ == "__main__":
+    main()
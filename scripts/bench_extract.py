@@ -0,0 +1,76 @@
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from extract_text import extract_text, DEFAULT_BUDGET
+
+# Benchmarks the streaming extractor against the old BeautifulSoup scrape_site
+# on a directory of saved org pages: throughput and peak traced memory per page.
+# Usage: python3 scripts/bench_extract.py [--corpus DIR] [--rounds 3]
+# The default corpus is the fetcher's HTTP cache (scripts/.http_cache/*.body) left by scrape_resources.py.
+
+DEFAULT_CORPUS = Path(__file__).parent / '.http_cache'
+
+def legacy_scrape_site(html):
+    """The parsing half of the pre-streaming scrape_site (baseline scrape_resources.py), without the HTTP request."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    text = soup.get_text(separator=' ', strip=True)[:5000]
+    return text
+
+def load_corpus(path):
+    files = sorted(p for p in Path(path).iterdir() if p.suffix in ('.html', '.htm', '.body'))
+    return [(p.name, p.read_text(encoding='utf-8', errors='replace')) for p in files]
+
+def bench(label, fn, pages, rounds):
+    # Throughput without tracemalloc overhead
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for _, html in pages:
+            fn(html)
+    elapsed = (time.perf_counter() - start) / rounds
+
+    # Peak memory, worst single page
+    peak = 0
+    for _, html in pages:
+        tracemalloc.start()
+        fn(html)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    total_mb = sum(len(html) for _, html in pages) / 1e6
+    print(f"{label:<12} {len(pages) / elapsed:>10.1f} pages/s {total_mb / elapsed:>8.2f} MB/s {peak / 1e6:>8.2f} MB peak")
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML text extraction")
+    parser.add_argument('--corpus', default=str(DEFAULT_CORPUS), help="Directory of saved .html/.body pages")
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    if not Path(args.corpus).is_dir():
+        print(f"❌ Corpus directory not found: {args.corpus} (run scrape_resources.py first or pass --corpus)")
+        sys.exit(1)
+    pages = load_corpus(args.corpus)
+    if not pages:
+        print(f"❌ No .html/.body files in {args.corpus}")
+        sys.exit(1)
+    print(f"📄 {len(pages)} pages, {sum(len(h) for _, h in pages) / 1e6:.2f} MB, {args.rounds} rounds\n")
+
+    stream_time, stream_peak = bench("streaming", extract_text, pages, args.rounds)
+    try:
+        legacy_time, legacy_peak = bench("bs4", legacy_scrape_site, pages, args.rounds)
+    except ImportError:
+        print("⚠️ beautifulsoup4 not installed; skipping the baseline")
+        return
+    print(f"\n🚀 {legacy_time / stream_time:.1f}x faster, {legacy_peak / max(stream_peak, 1):.1f}x less peak memory")
+
+    # Output drift vs the baseline (expected: nav/footer dropped, main preferred)
+    shared = sum(1 for _, html in pages if extract_text(html)[:200] == legacy_scrape_site(html)[:200])
+    print(f"📝 {shared}/{len(pages)} pages start with the same 200 chars as the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import sys
+
+import psycopg
+
+from local_db import MIGRATIONS_DIR
+
+# EXPLAIN (ANALYZE, BUFFERS) for the queries the worker and portal issue, with and without
+# the indexes from supabase/migrations/20260207_search_indexes.sql.
+# "before" runs the old query text inside a transaction that drops those indexes, then rolls back;
+# "after" runs the current query text against the indexed schema.
+# Seed a scratch database first:
+#   DATABASE_URL=postgresql://postgres@localhost/keith_scale python3 scripts/generate_catalog.py --postgres --reset
+# Usage:
+#   DATABASE_URL=... python3 scripts/bench_query_plans.py [--tasks 200000] [--runs 5] [--json plans.json]
+
+MIGRATION = MIGRATIONS_DIR / '20260207_search_indexes.sql'
+INDEXES = [
+    'resources_search_doc_idx', 'resources_name_trgm_idx', 'resources_description_trgm_idx',
+    'resources_category_trgm_idx', 'resources_secondary_categories_idx', 'resources_category_idx',
+    'resources_owner_idx', 'leads_resource_created_idx', 'leads_new_idx',
+    'agent_tasks_pending_idx', 'agent_tasks_leases_idx', 'resources_embedding_hnsw_idx',
+]
+SEARCH = 'id, name, category, secondary_categories, description, application_process, programs, contact_info'
+
+# (label, before sql, after sql); %(name)s params come from sample_params()
+QUERIES = [
+    ('rag wfts',
+     f"SELECT {SEARCH} FROM public.resources WHERE to_tsvector(description) @@ websearch_to_tsquery(%(q)s)",
+     f"SELECT {SEARCH} FROM public.resources WHERE search_doc @@ websearch_to_tsquery('english', %(q)s)"),
+    ('rag ilike description',
+     f"SELECT {SEARCH} FROM public.resources WHERE description ILIKE %(like)s LIMIT 5", None),
+    ('rag ilike name',
+     f"SELECT {SEARCH} FROM public.resources WHERE name ILIKE %(name_like)s LIMIT 3", None),
+    ('rag category or secondary',
+     f"SELECT {SEARCH} FROM public.resources WHERE category ILIKE %(cat)s OR secondary_categories @> ARRAY[%(cat)s] LIMIT 10", None),
+    ('rag category in',
+     f"SELECT {SEARCH} FROM public.resources WHERE category IN ('education', 'employment', 'other') LIMIT 15", None),
+    ('lead exists (user, resource)',
+     "SELECT id FROM public.leads WHERE user_id = %(user_id)s AND resource_id = %(resource_id)s", None),
+    ('org inbox (owner leads)',
+     "SELECT * FROM public.leads WHERE resource_id = ANY(%(owned)s) ORDER BY created_at DESC", None),
+    ('admin new-lead count',
+     "SELECT count(*) FROM public.leads WHERE status = 'new'", None),
+    ('claim_next_task scan',
+     "SELECT id FROM public.agent_tasks WHERE assigned_agent = 'KEITH-AI-PY' AND status = 'pending' ORDER BY created_at LIMIT 1", None),
+    ('lease reaper scan',
+     "SELECT id FROM public.agent_tasks WHERE status = 'in-progress' AND lease_until < now()", None),
+]
+KNN = ('embedding kNN',
+       "SELECT id, name FROM public.resources ORDER BY embedding <=> %(vec)s::vector LIMIT 10", None)
+
+def seed_tasks(conn, count):
+    """Mostly finished history with a thin pending / in-progress slice, like a long-running queue."""
+    have = conn.execute("SELECT count(*) FROM public.agent_tasks").fetchone()[0]
+    if have >= count:
+        return
+    conn.execute("""
+        INSERT INTO public.agent_tasks (title, status, assigned_agent, payload, created_at, lease_until)
+        SELECT 'bench task ' || g,
+               CASE WHEN g % 1000 = 0 THEN 'pending' WHEN g % 997 = 0 THEN 'in-progress'
+                    WHEN g % 50 = 0 THEN 'failed' ELSE 'completed' END,
+               (ARRAY['KEITH-AI-PY', 'Alpha', 'Beta', 'Gamma'])[1 + g % 4],
+               jsonb_build_object('message', 'find food near compton'),
+               now() - make_interval(secs => g),
+               CASE WHEN g % 997 = 0 THEN now() - interval '1 minute' END
+        FROM generate_series(1, %s) g
+    """, (count - have,))
+    conn.execute("ANALYZE public.agent_tasks")
+    print(f"   ➕ seeded {count - have} agent_tasks")
+
+def sample_params(conn, vector):
+    lead = conn.execute("SELECT user_id, resource_id FROM public.leads ORDER BY created_at DESC LIMIT 1").fetchone()
+    # A busy org: owns the 20 most-applied-to resources
+    owned = [r[0] for r in conn.execute(
+        "SELECT resource_id FROM public.leads GROUP BY resource_id ORDER BY count(*) DESC LIMIT 20").fetchall()]
+    params = {
+        'q': 'food pantry for families', 'like': '%job training%', 'name_like': '%food bank%', 'cat': 'food',
+        'user_id': lead[0] if lead else None, 'resource_id': lead[1] if lead else None, 'owned': owned,
+    }
+    if vector:
+        params['vec'] = conn.execute("SELECT embedding::text FROM public.resources WHERE embedding IS NOT NULL LIMIT 1").fetchone()
+        params['vec'] = params['vec'][0] if params['vec'] else None
+    return params
+
+def explain(conn, sql, params, runs):
+    """Best-of-`runs` execution time plus the plan of the fastest run."""
+    best = None
+    for _ in range(runs):
+        plan = conn.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params).fetchone()[0][0]
+        if best is None or plan['Execution Time'] < best['Execution Time']:
+            best = plan
+    return best
+
+def summarize(plan):
+    node, scans = plan['Plan'], []
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        if 'Scan' in n['Node Type']:
+            scans.append(f"{n['Node Type']}" + (f" on {n['Index Name']}" if n.get('Index Name') else ''))
+        stack.extend(n.get('Plans', []))
+    shared = node.get('Shared Hit Blocks', 0) + node.get('Shared Read Blocks', 0)
+    return {'ms': plan['Execution Time'], 'rows': node.get('Actual Rows'), 'buffers': shared, 'scans': scans}
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE the worker's queries before/after the search index migration")
+    parser.add_argument('--tasks', type=int, default=200_000, help="Seed agent_tasks up to this many rows")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', default=None, help="Write full plans to this file")
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        print("❌ Set DATABASE_URL to a seeded scratch database (see generate_catalog.py --postgres)")
+        sys.exit(1)
+
+    with psycopg.connect(database_url, autocommit=True) as conn:
+        if conn.execute("SELECT to_regclass('public.resources_search_doc_idx')").fetchone()[0] is None:
+            print(f"❌ {MIGRATION.name} is not applied (run local_db.bootstrap or generate_catalog.py --postgres)")
+            sys.exit(1)
+        seed_tasks(conn, args.tasks)
+        counts = {t: conn.execute(f"SELECT count(*) FROM public.{t}").fetchone()[0] for t in ('resources', 'leads', 'agent_tasks')}
+        print(f"📊 {counts['resources']} resources | {counts['leads']} leads | {counts['agent_tasks']} agent_tasks")
+
+        vector = conn.execute("SELECT to_regclass('public.resources_embedding_hnsw_idx')").fetchone()[0] is not None
+        params = sample_params(conn, vector)
+        queries = QUERIES + ([KNN] if vector and params.get('vec') else [])
+        if not vector:
+            print("⚠️ No HNSW index (pgvector missing or embedding is real[]): kNN query skipped")
+
+        report = []
+        for label, before_sql, after_sql in queries:
+            with conn.transaction(force_rollback=True):
+                for name in INDEXES:
+                    conn.execute(f"DROP INDEX IF EXISTS public.{name}")
+                before = explain(conn, before_sql, params, args.runs)
+            after = explain(conn, after_sql or before_sql, params, args.runs)
+            b, a = summarize(before), summarize(after)
+            report.append({'query': label, 'before': b, 'after': a, 'plans': {'before': before, 'after': after}})
+            print(f"{label:<30} {b['ms']:>9.2f} ms -> {a['ms']:>8.2f} ms  ({b['ms'] / max(a['ms'], 0.001):>6.1f}x)  "
+                  f"buffers {b['buffers']:>7} -> {a['buffers']:<6} {', '.join(dict.fromkeys(a['scans']))}")
+
+    total_before = sum(r['before']['ms'] for r in report)
+    total_after = sum(r['after']['ms'] for r in report)
+    print(f"✅ {len(report)} queries: {total_before:.1f} ms -> {total_after:.1f} ms total")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"💾 Plans written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Columnar, memory-mappable catalog snapshot (.kcat) for fast worker/script startup.
+# Instead of every process pulling the catalog as JSON over REST (embedding included),
+# a build step writes one file that readers mmap and view with zero-copy NumPy arrays.
+#
+# Layout (little-endian, sections 64-byte aligned):
+#   b'KCAT0001' | u64 header length | JSON header | sections...
+#   ids          S36 array, sorted (binary search by id)
+#   category     u16 codes into header['categories'] (interned dictionary)
+#   text columns u64 offsets (rows + 1) + one UTF-8 blob each
+#   embedding    float32 (rows x dim) matrix + u8 presence mask
+#
+# Usage:
+#   python3 scripts/catalog_snapshot.py build [--out PATH] [--no-embeddings]
+#   KEITH_CATALOG_SNAPSHOT=PATH python3 scripts/keith_worker.py   # name index from the id/name/programs
+#                                                                  # columns; a worker never touches embeddings
+#   python3 scripts/catalog_snapshot.py bench [--rows 50000]     # JSON fetch path vs mmap, in subprocesses
+
+MAGIC = b'KCAT0001'
+ALIGN = 64
+DEFAULT_PATH = Path(__file__).parent / '.catalog_snapshot.kcat'
+EMBED_DIM = 768
+TEXT_COLUMNS = ('name', 'description', 'application_process', 'service_area', 'website', 'secondary_categories', 'programs')
+JSON_COLUMNS = ('secondary_categories', 'programs')  # Stored as JSON text, decoded on access
+BUILD_COLUMNS = 'id, name, category, secondary_categories, description, programs, contact_info, website, application_process, embedding'
+
+# --- Build ---
+
+def _parse_embedding(value, dim):
+    if value is None:
+        return None
+    if isinstance(value, str):  # pgvector comes back from PostgREST as '[0.1,0.2,...]'
+        value = json.loads(value)
+    vec = np.asarray(value, dtype=np.float32)
+    return vec if vec.shape == (dim,) else None
+
+def _text(row, column):
+    if column == 'service_area':
+        return (row.get('contact_info') or {}).get('service_area') or ''
+    value = row.get(column)
+    if column in JSON_COLUMNS:
+        return json.dumps(value or [], ensure_ascii=False)
+    return value or ''
+
+def build_snapshot(rows, path=DEFAULT_PATH, embeddings=True, dim=EMBED_DIM):
+    """Writes rows (any iterable of resources dicts) to `path` atomically. Returns the row count."""
+    ids, codes, categories = [], [], {}
+    texts = {c: [] for c in TEXT_COLUMNS}
+    vectors = []
+    for row in rows:
+        ids.append(row['id'])
+        codes.append(categories.setdefault(row.get('category') or '', len(categories)))
+        for column in TEXT_COLUMNS:
+            texts[column].append(_text(row, column).encode('utf-8'))
+        if embeddings:
+            vectors.append(_parse_embedding(row.get('embedding'), dim))
+
+    order = sorted(range(len(ids)), key=ids.__getitem__)
+    count = len(order)
+    sections = [('ids', np.array([ids[i].encode('ascii') for i in order], dtype='S36')),
+                ('category', np.array([codes[i] for i in order], dtype='<u2'))]
+    for column in TEXT_COLUMNS:
+        values = [texts[column][i] for i in order]
+        offsets = np.zeros(count + 1, dtype='<u8')
+        offsets[1:] = np.cumsum([len(v) for v in values], dtype='<u8')
+        sections.append((f"{column}.offsets", offsets))
+        sections.append((f"{column}.data", np.frombuffer(b''.join(values), dtype='u1')))
+    if embeddings:
+        matrix = np.zeros((count, dim), dtype='<f4')
+        mask = np.zeros(count, dtype='u1')
+        for out_row, i in enumerate(order):
+            if vectors[i] is not None:
+                matrix[out_row] = vectors[i]
+                mask[out_row] = 1
+        sections.append(('embedding', matrix))
+        sections.append(('embedding.mask', mask))
+
+    # Header first (needs final offsets): lay sections out relative to the aligned data start
+    layout, cursor = {}, 0
+    for name, array in sections:
+        cursor = -(-cursor // ALIGN) * ALIGN
+        layout[name] = {'offset': cursor, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        cursor += array.nbytes
+    header = {'version': 1, 'rows': count, 'dim': dim if embeddings else 0, 'built_at': time.time(),
+              'categories': [c for c, _ in sorted(categories.items(), key=lambda kv: kv[1])], 'sections': layout}
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGN) * ALIGN
+    header['data_start'] = data_start
+    header_bytes = json.dumps(header).encode('utf-8')
+    if len(MAGIC) + 8 + len(header_bytes) > data_start:  # data_start's digits grew the header past the boundary
+        data_start += ALIGN
+        header['data_start'] = data_start
+        header_bytes = json.dumps(header).encode('utf-8')
+
+    tmp = Path(f"{path}.tmp")
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, 'little'))
+        f.write(header_bytes)
+        for name, array in sections:
+            f.seek(data_start + layout[name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + cursor)
+    os.replace(tmp, path)  # Readers holding the old file keep their mapping
+    return count
+
+# --- Read ---
+
+class CatalogSnapshot:
+    """
+    Usage:
+        snap = CatalogSnapshot(path)
+        snap.embeddings            # (rows, dim) float32 view into the mmap, no copy
+        snap.row(i) / snap.get(resource_id) / snap.iter_rows(['id', 'name', 'programs'])
+        snap.column('name')        # whole column, for bulk loads (the worker's name index)
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = Path(path)
+        self._mmap = np.memmap(self.path, dtype='u1', mode='r')
+        if bytes(self._mmap[:8]) != MAGIC:
+            raise ValueError(f"{self.path} is not a catalog snapshot")
+        header_len = int.from_bytes(bytes(self._mmap[8:16]), 'little')
+        self.header = json.loads(bytes(self._mmap[16:16 + header_len]))
+        self.rows = self.header['rows']
+        self.categories = self.header['categories']
+        self._views = {name: self._view(spec) for name, spec in self.header['sections'].items()}
+        self.ids = self._views['ids']
+        self.category_codes = self._views['category']
+        self.embeddings = self._views.get('embedding')
+        self.embedding_mask = self._views.get('embedding.mask')
+
+    def _view(self, spec):
+        start = self.header['data_start'] + spec['offset']
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'])) if spec['shape'] else 0
+        flat = self._mmap[start:start + count * dtype.itemsize].view(dtype)
+        return flat.reshape(spec['shape'])
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def age_seconds(self):
+        return time.time() - self.header['built_at']
+
+    def text(self, column, i):
+        offsets = self._views[f"{column}.offsets"]
+        raw = bytes(self._views[f"{column}.data"][offsets[i]:offsets[i + 1]])
+        value = raw.decode('utf-8')
+        return json.loads(value) if column in JSON_COLUMNS else value
+
+    def column(self, column):
+        """A whole column as a list: one copy of the blob, sliced by offsets (no per-row dicts)."""
+        if column == 'id':
+            return [i.decode('ascii') for i in self.ids.tolist()]
+        if column == 'category':
+            return [self.categories[c] for c in self.category_codes.tolist()]
+        offsets = self._views[f"{column}.offsets"].tolist()
+        blob = self._views[f"{column}.data"].tobytes()
+        values = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(self.rows)]
+        return [json.loads(v) for v in values] if column in JSON_COLUMNS else values
+
+    def index_of(self, resource_id):
+        key = resource_id.encode('ascii')
+        i = int(np.searchsorted(self.ids, key))
+        return i if i < self.rows and self.ids[i] == key else None
+
+    def row(self, i, columns=None):
+        columns = columns or ('id', 'category') + TEXT_COLUMNS
+        out = {}
+        for column in columns:
+            if column == 'id':
+                out['id'] = self.ids[i].decode('ascii')
+            elif column == 'category':
+                out['category'] = self.categories[self.category_codes[i]]
+            elif column == 'embedding':
+                out['embedding'] = self.embeddings[i] if self.embeddings is not None and self.embedding_mask[i] else None
+            else:
+                out[column] = self.text(column, i)
+        return out
+
+    def get(self, resource_id, columns=None):
+        i = self.index_of(resource_id)
+        return self.row(i, columns) if i is not None else None
+
+    def iter_rows(self, columns=None):
+        for i in range(self.rows):
+            yield self.row(i, columns)
+
+    def category_mask(self, category):
+        """Boolean mask over rows for one category (vectorised; no row decoding)."""
+        try:
+            return self.category_codes == self.categories.index(category)
+        except ValueError:
+            return np.zeros(self.rows, dtype=bool)
+
+# --- Bench ---
+
+def _synthetic_rows(count, dim, seed=42):
+    from generate_catalog import CatalogGenerator
+    rng = np.random.default_rng(seed)
+    for row in CatalogGenerator(seed).resources(count):
+        row['embedding'] = rng.standard_normal(dim, dtype=np.float32).round(6).tolist()
+        yield row
+
+def _memory_mb():
+    """(private, file-backed) resident MB. Private memory is what each extra worker costs; mapped pages are shared."""
+    try:
+        fields = dict(line.split(':', 1) for line in Path('/proc/self/status').read_text().splitlines() if ':' in line)
+        return int(fields['RssAnon'].split()[0]) / 1024, int(fields['RssFile'].split()[0]) / 1024
+    except (OSError, KeyError):  # Non-Linux: peak RSS only
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return (peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024), 0.0
+
+def _probe(mode, path):
+    """Runs in a fresh subprocess: load the catalog the given way, touch it like a worker would, report."""
+    base_private, base_shared = _memory_mb()
+    start = time.perf_counter()
+    if mode == 'json':
+        # What a worker pays today: the REST body for select('*') parsed into dicts
+        rows = json.loads(Path(path).read_text())
+        names = [r['name'] for r in rows]
+        first_vec = rows[0]['embedding']
+    else:
+        snap = CatalogSnapshot(path)
+        names = [snap.text('name', i) for i in range(len(snap))]
+        first_vec = snap.embeddings[0]
+    elapsed = time.perf_counter() - start
+    private, shared = _memory_mb()
+    print(json.dumps({'mode': mode, 'rows': len(names), 'seconds': round(elapsed, 3), 'dim': len(first_vec),
+                      'private_mb': round(private - base_private, 1), 'shared_mb': round(shared - base_shared, 1)}))
+
+def bench(count, dim=EMBED_DIM):
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path, snap_path = Path(tmp) / 'catalog.json', Path(tmp) / 'catalog.kcat'
+        rows = list(_synthetic_rows(count, dim))
+        json_path.write_text(json.dumps([dict(r, embedding=json.dumps(r['embedding'])) for r in rows]))
+        start = time.perf_counter()
+        build_snapshot(rows, snap_path, dim=dim)
+        build_seconds = time.perf_counter() - start
+        del rows
+
+        print(f"📦 {count} rows | JSON payload {json_path.stat().st_size / 1e6:.1f} MB | snapshot {snap_path.stat().st_size / 1e6:.1f} MB "
+              f"(built in {build_seconds:.1f}s)")
+        results = {}
+        for mode, path in (('json', json_path), ('snapshot', snap_path)):
+            out = subprocess.run([sys.executable, __file__, '_probe', mode, str(path)], capture_output=True, text=True, check=True)
+            results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+            r = results[mode]
+            print(f"{mode:<9} load+scan names {r['seconds']:>7.3f}s   private +{r['private_mb']:>7.1f} MB   shared (mmap) +{r['shared_mb']:.1f} MB")
+        print(f"🚀 {results['json']['seconds'] / max(results['snapshot']['seconds'], 1e-6):.0f}x faster startup, "
+              f"{results['json']['private_mb'] / max(results['snapshot']['private_mb'], 0.1):.0f}x less private memory per process")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or benchmark the catalog snapshot")
+    parser.add_argument('command', choices=['build', 'bench', '_probe'])
+    parser.add_argument('args', nargs='*')
+    parser.add_argument('--out', default=str(DEFAULT_PATH))
+    parser.add_argument('--no-embeddings', action='store_true')
+    parser.add_argument('--rows', type=int, default=50000, help="bench: synthetic catalog size")
+    args = parser.parse_args()
+
+    if args.command == '_probe':
+        _probe(*args.args)
+    elif args.command == 'bench':
+        bench(args.rows)
+    else:
+        from supabase import create_client
+        from dotenv import load_dotenv
+        from catalog_stream import stream_rows
+        load_dotenv('.env.local')
+        url, key = os.getenv("NEXT_PUBLIC_SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+        if not url or not key:
+            print("❌ Error: Missing Supabase credentials in .env.local")
+            sys.exit(1)
+        columns = BUILD_COLUMNS.replace(', embedding', '') if args.no_embeddings else BUILD_COLUMNS
+        start = time.time()
+        count = build_snapshot(stream_rows(create_client(url, key), 'resources', columns, page_size=200 if not args.no_embeddings else 1000),
+                               args.out, embeddings=not args.no_embeddings)
+        print(f"✅ Snapshot of {count} resources written to {args.out} "
+              f"({Path(args.out).stat().st_size / 1e6:.1f} MB, {time.time() - start:.1f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import time
+
+from catalog_stream import stream_rows
+
+# Catalog statistics for diagnostics ("systems test"), served from a short-TTL cache.
+# Backed by the catalog_stats() RPC (supabase/migrations/20260203_catalog_stats.sql),
+# which reads trigger-maintained per-category counts instead of scanning resources.
+
+class CatalogStats:
+    def __init__(self, ttl_seconds=30, recent=15):
+        self.ttl_seconds = ttl_seconds
+        self.recent = recent
+        self._cached = None
+        self._fetched_at = 0.0
+
+    def get(self, client):
+        """Returns {'total', 'categories': [{'category', 'count'}], 'recent': [...]}, cached for ttl_seconds."""
+        now = time.time()
+        if self._cached is not None and now - self._fetched_at < self.ttl_seconds:
+            return self._cached
+        self._cached = self._fetch(client)
+        self._fetched_at = now
+        return self._cached
+
+    def invalidate(self):
+        self._cached = None
+
+    def _fetch(self, client):
+        try:
+            res = client.rpc('catalog_stats', {'p_recent': self.recent}).execute()
+            if isinstance(res.data, dict):
+                return res.data
+        except Exception as e:
+            print(f"⚠️ catalog_stats RPC unavailable ({e}). Falling back to table queries.")
+        return self._fetch_legacy(client)
+
+    def _fetch_legacy(self, client):
+        """Pre-migration path (O(rows): streams every category)."""
+        total = client.table('resources').select('*', count='exact', head=True).execute().count
+        recent = client.table('resources').select('name, category, created_at').order('created_at', desc=True).limit(self.recent).execute()
+        counts = {}
+        for r in stream_rows(client, 'resources', 'category'):
+            if r.get('category'):
+                counts[r['category']] = counts.get(r['category'], 0) + 1
+        return {
+            'total': total,
+            'categories': [{'category': c, 'count': n} for c, n in sorted(counts.items())],
+            'recent': recent.data or [],
+        }
@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+# Keyset-paginated streaming reads for resources, leads and agent_tasks.
+# select('*').execute() over a whole table is capped by the API's max-rows setting (silently
+# truncated) and slows down with the catalog; these helpers page on the primary key instead
+# (WHERE id > last ORDER BY id LIMIT n), so every page is an index range scan and memory
+# stays at one page no matter how large the table is.
+# Usage:
+#   python3 scripts/catalog_stream.py export resources --out resources.jsonl [--columns "id, name"] [--format parquet]
+#   python3 scripts/catalog_stream.py count leads
+
+TABLES = ('resources', 'leads', 'agent_tasks')
+PAGE_SIZE = 1000  # PostgREST's default max-rows; larger pages are capped by the server
+RETRIES = 3
+PARQUET_ROW_GROUP = 50_000
+# Parquet column types for non-text columns; everything else (uuid, timestamps, jsonb as JSON) is a string
+PARQUET_TYPES = {'attempts': 'int64', 'count': 'int64', 'score': 'float64', 'distance_km': 'float64'}
+
+def stream_rows(client, table, columns='*', page_size=PAGE_SIZE, where=None, key='id'):
+    """
+    Yields rows of `table` lazily in `key` order, one page per request.
+    where: optional callable(query) -> query adding filters (e.g. lambda q: q.eq('status', 'pending')).
+    Only an empty page ends the stream: the server's max-rows may cap a page below page_size.
+    """
+    if columns != '*' and key not in [c.strip() for c in columns.split(',')]:
+        columns = f"{key}, {columns}"
+    last = None
+    while True:
+        for attempt in range(RETRIES):
+            try:
+                query = client.table(table).select(columns)
+                if where:
+                    query = where(query)
+                if last is not None:
+                    query = query.gt(key, last)
+                page = query.order(key).limit(page_size).execute().data or []
+                break
+            except Exception as e:
+                if attempt == RETRIES - 1:
+                    raise
+                print(f"⚠️ {table} page after {last} failed ({e}), retrying...")
+                time.sleep(2 ** attempt)
+        if not page:
+            return
+        yield from page
+        last = page[-1][key]
+
+def count_rows(client, table):
+    """Exact row count without transferring rows."""
+    return client.table(table).select('*', count='exact', head=True).execute().count
+
+class RateMeter:
+    """Counts rows as they pass through and reports rows/s."""
+
+    def __init__(self, rows, every=10_000, label='rows'):
+        self.rows = rows
+        self.every = every
+        self.label = label
+        self.count = 0
+        self.started = None
+
+    def __iter__(self):
+        self.started = time.time()
+        for row in self.rows:
+            self.count += 1
+            if self.every and self.count % self.every == 0:
+                print(f"   ⏩ {self.count} {self.label} ({self.rate:.0f} rows/s)")
+            yield row
+
+    @property
+    def rate(self):
+        elapsed = time.time() - (self.started or time.time())
+        return self.count / elapsed if elapsed else 0.0
+
+def export_jsonl(rows, path):
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+            count += 1
+    return count
+
+def export_parquet(rows, path, row_group=PARQUET_ROW_GROUP):
+    """
+    Writes row groups of `row_group` rows (needs pyarrow). Nested jsonb/array values are stored as JSON text.
+    The schema comes from the column names (PARQUET_TYPES), not from the first batch's values, so a
+    column that is all null early on doesn't break later row groups.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("❌ Parquet export needs pyarrow (pip install pyarrow)")
+        sys.exit(1)
+
+    writer, columns, schema, batch, count = None, None, None, [], 0
+
+    def flush():
+        nonlocal writer
+        data = {c: [_cell(r.get(c), c not in PARQUET_TYPES) for r in batch] for c in columns}
+        table = pa.Table.from_pydict(data, schema=schema)
+        if writer is None:
+            writer = pq.ParquetWriter(path, schema)
+        writer.write_table(table)
+
+    for row in rows:
+        if columns is None:
+            columns = list(row)
+            schema = pa.schema([(c, getattr(pa, PARQUET_TYPES.get(c, 'string'))()) for c in columns])
+        batch.append(row)
+        count += 1
+        if len(batch) >= row_group:
+            flush()
+            batch = []
+    if batch:
+        flush()
+    if writer:
+        writer.close()
+    return count
+
+def _cell(value, as_text):
+    if value is None or not as_text or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+def main():
+    from supabase import create_client
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Stream or export catalog tables")
+    parser.add_argument('command', choices=['export', 'count'])
+    parser.add_argument('table', choices=TABLES)
+    parser.add_argument('--out', help="Output file (export)")
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default=None, help="Default: from --out extension")
+    parser.add_argument('--columns', default='*')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+    args = parser.parse_args()
+
+    load_dotenv('.env.local')
+    url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        print("❌ Error: Missing Supabase credentials in .env.local")
+        sys.exit(1)
+    client = create_client(url, key)
+
+    if args.command == 'count':
+        print(f"📊 {args.table}: {count_rows(client, args.table)} rows")
+        return
+    if not args.out:
+        parser.error("export needs --out")
+
+    fmt = args.format or ('parquet' if args.out.endswith('.parquet') else 'jsonl')
+    rows = RateMeter(stream_rows(client, args.table, args.columns, args.page_size))
+    start = time.time()
+    count = export_parquet(rows, args.out) if fmt == 'parquet' else export_jsonl(rows, args.out)
+    elapsed = time.time() - start
+    print(f"✅ Exported {count} {args.table} rows to {args.out} in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
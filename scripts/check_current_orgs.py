@@ -4,6 +4,8 @@ import json
 from dotenv import load_dotenv
 from supabase import create_client
 
+from catalog_stream import stream_rows
+
 load_dotenv('.env.local')
 
 SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
@@ -16,15 +18,15 @@ if not SUPABASE_KEY:
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 try:
-    res = supabase.table('resources').select('*').execute()
-    resources = res.data
-    print(f"✅ Found {len(resources)} resources.")
-    for r in resources:
+    total = 0
+    for r in stream_rows(supabase, 'resources', 'id, name, category, description, programs'):
+        total += 1
         print(f"--- {r['name']} ---")
         print(f"Category: {r['category']}")
         print(f"Description: {r.get('description', '')}")
         print(f"Programs: {json.dumps(r.get('programs', []), indent=2)}")
         print("\n")
+    print(f"✅ Found {total} resources.")
 
 except Exception as e:
     print(f"❌ Error: {e}")
@@ -2,6 +2,8 @@ import os
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
+from catalog_stream import stream_rows
+
 load_dotenv('.env.local')
 
 SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
@@ -15,12 +17,13 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 def check_status():
     print("📊 Checking Ingestion Status...")
-    response = supabase.table("resources").select("name").execute()
-    data = response.data
-    
-    print(f"✅ Total Resources Ingested: {len(data)}")
-    for item in data:
+    # Streamed in keyset pages: a plain select() stops at the API's row cap
+    total = 0
+    for item in stream_rows(supabase, 'resources', 'name'):
+        total += 1
         print(f" - {item['name']}")
 
+    print(f"✅ Total Resources Ingested: {total}")
+
 if __name__ == "__main__":
     check_status()
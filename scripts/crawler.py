@@ -0,0 +1,339 @@
+import asyncio
+import heapq
+import re
+import xml.etree.ElementTree as ET
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+
+from extract_text import extract_text
+
+# Multi-page crawl per org (Agent Delta) that fills resources.programs / application_process.
+# - Frontier seeded from robots.txt Sitemap: lines (or /sitemap.xml) plus the homepage
+# - Same-site links only (under the root URL's path when it has one, e.g. an org's page on a
+#   city site), canonicalized and deduplicated; robots.txt Disallow respected
+# - Priority queue favours programs/services/apply pages; depth, page and frontier caps
+# - Pages are parsed and dropped as they are crawled: only extracted programs are kept,
+#   so memory per org is bounded by the frontier cap, not by the size of the site
+
+MAX_PAGES = 25
+MAX_DEPTH = 3
+MAX_FRONTIER = 200
+MAX_SITEMAPS = 5
+MAX_PAGE_CHARS = 500_000     # Larger pages are truncated before parsing
+MAX_PROGRAMS = 12
+ORG_CONCURRENCY = 4
+
+PRIORITY_HINTS = {
+    'program': 5, 'service': 5, 'apply': 4, 'eligib': 4, 'enroll': 3, 'get-help': 3, 'what-we-do': 3,
+    'intake': 3, 'help': 2, 'resource': 2, 'about': 1,
+}
+PENALTY_HINTS = ('blog', 'news', 'event', 'donat', 'career', 'job', 'privacy', 'terms', 'login', 'cart', 'shop',
+                 'tag/', 'category/', 'author/', 'feed', 'wp-', 'press', 'gallery', 'calendar')
+PROGRAM_PAGE_HINTS = ('program', 'service', 'what-we-do', 'our-work')
+APPLY_PAGE_HINTS = ('apply', 'eligib', 'enroll', 'intake', 'get-help', 'how-to')
+SKIP_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.zip', '.doc', '.docx', '.xls',
+                   '.xlsx', '.ppt', '.mp3', '.mp4', '.mov', '.css', '.js', '.ico', '.xml')
+TRACKING_PARAMS = re.compile(r"^(utm_|fbclid$|gclid$|mc_cid$|mc_eid$|ref$|_ga$)")
+GENERIC_HEADINGS = re.compile(
+    r"^(contact|contact us|donate|donate now|get involved|volunteer|news|latest news|events|upcoming events|"
+    r"about|about us|our mission|mission|our team|staff|board|partners|sponsors|follow us|subscribe|newsletter|"
+    r"menu|search|share|quick links|related|testimonials|faq|faqs|programs|services|our programs|our services)$",
+    re.I)
+
+# --- URLs ---
+
+def canonicalize_url(url, base=None):
+    """Absolute, lower-cased scheme/host, no fragment/default port/tracking params, sorted query, no trailing slash."""
+    if base:
+        url = urljoin(base, url)
+    parts = urlsplit(url.strip())
+    if parts.scheme not in ('http', 'https'):
+        return None
+    host = (parts.hostname or '').lower()
+    if parts.port and not ((parts.scheme == 'http' and parts.port == 80) or (parts.scheme == 'https' and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path or '/')
+    path = re.sub(r"/index\.(html?|php)$", "/", path)
+    if len(path) > 1:
+        path = path.rstrip('/')
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not TRACKING_PARAMS.match(k)))
+    return urlunsplit((parts.scheme.lower(), host, path, query, ''))
+
+def site_key(url):
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+def score_url(url, anchor=""):
+    haystack = f"{urlsplit(url).path} {anchor}".lower()
+    score = sum(weight for hint, weight in PRIORITY_HINTS.items() if hint in haystack)
+    if any(hint in haystack for hint in PENALTY_HINTS):
+        score -= 5
+    return score
+
+# --- Page parsing ---
+
+class _PageParser(HTMLParser):
+    """One streaming pass: same-page links (nav included) and heading/text blocks (nav/footer excluded)."""
+
+    SKIP = {'script', 'style', 'nav', 'footer', 'header', 'noscript', 'svg', 'template', 'head', 'form'}
+    HEADINGS = {'h1', 'h2', 'h3', 'h4'}
+    MAX_BLOCKS = 400
+    MAX_BLOCK_CHARS = 1000
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self.blocks = [['text', '']]
+        self.title = ''
+        self.skip_depth = 0
+        self.in_title = False
+        self.anchor = None  # [href, text] while inside <a>
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            self.anchor = [href, ''] if href else None
+        elif tag == 'title':
+            self.in_title = True
+        elif tag in self.SKIP:
+            self.skip_depth += 1
+        elif tag in self.HEADINGS and not self.skip_depth:
+            self._new_block(tag)
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self.anchor:
+            self.links.append((self.anchor[0], self.anchor[1].strip()))
+            self.anchor = None
+        elif tag == 'title':
+            self.in_title = False
+        elif tag in self.SKIP:
+            if self.skip_depth: self.skip_depth -= 1
+        elif tag in self.HEADINGS and not self.skip_depth:
+            self._new_block('text')
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title += data
+        if self.anchor is not None:
+            self.anchor[1] += data
+        if self.skip_depth or not data.strip():
+            return
+        block = self.blocks[-1]
+        if len(block[1]) < self.MAX_BLOCK_CHARS:
+            block[1] = f"{block[1]} {data.strip()}".strip()
+
+    def _new_block(self, kind):
+        if not self.blocks[-1][1]:
+            self.blocks[-1][0] = kind
+        elif len(self.blocks) < self.MAX_BLOCKS:
+            self.blocks.append([kind, ''])
+
+def parse_page(html):
+    parser = _PageParser()
+    parser.feed(html[:MAX_PAGE_CHARS])
+    parser.close()
+    return parser
+
+def _trim(text, limit=300):
+    text = re.sub(r"\s+", " ", text).strip()
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    end = max(cut.rfind('. '), cut.rfind('! '), cut.rfind('? '))
+    return cut[:end + 1] if end > limit // 2 else cut.rsplit(' ', 1)[0] + "..."
+
+def extract_programs(blocks, page_url):
+    """h2-h4 sections with a real description -> [{'name', 'description', 'url'}]."""
+    programs = []
+    for i, (kind, text) in enumerate(blocks):
+        if kind not in ('h2', 'h3', 'h4'):
+            continue
+        name = re.sub(r"\s+", " ", text).strip(" :-–|")
+        if not (3 <= len(name) <= 80) or GENERIC_HEADINGS.match(name):
+            continue
+        body = []
+        for next_kind, next_text in blocks[i + 1:]:
+            if next_kind != 'text':
+                break
+            body.append(next_text)
+        description = _trim(" ".join(body))
+        if len(description) >= 20:
+            programs.append({'name': name, 'description': description, 'url': page_url})
+    return programs
+
+def extract_application_process(blocks):
+    """Text under an apply/eligibility heading, else the opening text of the page."""
+    for i, (kind, text) in enumerate(blocks):
+        if kind != 'text' and re.search(r"apply|application|eligib|how to|get started|intake|enroll", text, re.I):
+            body = " ".join(t for k, t in blocks[i + 1:i + 4] if k == 'text')
+            if len(body) >= 20:
+                return _trim(body, 500)
+    body = " ".join(t for k, t in blocks if k == 'text')
+    return _trim(body, 500) if len(body) >= 20 else None
+
+def parse_sitemap(xml_text):
+    """(page_urls, child_sitemap_urls) from a urlset or sitemapindex document."""
+    try:
+        root = ET.fromstring(xml_text.encode('utf-8') if isinstance(xml_text, str) else xml_text)
+    except ET.ParseError:
+        return [], []
+    locs = [el.text.strip() for el in root.iter() if el.tag.endswith('loc') and el.text]
+    if root.tag.endswith('sitemapindex'):
+        return [], locs
+    return locs, []
+
+# --- Crawl ---
+
+class CrawlResult:
+    __slots__ = ('org', 'root_url', 'pages', 'homepage_text', 'programs', 'application_process',
+                 'errors', 'peak_frontier', 'sitemap_urls')
+
+    def __init__(self, org, root_url):
+        self.org = org
+        self.root_url = root_url
+        self.pages = []
+        self.homepage_text = None
+        self.programs = []
+        self.application_process = None
+        self.errors = 0
+        self.peak_frontier = 0
+        self.sitemap_urls = 0
+
+    @property
+    def ok(self):
+        return self.homepage_text is not None
+
+class Frontier:
+    """Bounded priority queue of (-score, depth, seq, url); dedups on canonical URL."""
+
+    def __init__(self, cap=MAX_FRONTIER):
+        self.cap = cap
+        self.heap = []
+        self.seen = set()
+        self.seq = 0
+        self.peak = 0
+
+    def push(self, url, depth, score):
+        if url in self.seen:
+            return
+        self.seen.add(url)
+        self.seq += 1
+        heapq.heappush(self.heap, (-score, depth, self.seq, url))
+        if len(self.heap) > self.cap * 2:
+            # Keep the best `cap` entries; dropped URLs stay in `seen` and are not re-queued
+            self.heap = heapq.nsmallest(self.cap, self.heap)
+            heapq.heapify(self.heap)
+        self.peak = max(self.peak, min(len(self.heap), self.cap * 2))
+
+    def pop(self):
+        entry = heapq.heappop(self.heap)
+        return entry[3], entry[1]
+
+    def __len__(self):
+        return len(self.heap)
+
+class OrgCrawler:
+    """
+    Usage:
+        async with Fetcher(...) as fetcher:
+            result = await OrgCrawler(fetcher, "Org", "https://org.example").crawl()
+    """
+
+    def __init__(self, fetcher, org, root_url, max_pages=MAX_PAGES, max_depth=MAX_DEPTH, max_frontier=MAX_FRONTIER):
+        self.fetcher = fetcher
+        self.result = CrawlResult(org, root_url)
+        self.root = canonicalize_url(root_url)
+        self.site = site_key(self.root)
+        # A root like https://city.gov/About/Charitable-Organizations scopes the crawl to that section
+        self.scope = urlsplit(self.root).path.rstrip('/').lower()
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.frontier = Frontier(max_frontier)
+        self.robots = None
+
+    def _allowed(self, url):
+        if not url or site_key(url) != self.site:
+            return False
+        path = urlsplit(url).path.lower()
+        if self.scope and path != self.scope and not path.startswith(self.scope + '/'):
+            return False
+        if path.endswith(SKIP_EXTENSIONS):
+            return False
+        return self.robots is None or self.robots.can_fetch('*', url)
+
+    async def _load_robots(self):
+        res = await self.fetcher.fetch(urljoin(self.root, '/robots.txt'))
+        if not res.ok:
+            return []
+        self.robots = RobotFileParser()
+        self.robots.parse(res.text.splitlines())
+        return self.robots.site_maps() or []
+
+    async def _seed_from_sitemaps(self, sitemaps):
+        queue = list(sitemaps) or [urljoin(self.root, '/sitemap.xml')]
+        fetched = 0
+        while queue and fetched < MAX_SITEMAPS:
+            res = await self.fetcher.fetch(queue.pop(0))
+            fetched += 1
+            if not res.ok:
+                continue
+            pages, children = parse_sitemap(res.text)
+            queue.extend(children)
+            for loc in pages:
+                url = canonicalize_url(loc)
+                if self._allowed(url):
+                    self.result.sitemap_urls += 1
+                    self.frontier.push(url, 1, score_url(url))
+
+    async def crawl(self):
+        sitemaps = await self._load_robots()
+        self.frontier.push(self.root, 0, 100)  # Homepage first
+        await self._seed_from_sitemaps(sitemaps)
+
+        programs = {}
+        while self.frontier and len(self.result.pages) < self.max_pages:
+            url, depth = self.frontier.pop()
+            res = await self.fetcher.fetch(url)
+            if not res.ok:
+                self.result.errors += 1
+                continue
+            final = canonicalize_url(res.final_url) or url
+            if final != url and final in self.result.pages:
+                continue  # Redirected onto a page we already have
+            self.result.pages.append(final)
+
+            page = parse_page(res.text)
+            if url == self.root:
+                self.result.homepage_text = extract_text(res.text)
+            haystack = f"{urlsplit(final).path} {page.title}".lower()
+            if any(hint in haystack for hint in PROGRAM_PAGE_HINTS):
+                for program in extract_programs(page.blocks, final):
+                    programs.setdefault(program['name'].lower(), program)
+            if self.result.application_process is None and any(hint in haystack for hint in APPLY_PAGE_HINTS):
+                self.result.application_process = extract_application_process(page.blocks)
+
+            if depth < self.max_depth:
+                for href, anchor in page.links:
+                    link = canonicalize_url(href, final)
+                    if self._allowed(link):
+                        self.frontier.push(link, depth + 1, score_url(link, anchor))
+
+        self.result.programs = list(programs.values())[:MAX_PROGRAMS]
+        self.result.peak_frontier = self.frontier.peak
+        return self.result
+
+async def crawl_all(fetcher, targets, max_pages=MAX_PAGES, max_depth=MAX_DEPTH, org_concurrency=ORG_CONCURRENCY):
+    """Crawls [{'org', 'url'}] concurrently (at most org_concurrency orgs in flight). Returns CrawlResults in order."""
+    gate = asyncio.Semaphore(org_concurrency)
+
+    async def run(target):
+        async with gate:
+            crawler = OrgCrawler(fetcher, target['org'], target['url'], max_pages=max_pages, max_depth=max_depth)
+            try:
+                return await crawler.crawl()
+            except Exception as e:
+                print(f"⚠️ Crawl failed for {target['org']}: {e}")
+                return crawler.result
+
+    return await asyncio.gather(*(run(t) for t in targets))
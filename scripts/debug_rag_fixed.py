@@ -5,6 +5,7 @@ import asyncio
 import json
 from supabase import create_client
 from dotenv import load_dotenv
+from resource_record import SEARCH_COLUMNS
 
 load_dotenv('.env.local') or load_dotenv('onward/.env.local')
 
@@ -32,7 +33,7 @@ def test_query():
     print(f"   Filter String: {or_filter}")
     
     try:
-        res = supabase.table('resources').select('*').or_(or_filter).execute()
+        res = supabase.table('resources').select(SEARCH_COLUMNS).or_(or_filter).execute()
         print(f"   ✅ Found {len(res.data)} results.")
         for r in res.data:
             print(f"      - {r['name']} (Main: {r['category']}, Sec: {r.get('secondary_categories')})")
@@ -5,6 +5,7 @@ import json
 from supabase import create_client
 
 from dotenv import load_dotenv
+from resource_record import SEARCH_COLUMNS
 load_dotenv('.env.local') or load_dotenv('onward/.env.local')
 
 SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
@@ -25,7 +26,7 @@ def debug_rag(query):
     
     # Primary Text Search
     try:
-        res = supabase.table('resources').select('*').text_search('description', query, config='english').limit(5).execute()
+        res = supabase.table('resources').select(SEARCH_COLUMNS).text_search('description', query, config='english').limit(5).execute()
         final_data.extend(res.data or [])
         print(f"   [Text Search] Found: {len(res.data)} items")
     except Exception as e:
@@ -34,7 +35,7 @@ def debug_rag(query):
     # Tech Expansion
     if any(k in query.lower() for k in tech_keywords):
          print("   [Logic] Tech keywords detected. Expanding to 'education', 'employment'...")
-         extra = supabase.table('resources').select('*').in_('category', ['education', 'employment', 'other']).limit(20).execute()
+         extra = supabase.table('resources').select(SEARCH_COLUMNS).in_('category', ['education', 'employment', 'other']).limit(20).execute()
          print(f"   [Expansion] Found: {len(extra.data)} items in eligible categories.")
          final_data.extend(extra.data or [])
 
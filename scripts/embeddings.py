@@ -0,0 +1,213 @@
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import time
+from array import array
+from pathlib import Path
+
+from ingest import normalize_text
+
+# Embedding stage for ingest and backfill (fills resources.embedding, vector(768)).
+# - Each resource is split into chunks (name/category/description + one per program);
+#   chunk vectors are mean-pooled into the row's single embedding
+# - Chunks are embedded in batches by a pluggable embedder (OpenAI, or a deterministic
+#   local hash embedder for verify scripts / offline runs)
+# - Vectors are cached on disk keyed by sha256(model + chunk text), so an unchanged
+#   catalog costs zero embedder calls and an edited program only re-embeds that chunk
+# - Chunk text comes from stored columns only (embedding_text), so ingest and backfill
+#   produce the same chunks, cache keys and vector for the same row
+
+EMBED_DIM = 768
+DEFAULT_CACHE = Path(__file__).parent / '.embedding_cache.sqlite'
+EMBEDDING_COLUMNS = 'id, name, category, secondary_categories, description, programs'  # Everything embedding_text reads
+DEFAULT_BATCH_SIZE = 96
+CHUNK_CHARS = 1500
+CHUNK_OVERLAP = 200
+
+# --- Embedders ---
+
+class HashEmbedder:
+    """Deterministic feature-hashing embedder (no network). Shared words -> similar vectors."""
+
+    def __init__(self, dim=EMBED_DIM):
+        self.dim = dim
+        self.model = f"hash-v1:{dim}"
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        vectors = []
+        for text in texts:
+            vec = [0.0] * self.dim
+            for token in re.findall(r"\w+", text.lower()):
+                h = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+                vec[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+            vectors.append(_unit(vec))
+        return vectors
+
+class OpenAIEmbedder:
+    """text-embedding-3-small truncated to the schema's 768 dims."""
+
+    def __init__(self, model='text-embedding-3-small', dim=EMBED_DIM, client=None, retries=3):
+        from openai import OpenAI
+        self.client = client or OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.dim = dim
+        self.model = f"openai:{model}:{dim}"
+        self._model_name = model
+        self.retries = retries
+        self.calls = 0
+
+    def embed(self, texts):
+        for attempt in range(self.retries):
+            try:
+                self.calls += 1
+                res = self.client.embeddings.create(model=self._model_name, input=texts, dimensions=self.dim)
+                return [item.embedding for item in sorted(res.data, key=lambda d: d.index)]
+            except Exception as e:
+                if attempt == self.retries - 1:
+                    raise
+                print(f"⚠️ Embedding batch failed ({e}), retrying...")
+                time.sleep(2 ** attempt)
+
+def make_embedder(name=None):
+    """
+    EMBEDDER=openai|hash (defaults to openai when OPENAI_API_KEY is set). Hash vectors are only
+    for offline runs, so they must be asked for: with neither, this raises instead of writing
+    meaningless vectors into resources.embedding.
+    """
+    name = name or os.getenv("EMBEDDER") or ('openai' if os.getenv("OPENAI_API_KEY") else None)
+    if not name:
+        raise ValueError("No embedder configured: set OPENAI_API_KEY, or EMBEDDER=hash for offline runs")
+    if name == 'openai':
+        return OpenAIEmbedder()
+    if name == 'hash':
+        return HashEmbedder()
+    raise ValueError(f"Unknown embedder: {name}")
+
+# --- Chunking ---
+
+def chunk_text(text, max_chars=CHUNK_CHARS, overlap=CHUNK_OVERLAP):
+    """Splits on sentence boundaries into <= max_chars pieces, carrying `overlap` chars of context forward."""
+    text = normalize_text(text)
+    if len(text) <= max_chars:
+        return [text] if text else []
+    chunks, current = [], ""
+    for sentence in re.split(r"(?<=[.!?])\s+", text):
+        while len(sentence) > max_chars:  # One giant "sentence" (lists, scraped nav text)
+            head, sentence = sentence[:max_chars], sentence[max_chars - overlap:]
+            if current: chunks.append(current); current = ""
+            chunks.append(head)
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            chunks.append(current)
+            current = current[-overlap:] + " " + sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+def embedding_text(row):
+    """(header, body) a resources row is embedded from: name | category | secondary categories, and the description."""
+    header = " | ".join(filter(None, [row.get('name'), row.get('category'), *(row.get('secondary_categories') or [])]))
+    return header, row.get('description') or ""
+
+def resource_chunks(record):
+    """Texts to embed for one resources row (EMBEDDING_COLUMNS), whether it comes from ingest or backfill."""
+    header, body = embedding_text(record)
+    chunks = [f"{header}. {c}" for c in chunk_text(body)] or [header]
+    for program in record.get('programs') or []:
+        if isinstance(program, dict) and program.get('name'):
+            chunks.append(f"{record.get('name')} - {program['name']}: {program.get('description') or ''}".strip())
+    return chunks
+
+# --- Cache ---
+
+def cache_key(model, text):
+    return hashlib.sha256(f"{model}\0{text}".encode('utf-8')).hexdigest()
+
+class EmbeddingCache:
+    """sqlite key/value store: cache_key -> float32 vector bytes."""
+
+    def __init__(self, path=DEFAULT_CACHE):
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):  # sqlite variable limit
+            chunk = keys[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            for key, blob in self.conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", chunk):
+                found[key] = array('f', blob).tolist()
+        return found
+
+    def put_many(self, items):
+        self.conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                              [(key, array('f', vec).tobytes()) for key, vec in items])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+# --- Pipeline ---
+
+def _unit(vec):
+    norm = math.sqrt(sum(v * v for v in vec))
+    return [v / norm for v in vec] if norm else vec
+
+def mean_pool(vectors):
+    if len(vectors) == 1:
+        return list(vectors[0])
+    return _unit([sum(col) / len(vectors) for col in zip(*vectors)])
+
+class EmbeddingPipeline:
+    """
+    Usage:
+        pipeline = EmbeddingPipeline(make_embedder())
+        IncrementalIngest(supabase, embed_fn=pipeline.embed_records)
+    """
+
+    def __init__(self, embedder, cache=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.embedder = embedder
+        self.cache = cache or EmbeddingCache()
+        self.batch_size = batch_size
+        self.stats = {'chunks': 0, 'cache_hits': 0, 'embedded': 0, 'calls': 0, 'seconds': 0.0}
+
+    def embed_texts(self, texts):
+        """One vector per text; only cache misses go to the embedder, deduplicated and batched."""
+        start = time.time()
+        keys = [cache_key(self.embedder.model, t) for t in texts]
+        vectors = self.cache.get_many(set(keys))
+        self.stats['chunks'] += len(texts)
+        self.stats['cache_hits'] += sum(1 for k in keys if k in vectors)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        pending = list(missing.items())
+        for offset in range(0, len(pending), self.batch_size):
+            batch = pending[offset:offset + self.batch_size]
+            fresh = self.embedder.embed([text for _, text in batch])
+            self.stats['calls'] += 1
+            self.stats['embedded'] += len(batch)
+            items = [(key, vec) for (key, _), vec in zip(batch, fresh)]
+            self.cache.put_many(items)
+            vectors.update(items)
+
+        self.stats['seconds'] = round(self.stats['seconds'] + time.time() - start, 2)
+        return [vectors[k] for k in keys]
+
+    def embed_records(self, records):
+        """embed_fn for IncrementalIngest: one pooled vector per record, all chunks embedded in one pass."""
+        per_record = [resource_chunks(r) for r in records]
+        flat = self.embed_texts([c for chunks in per_record for c in chunks])
+        out, offset = [], 0
+        for chunks in per_record:
+            out.append(mean_pool(flat[offset:offset + len(chunks)]))
+            offset += len(chunks)
+        return out
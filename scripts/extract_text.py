@@ -0,0 +1,90 @@
+import re
+from html.parser import HTMLParser
+
+# Streaming HTML -> text for ingestion.
+# Feeds the document through the stdlib incremental parser in chunks and stops as soon
+# as we have enough text, instead of building a full tree and truncating afterwards.
+# - script/style/nav/footer/header/noscript/svg/template/head content is dropped
+# - text inside <main>, <article> or role="main" is preferred over the rest of the page
+
+DEFAULT_BUDGET = 5000
+CHUNK_SIZE = 16384
+MAIN_LOOKAHEAD = 65536  # Input chars to keep scanning for <main>/<article> once the fallback buffer is full
+
+SKIP_TAGS = {'script', 'style', 'nav', 'footer', 'header', 'noscript', 'svg', 'template', 'head', 'iframe'}
+MAIN_TAGS = {'main', 'article'}
+
+class _Done(Exception):
+    pass
+
+class _StreamingExtractor(HTMLParser):
+    def __init__(self, budget):
+        super().__init__(convert_charrefs=True)
+        self.budget = budget
+        self.skip_depth = 0
+        self.main_stack = []        # [tag, nested same-tag depth] per open main/article/role=main element
+        self.main_parts, self.main_len = [], 0
+        self.other_parts, self.other_len = [], 0
+        self.seen_main = False
+        self.consumed = 0
+        self.other_full_at = None   # Input offset at which the fallback buffer filled up
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in MAIN_TAGS or dict(attrs).get('role') == 'main':
+            self.main_stack.append([tag, 0])
+            self.seen_main = True
+        elif self.main_stack and self.main_stack[-1][0] == tag:
+            self.main_stack[-1][1] += 1  # <div role="main"><div>: the inner </div> must not close main
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            if self.skip_depth: self.skip_depth -= 1
+        elif self.main_stack and self.main_stack[-1][0] == tag:
+            if self.main_stack[-1][1]:
+                self.main_stack[-1][1] -= 1
+                return
+            self.main_stack.pop()
+            # The page's <main> is the content we want; nothing after it matters
+            if tag == 'main' and not self.main_stack and self.main_len:
+                raise _Done()
+
+    def handle_data(self, data):
+        if self.skip_depth: return
+        text = data.strip()
+        if not text: return
+        if self.main_stack:
+            self.main_parts.append(text)
+            self.main_len += len(text) + 1
+            if self.main_len >= self.budget:
+                raise _Done()
+        elif self.other_len < self.budget:
+            self.other_parts.append(text)
+            self.other_len += len(text) + 1
+            if self.other_len >= self.budget:
+                self.other_full_at = self.consumed
+
+    def result(self):
+        parts = self.main_parts if self.main_len else self.other_parts
+        return re.sub(r"\s+", " ", " ".join(parts)).strip()[:self.budget]
+
+def extract_text_chunks(chunks, budget=DEFAULT_BUDGET):
+    """Extracts up to `budget` characters from an iterable of HTML text chunks, reading as few as possible."""
+    parser = _StreamingExtractor(budget)
+    try:
+        for chunk in chunks:
+            parser.consumed += len(chunk)
+            parser.feed(chunk)
+            if parser.other_full_at is not None and not parser.seen_main \
+                    and parser.consumed - parser.other_full_at > MAIN_LOOKAHEAD:
+                break
+        parser.close()
+    except _Done:
+        pass
+    return parser.result()
+
+def extract_text(html, budget=DEFAULT_BUDGET, chunk_size=CHUNK_SIZE):
+    """Streaming replacement for BeautifulSoup(html).get_text()[:budget]."""
+    if not html: return ""
+    return extract_text_chunks((html[i:i + chunk_size] for i in range(0, len(html), chunk_size)), budget)
@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import json
+import random
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import aiohttp
+
+# Polite concurrent page fetching for ingestion (Agent Delta).
+# - Global concurrency cap plus a minimum interval between requests to the same host
+# - Retries with jittered exponential backoff on timeouts, 429 and 5xx (honours Retry-After)
+# - On-disk HTTP cache: revalidates with ETag / Last-Modified so unchanged sites cost a 304
+
+# Browser-like headers (some org sites block obvious bots; see the old retry_failed.py)
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5'
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_CACHE_DIR = Path(__file__).parent / '.http_cache'
+
+class FetchResult:
+    __slots__ = ('url', 'status', 'text', 'from_cache', 'attempts', 'error', 'final_url')
+
+    def __init__(self, url, status=None, text=None, from_cache=False, attempts=0, error=None, final_url=None):
+        self.url = url
+        self.status = status
+        self.text = text
+        self.from_cache = from_cache
+        self.attempts = attempts
+        self.error = error
+        self.final_url = final_url or url
+
+    @property
+    def ok(self):
+        return self.text is not None
+
+class HttpCache:
+    """One JSON metadata file + one body file per URL, keyed by sha256(url)."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def get(self, url):
+        meta_path, body_path = self._paths(url)
+        if not meta_path.exists() or not body_path.exists(): return None
+        try:
+            meta = json.loads(meta_path.read_text())
+            meta['text'] = body_path.read_text(encoding='utf-8')
+            return meta
+        except Exception:
+            return None
+
+    def put(self, url, text, etag=None, last_modified=None, final_url=None):
+        meta_path, body_path = self._paths(url)
+        body_path.write_text(text, encoding='utf-8')
+        meta_path.write_text(json.dumps({
+            'url': url,
+            'final_url': final_url or url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+        }))
+
+    def touch(self, url):
+        """Records a successful revalidation (304)."""
+        meta_path, _ = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text())
+            meta['validated_at'] = time.time()
+            meta_path.write_text(json.dumps(meta))
+        except Exception:
+            pass
+
+class HostThrottle:
+    """Enforces a minimum spacing between request starts to the same host (call right before the request)."""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self.locks = {}
+        self.next_at = {}
+
+    async def wait(self, host):
+        lock = self.locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            delay = self.next_at.get(host, 0) - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_at[host] = max(now, self.next_at.get(host, 0)) + self.min_interval
+
+class Fetcher:
+    """
+    Usage:
+        async with Fetcher(concurrency=8, per_host_interval=1.0) as fetcher:
+            results = await fetcher.fetch_all(urls)
+    """
+
+    def __init__(self, concurrency=8, per_host_interval=1.0, retries=3, timeout=20,
+                 backoff_base=1.0, backoff_max=30.0, cache_dir=DEFAULT_CACHE_DIR, headers=None):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.throttle = HostThrottle(per_host_interval)
+        self.retries = retries
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = HttpCache(cache_dir) if cache_dir else None
+        self.headers = headers or DEFAULT_HEADERS
+        self.session = None
+        self.stats = {'fetched': 0, 'not_modified': 0, 'failed': 0, 'retries': 0}
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(headers=self.headers, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # Full jitter: uniform(0, base * 2^attempt)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def fetch(self, url):
+        cached = self.cache.get(url) if self.cache else None
+        conditional = {}
+        if cached:
+            if cached.get('etag'): conditional['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'): conditional['If-Modified-Since'] = cached['last_modified']
+
+        host = urlsplit(url).netloc.lower()
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats['retries'] += 1
+            retry_after = None
+            async with self.semaphore:
+                # Host slot taken inside the global slot: a request that queued on the semaphore
+                # can't start back to back with others for the same host
+                await self.throttle.wait(host)
+                try:
+                    async with self.session.get(url, headers=conditional) as response:
+                        if response.status == 304 and cached:
+                            self.cache.touch(url)
+                            self.stats['not_modified'] += 1
+                            return FetchResult(url, 304, cached['text'], from_cache=True, attempts=attempt + 1,
+                                               final_url=cached.get('final_url'))
+                        if response.status == 200:
+                            text = await response.text(errors='replace')
+                            if self.cache:
+                                self.cache.put(url, text, response.headers.get('ETag'),
+                                               response.headers.get('Last-Modified'), str(response.url))
+                            self.stats['fetched'] += 1
+                            return FetchResult(url, 200, text, attempts=attempt + 1, final_url=str(response.url))
+                        last_error = f"HTTP {response.status}"
+                        if response.status not in RETRY_STATUSES:
+                            break
+                        retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    last_error = f"{type(e).__name__}: {e}"
+            if attempt < self.retries:
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        self.stats['failed'] += 1
+        return FetchResult(url, error=last_error, attempts=attempt + 1)
+
+    async def fetch_all(self, urls):
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+def _parse_retry_after(value):
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
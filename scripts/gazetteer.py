@@ -0,0 +1,41 @@
+import math
+import re
+
+# Place names callers mention -> coordinates, so searches can rank by distance.
+# Covers the service area Keith is deployed in (LA / Orange County); unknown places return None
+# and search falls back to text-only ranking.
+
+PLACES = {
+    'los angeles': (34.0522, -118.2437), 'downtown la': (34.0407, -118.2468), 'south la': (33.9897, -118.2916),
+    'long beach': (33.7701, -118.1937), 'compton': (33.8958, -118.2201), 'lakewood': (33.8536, -118.1340),
+    'hollywood': (34.0928, -118.3287), 'carson': (33.8317, -118.2820), 'inglewood': (33.9617, -118.3531),
+    'pasadena': (34.1478, -118.1445), 'santa ana': (33.7455, -117.8677), 'torrance': (33.8358, -118.3406),
+    'bellflower': (33.8817, -118.1170), 'paramount': (33.8894, -118.1598), 'san pedro': (33.7361, -118.2923),
+    'downey': (33.9401, -118.1332), 'norwalk': (33.9022, -118.0817), 'whittier': (33.9792, -118.0328),
+    'el monte': (34.0686, -118.0276), 'pomona': (34.0551, -117.7500), 'glendale': (34.1425, -118.2551),
+    'burbank': (34.1808, -118.3090), 'watts': (33.9395, -118.2426), 'lynwood': (33.9303, -118.2115),
+    'gardena': (33.8883, -118.3090), 'hawthorne': (33.9164, -118.3526), 'wilmington': (33.7802, -118.2626),
+    'anaheim': (33.8366, -117.9143), 'van nuys': (34.1899, -118.4514), 'east la': (34.0239, -118.1720),
+}
+# Bare "la" is left out: in Spanish it is an article ("la comida"), not a place
+ALIASES = {'east los angeles': 'east la', 'south los angeles': 'south la', 'dtla': 'downtown la'}
+
+_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(p) for p in sorted(list(PLACES) + list(ALIASES), key=len, reverse=True)) + r")\b"
+)
+
+def find_place(text):
+    """First (longest-name-wins) place mentioned in text -> (name, lat, lon), or None."""
+    if not text: return None
+    m = _PATTERN.search(str(text).lower())
+    if not m: return None
+    name = ALIASES.get(m.group(1), m.group(1))
+    lat, lon = PLACES[name]
+    return name, lat, lon
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance; same formula as public.haversine_km in the search migration."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 6371.0 * 2 * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,305 @@
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from bisect import bisect
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from pathlib import Path
+
+# Deterministic synthetic catalog for scale testing (resources, users, leads).
+# Same --seed and sizes -> byte-identical output. Streams rows, so 1M leads never sit in memory.
+# Usage:
+#   python3 scripts/generate_catalog.py --resources 50000 --users 100000 --leads 1000000 --out data/synthetic
+#   DATABASE_URL=postgresql://postgres@localhost/keith_scale python3 scripts/generate_catalog.py --postgres [--reset]
+# JSONL output is load_catalog.py-compatible (resources.jsonl, leads.jsonl); users.jsonl is for auth seeding.
+# --postgres applies schema.sql + migrations to the local database (local_db.py) and COPYs the rows in.
+
+EPOCH = datetime(2026, 1, 31, tzinfo=timezone.utc)  # Fixed "now" so output never depends on the clock
+HISTORY_DAYS = 730
+
+CATEGORY_WEIGHTS = {
+    'food': 22, 'housing': 20, 'mental health': 12, 'health': 12, 'employment': 9,
+    'education': 8, 'legal': 7, 'childcare': 6, 'transportation': 4,
+}
+AUDIENCES = ['families', 'youth', 'seniors', 'veterans', 'utilities', 'financial']
+LEAD_STATUSES = ['new'] * 4 + ['submitted'] * 3 + ['acknowledged', 'contacted', 'on_hold', 'accepted', 'enrolled', 'cancelled', 'closed']
+
+# (city, lat, long, weight)
+CITIES = [
+    ('Los Angeles', 34.0522, -118.2437, 30), ('Long Beach', 33.7701, -118.1937, 14), ('Compton', 33.8958, -118.2201, 6),
+    ('Lakewood', 33.8536, -118.1340, 4), ('Hollywood', 34.0928, -118.3287, 5), ('Carson', 33.8317, -118.2820, 4),
+    ('Inglewood', 33.9617, -118.3531, 5), ('Pasadena', 34.1478, -118.1445, 5), ('Santa Ana', 33.7455, -117.8677, 6),
+    ('Torrance', 33.8358, -118.3406, 4), ('Bellflower', 33.8817, -118.1170, 3), ('Paramount', 33.8894, -118.1598, 2),
+    ('San Pedro', 33.7361, -118.2923, 3), ('Downey', 33.9401, -118.1332, 3), ('Norwalk', 33.9022, -118.0817, 3),
+    ('Whittier', 33.9792, -118.0328, 3), ('El Monte', 34.0686, -118.0276, 3), ('Pomona', 34.0551, -117.7500, 3),
+    ('Glendale', 34.1425, -118.2551, 4), ('Burbank', 34.1808, -118.3090, 3),
+]
+STREETS = ['Main St', 'Atlantic Ave', 'Long Beach Blvd', 'Pacific Coast Hwy', 'Alondra Blvd', 'Compton Blvd', 'Broadway',
+           'Figueroa St', 'Vermont Ave', 'Western Ave', 'Florence Ave', 'Artesia Blvd', 'Del Amo Blvd', 'Sunset Blvd']
+
+PREFIXES = ['Hope', 'Harbor', 'Unity', 'Bright Futures', 'New Beginnings', 'Community', 'Helping Hands', 'Open Door',
+            'Safe Haven', 'Pathways', 'Cornerstone', 'Beacon', 'Lighthouse', 'Good Neighbor', 'United', 'Grace',
+            'Second Chance', 'Rising', 'Common Ground', 'Family First']
+STEMS = {
+    'food': ['Food Bank', 'Pantry', 'Community Kitchen', 'Meals Program'],
+    'housing': ['Housing Alliance', 'Shelter', 'Home Partners', 'Housing Services'],
+    'legal': ['Legal Aid', 'Justice Center', 'Law Project'],
+    'health': ['Health Center', 'Community Clinic', 'Wellness Center'],
+    'mental health': ['Counseling Center', 'Behavioral Health', 'Wellness Collective'],
+    'transportation': ['Rides', 'Mobility Project', 'Transit Helpers'],
+    'childcare': ['Children\'s Center', 'Early Learning', 'Kids Club'],
+    'education': ['Learning Center', 'Literacy Project', 'Academy'],
+    'employment': ['Workforce Center', 'Jobs Project', 'Career Pathways'],
+}
+PROGRAMS = {
+    'food': [('Emergency Food Pantry', 'Weekly groceries for households in need, no ID required.'),
+             ('Hot Meals Program', 'Free hot lunches served daily to anyone who walks in.'),
+             ('Senior Grocery Delivery', 'Monthly grocery boxes delivered to homebound seniors.'),
+             ('CalFresh Enrollment Help', 'One-on-one help applying for CalFresh food benefits.'),
+             ('Mobile Food Market', 'Fresh produce distributed at rotating neighborhood sites.'),
+             ('Weekend Backpack Program', 'Take-home meals for students on weekends.')],
+    'housing': [('Emergency Shelter', 'Overnight beds, showers and case management for adults.'),
+                ('Rapid Rehousing', 'Short-term rent subsidies to move families into permanent homes.'),
+                ('Rental Assistance', 'One-time help with back rent for households facing eviction.'),
+                ('Transitional Housing', 'Up to 24 months of supportive housing with life-skills coaching.'),
+                ('Eviction Prevention', 'Tenant counseling and landlord mediation to keep people housed.'),
+                ('Permanent Supportive Housing', 'Long-term housing with on-site services.')],
+    'legal': [('Expungement Clinic', 'Free help clearing eligible criminal records.'),
+              ('Tenant Rights Hotline', 'Advice for renters on repairs, deposits and evictions.'),
+              ('Immigration Legal Services', 'Consultations and representation for immigration cases.'),
+              ('Family Law Assistance', 'Help with custody, support and restraining orders.'),
+              ('Benefits Appeals', 'Representation for denied SSI, Medi-Cal and CalFresh claims.')],
+    'health': [('Community Health Clinic', 'Primary care on a sliding fee scale.'),
+               ('Dental Van', 'Mobile cleanings and extractions for uninsured patients.'),
+               ('Prenatal Care', 'Checkups and classes for expecting mothers.'),
+               ('Substance Use Treatment', 'Outpatient recovery programs and support groups.'),
+               ('HIV Testing', 'Free confidential testing and linkage to care.')],
+    'mental health': [('Youth Counseling', 'Individual therapy for children and teens.'),
+                      ('Crisis Support Line', '24/7 phone support for people in emotional distress.'),
+                      ('Peer Support Groups', 'Weekly groups led by people with lived experience.'),
+                      ('Trauma Therapy', 'Evidence-based therapy (TF-CBT) for trauma survivors.'),
+                      ('Family Therapy', 'Counseling sessions for parents and children together.')],
+    'transportation': [('Medical Ride Program', 'Free rides to medical appointments.'),
+                       ('Bus Pass Assistance', 'Monthly transit passes for job seekers and students.'),
+                       ('Senior Shuttle', 'Door-to-door shuttle for seniors and people with disabilities.'),
+                       ('Bike Loan Program', 'Refurbished bikes and locks for commuting.')],
+    'childcare': [('Early Head Start', 'Free early learning for infants and toddlers.'),
+                  ('After-School Program', 'Homework help and activities until 6pm.'),
+                  ('Subsidized Child Care', 'Help paying for licensed child care.'),
+                  ('Parenting Classes', 'Workshops on positive discipline and child development.')],
+    'education': [('GED Preparation', 'Classes and testing vouchers for the GED.'),
+                  ('ESL Classes', 'English classes for adult learners at all levels.'),
+                  ('Tutoring Program', 'Free one-on-one tutoring for K-12 students.'),
+                  ('College Access', 'Application and financial aid coaching for first-generation students.'),
+                  ('Digital Literacy', 'Computer basics and free laptops for graduates.')],
+    'employment': [('Job Readiness Training', 'Interview practice, workplace skills and job placement.'),
+                   ('Resume Workshop', 'Weekly resume and cover letter help.'),
+                   ('Paid Internships', 'Paid work experience for young adults aged 18-24.'),
+                   ('Vocational Training', 'Certification courses in trades, healthcare and logistics.'),
+                   ('Reentry Employment', 'Job coaching for people returning from incarceration.')],
+}
+FIRST_NAMES = ['Maria', 'James', 'Ana', 'David', 'Keisha', 'Jose', 'Linh', 'Michael', 'Fatima', 'Carlos', 'Aaliyah',
+               'Daniel', 'Sofia', 'Andre', 'Mei', 'Luis', 'Grace', 'Tyrone', 'Elena', 'Omar']
+LAST_NAMES = ['Garcia', 'Johnson', 'Nguyen', 'Smith', 'Hernandez', 'Williams', 'Lopez', 'Brown', 'Kim', 'Martinez',
+              'Davis', 'Rodriguez', 'Jackson', 'Tran', 'Perez', 'Washington', 'Chen', 'Flores', 'Lee', 'Ramirez']
+
+class CatalogGenerator:
+    """
+    Usage:
+        gen = CatalogGenerator(seed=42)
+        for row in gen.resources(50000): ...
+        for row in gen.users(100000): ...
+        for row in gen.leads(1000000): ...      # needs resources() and users() to have run first
+    """
+
+    def __init__(self, seed=42):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.resource_ids = []
+        self.user_ids = []
+        self._categories = list(CATEGORY_WEIGHTS)
+        self._category_cw = list(accumulate(CATEGORY_WEIGHTS.values()))
+        self._city_cw = list(accumulate(c[3] for c in CITIES))
+
+    def _uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def _timestamp(self, earliest_days=HISTORY_DAYS):
+        return (EPOCH - timedelta(seconds=self.rng.randrange(earliest_days * 86400))).isoformat()
+
+    def _pick(self, items, cum_weights):
+        return items[bisect(cum_weights, self.rng.random() * cum_weights[-1])]
+
+    def resources(self, count):
+        rng = self.rng
+        slugs = {}
+        for _ in range(count):
+            category = self._pick(self._categories, self._category_cw)
+            city, lat, lng, _w = self._pick(CITIES, self._city_cw)
+            name = f"{rng.choice(PREFIXES)} {rng.choice(STEMS[category])}"
+            if rng.random() < 0.4:
+                name = f"{name} of {city}"
+            slug = re.sub(r"[^a-z0-9]+", "", name.lower())
+            slugs[slug] = slugs.get(slug, 0) + 1
+            website = f"https://www.{slug}{slugs[slug] if slugs[slug] > 1 else ''}.org"
+
+            secondary = rng.sample([c for c in self._categories if c != category] + AUDIENCES, rng.randint(0, 3))
+            programs = [{'name': n, 'description': d} for n, d in rng.sample(PROGRAMS[category], rng.randint(1, min(4, len(PROGRAMS[category]))))]
+            for extra in secondary[:1]:
+                if extra in PROGRAMS and rng.random() < 0.5:
+                    n, d = rng.choice(PROGRAMS[extra])
+                    programs.append({'name': n, 'description': d})
+            areas = [city] + ([self._pick(CITIES, self._city_cw)[0]] if rng.random() < 0.3 else [])
+            service_area = ", ".join(dict.fromkeys(areas)) if rng.random() > 0.1 else "Los Angeles County"
+            program_list = ", ".join(p['name'].lower() for p in programs)
+
+            resource_id = self._uuid()
+            self.resource_ids.append(resource_id)
+            yield {
+                'id': resource_id,
+                'name': name,
+                'category': category,
+                'secondary_categories': secondary,
+                'description': f"{name} serves residents of {service_area} with {program_list}. "
+                               f"Services are free or low-cost and available in English and Spanish.",
+                'programs': programs,
+                'contact_info': {'website': website, 'service_area': service_area,
+                                 'phone': f"{rng.choice(['213', '310', '323', '562', '626', '714', '818'])}-{rng.randint(200, 999)}-{rng.randint(0, 9999):04d}"},
+                'location': {'address': f"{rng.randint(100, 19999)} {rng.choice(STREETS)}, {city}, CA",
+                             'lat': round(lat + rng.uniform(-0.06, 0.06), 5), 'long': round(lng + rng.uniform(-0.06, 0.06), 5)},
+                'suitability_tags': ['General'] + [a for a in secondary if a in AUDIENCES],
+                'scrape_url': website,
+                'website': website,
+                'application_process': rng.choice([
+                    'Walk in during business hours with a photo ID and proof of address.',
+                    'Call the intake line to schedule an eligibility appointment.',
+                    'Apply online; a case manager will follow up within 3 business days.',
+                    'Referral required from a caseworker or 211.',
+                ]),
+                'created_at': self._timestamp(),
+            }
+
+    def users(self, count):
+        rng = self.rng
+        for n in range(count):
+            user_id = self._uuid()
+            self.user_ids.append(user_id)
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            yield {'id': user_id, 'email': f"{first.lower()}.{last.lower()}.{n}@example.com",
+                   'full_name': f"{first} {last}", 'created_at': self._timestamp()}
+
+    def leads(self, count):
+        """Zipf-like org popularity; at most one lead per (user, org) to match the leads natural key."""
+        if not self.resource_ids or not self.user_ids:
+            raise RuntimeError("Generate resources and users before leads")
+        rng = self.rng
+        popularity = list(accumulate(1.0 / (rank + 1) ** 0.8 for rank in range(len(self.resource_ids))))
+        order = self.resource_ids[:]
+        rng.shuffle(order)  # Popularity rank independent of generation order
+        max_per_user = len(self.resource_ids)
+        remaining = min(count, len(self.user_ids) * max_per_user)
+        users_left = len(self.user_ids)
+        for user_id in self.user_ids:
+            if remaining <= 0:
+                break
+            # Spread the remaining leads over the remaining users (varied per user)
+            share = remaining / users_left
+            wanted = min(max_per_user, remaining, max(0, int(rng.expovariate(1 / share)) if share >= 1 else int(rng.random() < share)))
+            if users_left == 1:
+                wanted = min(max_per_user, remaining)
+            users_left -= 1
+            picked = {}  # Insertion-ordered (a set's order would vary with PYTHONHASHSEED)
+            while len(picked) < wanted:
+                picked[order[bisect(popularity, rng.random() * popularity[-1])]] = None
+            for resource_id in picked:
+                remaining -= 1
+                status = rng.choice(LEAD_STATUSES)
+                yield {'user_id': user_id, 'resource_id': resource_id, 'status': status,
+                       'notes': f"Synthetic application ({status})", 'created_at': self._timestamp(365)}
+
+# --- Sinks ---
+
+def write_jsonl(path, rows):
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+def copy_rows(conn, table, columns, rows, jsonb=()):
+    from psycopg.types.json import Jsonb
+    count = 0
+    with conn.cursor() as cur:
+        with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row([Jsonb(row.get(c)) if c in jsonb else row.get(c) for c in columns])
+                count += 1
+    return count
+
+RESOURCE_COLUMNS = ['id', 'name', 'category', 'secondary_categories', 'description', 'programs', 'contact_info',
+                    'location', 'suitability_tags', 'scrape_url', 'website', 'application_process', 'created_at']
+RESOURCE_JSONB = ('programs', 'contact_info', 'location')
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic catalog for scale tests")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--resources', type=int, default=50000)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--leads', type=int, default=1000000)
+    parser.add_argument('--out', default=None, help="Directory for resources.jsonl / users.jsonl / leads.jsonl")
+    parser.add_argument('--postgres', action='store_true', help="COPY into DATABASE_URL (schema + migrations applied first)")
+    parser.add_argument('--reset', action='store_true', help="With --postgres: drop and recreate the public schema first")
+    args = parser.parse_args()
+
+    if not args.out and not args.postgres:
+        parser.error("pass --out DIR and/or --postgres")
+    gen = CatalogGenerator(args.seed)
+    start = time.time()
+
+    if args.postgres:
+        import psycopg
+        from local_db import bootstrap
+        database_url = os.getenv("DATABASE_URL")
+        if not database_url:
+            print("❌ Set DATABASE_URL to a scratch Postgres database")
+            sys.exit(1)
+        bootstrap(database_url, reset=args.reset)
+        # JSONL copies are written alongside when --out is also given
+        tee = (lambda name, rows: _tee(Path(args.out) / name, rows)) if args.out else (lambda name, rows: rows)
+        if args.out:
+            Path(args.out).mkdir(parents=True, exist_ok=True)
+        with psycopg.connect(database_url) as conn:
+            n_res = copy_rows(conn, 'public.resources', RESOURCE_COLUMNS, tee('resources.jsonl', gen.resources(args.resources)), RESOURCE_JSONB)
+            n_users = copy_rows(conn, 'auth.users', ['id', 'email', 'raw_user_meta_data', 'created_at'],
+                                ({**u, 'raw_user_meta_data': {'full_name': u['full_name']}} for u in tee('users.jsonl', gen.users(args.users))),
+                                ('raw_user_meta_data',))
+            n_leads = copy_rows(conn, 'public.leads', ['user_id', 'resource_id', 'status', 'notes', 'created_at'],
+                                tee('leads.jsonl', gen.leads(args.leads)))
+            conn.execute("ANALYZE public.resources")
+            conn.execute("ANALYZE public.leads")
+    else:
+        out = Path(args.out)
+        out.mkdir(parents=True, exist_ok=True)
+        n_res = write_jsonl(out / 'resources.jsonl', gen.resources(args.resources))
+        n_users = write_jsonl(out / 'users.jsonl', gen.users(args.users))
+        n_leads = write_jsonl(out / 'leads.jsonl', gen.leads(args.leads))
+
+    elapsed = time.time() - start
+    total = n_res + n_users + n_leads
+    print(f"✅ seed {args.seed}: {n_res} resources, {n_users} users, {n_leads} leads in {elapsed:.1f}s ({total / elapsed:.0f} rows/s)")
+
+def _tee(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            yield row
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from pathlib import Path
+
+# Incremental resource ingest: hash the normalized scraped text, compare it with the
+# content_hash stored for the same scrape_url, and only re-embed + upsert what changed.
+# Rows with an owner_id are curated by their org in the portal and are never overwritten.
+# Placeholder fields a record carries in '_defaults' (category, description, ...) are only written
+# when the row is new, so a re-scrape never replaces curated values with scraper fallbacks.
+# Progress is checkpointed after every batch so an interrupted run can resume.
+
+DEFAULT_CHECKPOINT = Path(__file__).parent / '.ingest_checkpoint.json'
+LOOKUP_CHUNK = 100  # scrape_urls per in.() lookup
+# Change detection + ownership, and the stored fields a changed row is embedded with when the record leaves them out
+STORED_COLUMNS = 'scrape_url, content_hash, owner_id, name, category, secondary_categories, description, programs'
+
+def normalize_text(text: str) -> str:
+    """Canonical form for hashing: NFKC, collapsed whitespace, no leading/trailing space."""
+    if not text: return ""
+    return re.sub(r"\s+", " ", unicodedata.normalize('NFKC', text)).strip()
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+def placeholder_embeddings(records):
+    """Zero vectors for dry runs; real ingests pass embed_fn=EmbeddingPipeline(...).embed_records (embeddings.py)."""
+    return [[0.0] * 768 for _ in records]
+
+class Checkpoint:
+    """JSON file holding the scrape_urls already written by the current run and the running counts."""
+
+    def __init__(self, path=DEFAULT_CHECKPOINT):
+        self.path = Path(path)
+        self.done = set()
+        self.counts = {'added': 0, 'changed': 0, 'unchanged': 0, 'owned': 0}
+
+    def load(self):
+        if self.path.exists():
+            data = json.loads(self.path.read_text())
+            self.done = set(data.get('done', []))
+            self.counts.update(data.get('counts', {}))
+            print(f"↩️ Resuming from checkpoint: {len(self.done)} already ingested")
+        return self
+
+    def save(self):
+        self.path.write_text(json.dumps({'done': sorted(self.done), 'counts': self.counts, 'saved_at': time.time()}))
+
+    def clear(self):
+        if self.path.exists():
+            self.path.unlink()
+
+class IncrementalIngest:
+    """
+    Usage:
+        ingest = IncrementalIngest(supabase, batch_size=50)
+        report = ingest.run(records)   # each record: a resources row incl. scrape_url, plus 'text'
+    """
+
+    def __init__(self, client, batch_size=50, embed_fn=placeholder_embeddings, checkpoint=None):
+        self.client = client
+        self.batch_size = batch_size
+        self.embed_fn = embed_fn
+        self.checkpoint = checkpoint or Checkpoint()
+
+    def existing_rows(self, urls):
+        """{scrape_url: row} for rows already in the catalog (one query per LOOKUP_CHUNK urls)."""
+        rows = {}
+        for start in range(0, len(urls), LOOKUP_CHUNK):
+            chunk = urls[start:start + LOOKUP_CHUNK]
+            res = self.client.table('resources').select(STORED_COLUMNS).in_('scrape_url', chunk).execute()
+            for row in res.data or []:
+                rows[row['scrape_url']] = row
+        return rows
+
+    def plan(self, records):
+        """
+        Splits records into (to_write, unchanged, owned). Each record to write gets content_hash
+        and '_change' (new rows also take their '_defaults', changed rows keep the stored values
+        in '_stored' for embedding); owned rows are left to their org.
+        """
+        pending = [r for r in records if r['scrape_url'] not in self.checkpoint.done]
+        existing = self.existing_rows([r['scrape_url'] for r in pending])
+        to_write, unchanged, owned = [], [], []
+        for record in pending:
+            text = record.pop('text', '') or ''
+            digest = content_hash(text)
+            stored = existing.get(record['scrape_url'])
+            defaults = record.pop('_defaults', None) or {}
+            if stored and stored.get('owner_id'):
+                owned.append(record)
+                continue
+            if stored and stored.get('content_hash') == digest:
+                unchanged.append(record)
+                continue
+            record['content_hash'] = digest
+            if stored:
+                record['_change'], record['_stored'] = 'changed', stored
+            else:
+                record['_change'] = 'added'
+                for key, value in defaults.items():
+                    record.setdefault(key, value)
+            to_write.append(record)
+        return to_write, unchanged, owned
+
+    def write_batch(self, batch):
+        # A changed row is embedded as it will read after the write (stored values + what this record sets)
+        vectors = self.embed_fn([dict(r.get('_stored') or {}, **r) for r in batch])
+        groups = {}
+        for record, vector in zip(batch, vectors):
+            row = {k: v for k, v in record.items() if not k.startswith('_')}
+            row['embedding'] = vector
+            groups.setdefault(frozenset(row), []).append(row)
+        # One upsert per column set: a bulk upsert sends keys missing from some rows as NULL
+        for rows in groups.values():
+            self.client.table('resources').upsert(rows, on_conflict='scrape_url').execute()
+
+    def run(self, records, resume=True):
+        start = time.time()
+        if resume:
+            self.checkpoint.load()
+        to_write, unchanged, owned = self.plan(records)
+
+        for record in unchanged + owned:
+            self.checkpoint.done.add(record['scrape_url'])
+        self.checkpoint.counts['unchanged'] += len(unchanged)
+        self.checkpoint.counts['owned'] += len(owned)
+        self.checkpoint.save()
+
+        for offset in range(0, len(to_write), self.batch_size):
+            batch = to_write[offset:offset + self.batch_size]
+            self.write_batch(batch)
+            for record in batch:
+                self.checkpoint.done.add(record['scrape_url'])
+                self.checkpoint.counts[record['_change']] += 1
+            self.checkpoint.save()
+            print(f"   💾 Upserted batch {offset // self.batch_size + 1} ({len(batch)} rows)")
+
+        report = dict(self.checkpoint.counts, seconds=round(time.time() - start, 2))
+        self.checkpoint.clear()  # Run finished; next run starts fresh
+        return report
@@ -0,0 +1,130 @@
+import argparse
+import json
+import math
+import random
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from resource_matcher import normalize_name
+from search_ranking import CATEGORY_KEYWORDS
+
+# Decides per turn whether to search the catalog, and for which categories, instead of gating
+# RAG on a keyword list ("where can I sleep tonight" has none; "thanks for the help" has one).
+# Hashed features (words, word pairs, in-word character trigrams) feed one logistic regression per
+# label ('rag' + each category), trained at startup from data/intent_examples.json.
+# Usage:
+#   classifier = IntentClassifier.from_file()
+#   classifier.predict("where can I sleep tonight")   # -> Intent(rag=True, categories=['housing'])
+#   python3 scripts/intent_classifier.py "thanks for the help"
+
+SCRIPTS_DIR = Path(__file__).parent
+EXAMPLES_PATH = SCRIPTS_DIR / 'data' / 'intent_examples.json'
+
+N_FEATURES = 2 ** 16   # Hash buckets; collisions are rare at a few thousand distinct n-grams
+LABELS = ['rag'] + CATEGORY_KEYWORDS
+RAG_THRESHOLD = 0.5
+CATEGORY_THRESHOLD = 0.4
+EPOCHS = 40
+LEARNING_RATE = 0.5
+L2 = 1e-5
+
+def features(text):
+    """Sorted, de-duplicated hash buckets for a turn's words, word pairs and character trigrams."""
+    words = normalize_name(text).split()
+    grams = [f"n:{min(len(words), 6)}"]
+    grams += [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(["^"] + words, words + ["$"])]
+    for w in words:
+        padded = f"#{w}#"
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return np.array(sorted({zlib.crc32(g.encode()) % N_FEATURES for g in grams}), dtype=np.int64)
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+class Intent:
+    __slots__ = ('rag', 'categories', 'confidence')
+
+    def __init__(self, rag, categories, confidence):
+        self.rag = rag
+        self.categories = categories
+        self.confidence = confidence  # P(rag)
+
+    def __repr__(self):
+        return f"Intent(rag={self.rag}, categories={self.categories}, confidence={self.confidence:.2f})"
+
+class IntentClassifier:
+    """
+    Usage:
+        classifier = IntentClassifier.from_file()          # ~0.1s to train on the bundled examples
+        intent = classifier.predict(user_text)              # tens of µs
+        if intent.rag: search(user_text, intent.categories)
+    """
+
+    def __init__(self, weights, bias):
+        self.weights = weights  # (N_FEATURES, len(LABELS))
+        self.bias = bias
+
+    @classmethod
+    def from_file(cls, path=EXAMPLES_PATH, **kwargs):
+        return cls.train(json.loads(Path(path).read_text()), **kwargs)
+
+    @classmethod
+    def train(cls, examples, epochs=EPOCHS, learning_rate=LEARNING_RATE, seed=0):
+        """SGD on the logistic loss; examples are {"text", "rag", "categories"} dicts."""
+        rows = []
+        for ex in examples:
+            target = np.zeros(len(LABELS))
+            target[0] = bool(ex['rag'])
+            for cat in ex.get('categories') or []:
+                target[LABELS.index(cat)] = 1.0
+            # Category heads only learn from real needs; chit-chat says nothing about categories
+            mask = np.ones(len(LABELS)) if ex['rag'] else np.eye(len(LABELS))[0]
+            idx = features(ex['text'])
+            rows.append((idx, 1.0 / math.sqrt(len(idx)), target, mask))
+
+        weights = np.zeros((N_FEATURES, len(LABELS)))
+        bias = np.zeros(len(LABELS))
+        order = list(range(len(rows)))
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            rate = learning_rate / (1 + epoch * 0.1)
+            for i in order:
+                idx, value, target, mask = rows[i]
+                grad = (_sigmoid(weights[idx].sum(axis=0) * value + bias) - target) * mask
+                weights[idx] -= rate * (grad * value + L2 * weights[idx])
+                bias -= rate * grad * 0.1
+        return cls(weights, bias)
+
+    def probabilities(self, text):
+        idx = features(text)
+        if not len(idx):
+            return np.zeros(len(LABELS))
+        return _sigmoid(self.weights[idx].sum(axis=0) / math.sqrt(len(idx)) + self.bias)
+
+    def predict(self, text):
+        probs = self.probabilities(text)
+        rag = bool(probs[0] >= RAG_THRESHOLD)
+        categories = []
+        if rag:
+            ranked = sorted(range(1, len(LABELS)), key=lambda j: -probs[j])
+            categories = [LABELS[j] for j in ranked if probs[j] >= CATEGORY_THRESHOLD]
+        return Intent(rag, categories, float(probs[0]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify turns as catalog searches or chit-chat")
+    parser.add_argument('text', nargs='+')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    classifier = IntentClassifier.from_file()
+    print(f"📚 Trained on {EXAMPLES_PATH.name} in {(time.perf_counter() - start) * 1000:.0f} ms")
+    for text in args.text:
+        print(f"{text!r}: {classifier.predict(text)}")
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import asyncio
 import os
 import json
 import re
+import time
 from pathlib import Path  # Added for robust path handling
 from livekit import rtc, api, agents
 from livekit.agents import JobContext, WorkerOptions, cli, JobRequest, JobExecutorType
@@ -10,6 +11,18 @@ from dotenv import load_dotenv
 from supabase import create_client, Client
 from openai import AsyncOpenAI
 from aiohttp import web
+from resource_matcher import CatalogIndex, resolve_program, match_program, normalize_name, CATALOG_THRESHOLD, CATALOG_MARGIN
+from task_queue import TaskRunner, finish_task
+from catalog_stats import CatalogStats
+from resource_record import Resource, SEARCH_COLUMNS, VERIFY_COLUMNS
+from search_ranking import rank_resources, search_params
+from recommendations import RecommendationCache, recommendation_key
+from query_normalizer import QueryNormalizer
+from intent_classifier import IntentClassifier
+from model_router import ModelRouter
+from response_cache import ResponseCache
+from tool_calls import TurnLookups, run_tool_calls
+from prefetch import Prefetch, find_email
 
 # Robust Environment Loading
 env_path = Path('.env.local')
@@ -45,6 +58,27 @@ openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
 
 AGENT_IDENTITY = 'KEITH-AI-PY'
 
+# Process-wide name index used to resolve create_account programs without a query
+catalog_index = CatalogIndex(snapshot_path=os.getenv("KEITH_CATALOG_SNAPSHOT"),
+                             snapshot_max_age=int(os.getenv("KEITH_CATALOG_SNAPSHOT_MAX_AGE", 86400)))
+# Precomputed "<category> near <area>" answers; the short TTL lets trigger refreshes reach callers quickly
+recommendations = RecommendationCache(ttl_seconds=int(os.getenv("KEITH_RECOMMENDATIONS_TTL_SECONDS", 30)))
+# Spell correction for speech-to-text; its dictionary follows the catalog index
+query_normalizer = QueryNormalizer()
+# Decides which turns search the catalog (trained from data/intent_examples.json at startup)
+intent_classifier = IntentClassifier.from_file()
+# Fast vs capable model per turn (KEITH_FAST_MODEL / KEITH_CAPABLE_MODEL / KEITH_MODEL_ROUTING)
+model_router = ModelRouter.from_env()
+# Replies to repeated small talk ("who are you?"), shared across sessions
+response_cache = ResponseCache(ttl_seconds=int(os.getenv("KEITH_RESPONSE_CACHE_TTL_SECONDS", 3600)),
+                               max_entries=int(os.getenv("KEITH_RESPONSE_CACHE_SIZE", 512)))
+
+def refresh_catalog():
+    """Blocking: reloads the catalog index and rebuilds the spelling dictionary from it. False if the reload failed."""
+    loaded = catalog_index.refresh(supabase)
+    query_normalizer.rebuild(catalog_index.vocabulary)
+    return loaded
+
 # State (Per-Session Class)
 class ConversationState:
     def __init__(self):
@@ -81,6 +115,15 @@ class ConversationState:
                 )
             }
         ]
+        # Resources surfaced to the model via SYSTEM_RAG_RESULT (id -> row)
+        self.seen_resources = {}
+        # create_account reads started before the tool call (user by email, duplicate lead)
+        self.prefetch = Prefetch()
+
+    def remember_resources(self, resources):
+        for res in resources:
+            if res.get('id'):
+                self.seen_resources[res['id']] = res
 
 # Tool Definitions
 TOOLS = [
@@ -159,7 +202,7 @@ async def create_magic_user(name, email, phone, program):
             temp_password = str(int(os.urandom(3).hex(), 16))[:6]
             attr["password"] = temp_password
             
-            response = admin_supabase.auth.admin.create_user(attr)
+            response = await asyncio.to_thread(admin_supabase.auth.admin.create_user, attr)
             user_id = response.user.id
             print(f"✅ Created New User: {user_id} with pass: {temp_password}")
             return user_id, temp_password
@@ -182,7 +225,7 @@ async def get_user_id_by_email(email):
     if not SUPABASE_SERVICE_ROLE_KEY: return None
     try:
         admin = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
-        users = admin.auth.admin.list_users() 
+        users = await asyncio.to_thread(admin.auth.admin.list_users)
         user_list = users.users if hasattr(users, 'users') else users
         for u in user_list:
              if u.email == email: return u.id
@@ -191,21 +234,51 @@ async def get_user_id_by_email(email):
         print(f"⚠️ User Lookup Error: {e}")
         return None
 
-async def perform_rag_search(query):
+async def perform_rag_search(query, categories=None):
     if not supabase: return []
+    normalized = query_normalizer.normalize(query)
+    if normalized.changed and normalized.text:
+        if normalized.corrections:
+            print(f"   -> Corrected {normalized.corrections}")
+        query = normalized.text
     print(f"🔍 RAG Search for: {query}")
+
+    # "food in Compton": a key lookup (usually cached in-process) instead of a ranked search
+    key = recommendation_key(query)
+    if key:
+        try:
+            results = await asyncio.to_thread(recommendations.get, supabase, *key)
+            if results:
+                print(f"✅ RAG Recommendations for {key}: {[r.name for r in results[:3]]}")
+                return results
+        except Exception as e:
+            print(f"⚠️ Recommendation lookup failed, searching instead: {e}")
+
+    params = search_params(query, categories=categories)
+
+    # One round trip: candidates, ranking and limit all happen in search_resources
+    try:
+        response = await asyncio.to_thread(lambda: supabase.rpc('search_resources', params).execute())
+        results = [Resource.from_row(r) for r in response.data or []]
+        print(f"✅ RAG Found {len(results)} results. Top: {[r.name for r in results[:3]]}")
+        return results
+    except Exception as e:
+        print(f"⚠️ search_resources RPC failed, using REST fallback: {e}")
+        return await asyncio.to_thread(rag_search_fallback, query, params)
+
+def rag_search_fallback(query, params):
+    """Pre-migration path: several REST queries, ranked in Python with the same scoring as the RPC."""
     final_data = []
     
     try:
-        # Use wfts (Web Full Text Search) for natural language handling
-        response = supabase.table('resources').select('*').filter('description', 'wfts', query).execute()
+        # Use wfts (Web Full Text Search) on the weighted, GIN-indexed search document (name, categories, programs, description)
+        response = supabase.table('resources').select(SEARCH_COLUMNS).filter('search_doc', 'wfts', query).limit(20).execute()
         if response.data:
-            # Manual slice since limit() might fail on builder
-            final_data.extend(response.data[:5])
+            final_data.extend(response.data)
     except Exception as e:
         print(f"⚠️ Primary Text Search Error (Falling back): {e}")
         try:
-             response = supabase.table('resources').select('*').ilike('description', f"%{query}%").limit(5).execute()
+             response = supabase.table('resources').select(SEARCH_COLUMNS).ilike('description', f"%{query}%").limit(5).execute()
              if response.data:
                  final_data.extend(response.data)
         except Exception as e2:
@@ -213,80 +286,181 @@ async def perform_rag_search(query):
 
     try:
         if len(final_data) < 2:
-             response = supabase.table('resources').select('*').ilike('name', f"%{query}%").limit(3).execute()
+             response = supabase.table('resources').select(SEARCH_COLUMNS).ilike('name', f"%{query}%").limit(3).execute()
              if response.data:
                  final_data.extend(response.data)
                  
-        keywords = ['food', 'housing', 'legal', 'health', 'mental health', 'transportation', 'childcare', 'education', 'employment']
-        query_lower = query.lower()
-        matched_cat = next((cat for cat in keywords if cat in query_lower), None)
-        
-        if matched_cat:
-            or_filter = f"category.ilike.{matched_cat},secondary_categories.cs.{{{{'{matched_cat}'}}}}"
-            cat_res = supabase.table('resources').select('*').or_(or_filter).limit(10).execute()
+        categories = params['p_categories'] or []
+        for cat in categories:
+            or_filter = f"category.ilike.{cat},secondary_categories.cs.{{{{'{cat}'}}}}"
+            cat_res = supabase.table('resources').select(SEARCH_COLUMNS).or_(or_filter).limit(10).execute()
             if cat_res.data:
                 final_data.extend(cat_res.data)
 
-        tech_keywords = ['computer', 'tech', 'it', 'coding', 'digital', 'class', 'learn']
-        if any(k in query.lower() for k in tech_keywords):
-             print("   -> Expanding search for Tech/Education...")
-             extra_cats = supabase.table('resources').select('*').in_('category', ['education', 'employment', 'other']).limit(15).execute()
-             final_data.extend(extra_cats.data or [])
-
         unique_map = {r['id']: r for r in final_data}
-        unique_results = list(unique_map.values())
-        
-        query_terms = query.lower().split()
-        scored_results = []
-        for res in unique_results:
-            score = 0
-            full_text = (res.get('description', '') + ' ' + json.dumps(res.get('programs', []))).lower()
-            for term in query_terms:
-                if term in full_text:
-                    score += 1
-            contact_str = str(res.get('contact_info', '')).lower()
-            if 'compton' in query_lower and 'compton' in contact_str:
-                score += 5
-            elif 'los angeles' in query_lower and 'los angeles' in contact_str:
-                 score += 2
-            scored_results.append({'doc': res, 'score': score})
-            
-        scored_results.sort(key=lambda x: x['score'], reverse=True)
-        print(f"✅ RAG Found {len(scored_results)} candidates. Top: {[r['doc']['name'] for r in scored_results[:3]]}")
-        return [item['doc'] for item in scored_results[:5]]
+        candidates = [Resource.from_row(r) for r in unique_map.values()]
+        ranked = rank_resources(candidates, query, params['p_lat'], params['p_lon'], categories,
+                                k=params['p_k'], place=params['p_place'])
+        for res, score, km in ranked:
+            res.score, res.distance_km = score, km
+        print(f"✅ RAG Found {len(candidates)} candidates. Top: {[r.name for r, _, _ in ranked[:3]]}")
+        return [res for res, _, _ in ranked]
 
     except Exception as e:
         print(f"⚠️ RAG Processing Error: {e}")
         return []
 
+async def resolve_resource(state: ConversationState, program):
+    """
+    Resolves a spoken program name to (resource_id, name, choices), scoring this session's
+    resources and the catalog together. choices lists the near-tied orgs when the name is ambiguous.
+    """
+    # One indexed ranking, off the event loop so live sessions keep streaming audio
+    hit, choices = await asyncio.to_thread(match_program, program, dict(state.seen_resources), catalog_index)
+    if hit:
+        rid, rname, source = hit
+        print(f"🎯 Resolved '{program}' -> {rname} (via {source})")
+        return rid, rname, []
+    if choices:
+        print(f"❓ '{program}' is ambiguous: {choices}")
+        return None, program, choices
+
+    # Last resort: text search (the model named something we never surfaced)
+    print(f"   -> No in-memory match for '{program}', falling back to text search")
+    # Note: .limit() chaining might fail after text_search in some versions, using range(0,1) or just executing.
+    res_query = await asyncio.to_thread(lambda: supabase.table('resources').select('id, name').filter('search_doc', 'wfts', program).execute())
+    if not res_query.data:
+         res_query = await asyncio.to_thread(lambda: supabase.table('resources').select('id, name').ilike('description', f"%{program}%").limit(1).execute())
+    if res_query.data:
+        return res_query.data[0]['id'], res_query.data[0]['name'], []
+    return None, program, []
+
+# Leads that still count as an application (supabase/migrations/20260206_leads_natural_key.sql);
+# closed/cancelled ones don't block re-applying
+ACTIVE_LEAD_STATUSES = ['new', 'submitted', 'acknowledged', 'contacted', 'accepted', 'enrolled', 'on_hold']
+
+def submit_lead(user_id, resource_id, summary, exists=None):
+    """Blocking: inserts the lead unless this user has an active application to the resource. True if inserted.
+    exists is the prefetched duplicate check (None: check now)."""
+    lead = {
+        "user_id": user_id,
+        "resource_id": resource_id,
+        "status": "submitted",
+        "notes": f"{summary}\n(Source: Keith Voice Tool)"
+    }
+    if exists is None:
+        existing = supabase.table('leads').select('id').eq('user_id', user_id).eq('resource_id', resource_id) \
+            .in_('status', ACTIVE_LEAD_STATUSES).execute()
+        exists = bool(existing.data)
+    if exists:
+        return False
+    try:
+        supabase.table('leads').insert(lead).execute()
+        return True
+    except Exception as e:
+        # A check (prefetched or not) can be stale; the partial unique index turns a late duplicate into 23505
+        if '23505' in str(getattr(e, 'code', '') or e):
+            return False
+        raise
+
+async def lead_exists(state: ConversationState, email, resource_id):
+    """Speculative duplicate check for create_account (no user yet -> no lead)."""
+    user_id = await state.prefetch.start(('user_id', email), lambda: get_user_id_by_email(email))
+    if not user_id:
+        return False
+    existing = await asyncio.to_thread(
+        lambda: supabase.table('leads').select('id').eq('user_id', user_id).eq('resource_id', resource_id)
+            .in_('status', ACTIVE_LEAD_STATUSES).execute())
+    return bool(existing.data)
+
+def prefetch_account_lookups(state: ConversationState, user_text=None, picked=None):
+    """
+    Starts create_account's reads as soon as the caller says an email or an org is picked
+    (named in user_text, or picked = the top RAG match), so the tool call finds them warm.
+    """
+    if not supabase or not SUPABASE_SERVICE_ROLE_KEY:
+        return
+    prefetch = state.prefetch
+    email = find_email(user_text)
+    if prefetch.note_email(email):
+        print(f"🔮 Prefetching user for {email}")
+        prefetch.start(('user_id', email), lambda: get_user_id_by_email(email))
+    if user_text and state.seen_resources:
+        hit = resolve_program(user_text, state.seen_resources)
+        if hit:
+            picked = hit[0]
+    if picked:
+        prefetch.note_org(picked)
+    if prefetch.email:
+        email = prefetch.email
+        for rid in prefetch.orgs:
+            prefetch.start(('lead_exists', email, rid), lambda rid=rid: lead_exists(state, email, rid))
+
+async def execute_create_account(state: ConversationState, args, lookups):
+    """create_account tool: user, resource and lead. Lookups shared with the turn's other calls go through `lookups`."""
+    name = args.get('name', 'Guest')
+    phone = args.get('phone', 'N/A')
+    program = args.get('program_name', 'General Inquiry')
+    summary = args.get('summary', 'System Generated')
+    email = normalize_email_input(args.get('email', ''))
+    print(f"   -> Processing Lead for: {name}, Program: {program}")
+
+    if not validate_email_format(email):
+        return json.dumps({"error": f"Invalid email format ({email}). Please ask user to clarify."})
+
+    # Resource first: an ambiguous name goes back to the caller before any account is created
+    rid, rname, choices = await lookups.once(('resource', normalize_name(program)), lambda: resolve_resource(state, program))
+    if choices:
+        return json.dumps({"status": "error", "message": f"'{program}' could be {' or '.join(choices)}. Ask the caller which one they mean."})
+    if not rid:
+        return json.dumps({"status": "error", "message": f"Could not find resource '{program}'."})
+
+    # Authenticated check
+    is_authenticated = any("CONTEXT UPDATE: The user is authenticated" in h.get('content', '') for h in state.history if isinstance(h, dict))
+    if not is_authenticated:
+        # A prefetched existing account skips the create attempt that would fail anyway
+        existing = await lookups.prefetched(('user_id', email))
+        if existing:
+            user_id, temp_pass = existing, "Use Existing Password"
+        else:
+            user_id, temp_pass = await lookups.once(('user', email), lambda: create_magic_user(name, email, phone, program))
+    else:
+        # Assume current user (in real app we'd get ID from context/session)
+        # For MVP voice, we rely on email lookup
+        user_id, temp_pass = await lookups.once(('user_id', email), lambda: get_user_id_by_email(email)), None
+    if not user_id:
+        return json.dumps({"status": "error", "message": "Could not create/find user account."})
+
+    exists = await lookups.prefetched(('lead_exists', email, rid))
+    inserted = await lookups.once(('lead', user_id, rid), lambda: asyncio.to_thread(submit_lead, user_id, rid, summary, exists))
+    if not inserted:
+        return json.dumps({"status": "exists", "message": f"An active application for {rname} already exists."})
+    auth_info = ""
+    if temp_pass:
+        base_url = os.getenv("NEXT_PUBLIC_APP_URL", "https://callkeith.vercel.app")
+        magic_link = f"{base_url}/magic/{user_id}"
+        auth_info = f" Magic Link: {magic_link} | Temp Password: {temp_pass}"
+    return json.dumps({"status": "success", "message": f"Application submitted for {rname}.{auth_info}"})
+
 async def get_ai_response(state: ConversationState, user_text):
     if not openai_client: return None
 
-    # 1. Check for RAG triggers (only if text is provided)
+    # 1. RAG only for turns the intent classifier reads as a need (only if text is provided)
+    intent, context_msg, cache_key = None, None, None
     if user_text:
-        context_msg = None
-        if any(w in user_text.lower() for w in ['need', 'find', 'looking', 'help', 'search', 'food', 'housing', 'legal']):
-            resources = await perform_rag_search(user_text)
+        intent = intent_classifier.predict(user_text)
+        # Small talk that can't lead to a tool call may be answered from the response cache
+        if not intent.rag and not model_router.tool_likely(state.history, user_text):
+            cache_key = response_cache.key(state.history, user_text)
+        if intent.rag:
+            resources = await perform_rag_search(user_text, intent.categories)
             if resources:
+                state.remember_resources(resources)
+                # The best match is the one the caller is most likely to apply to
+                prefetch_account_lookups(state, picked=resources[0].id)
                 context_msg = "SYSTEM_RAG_RESULT: Found the following resources:\n"
                 for res in resources:
-                    process = res.get('application_process', 'Contact them directly for details.')
-                    programs = json.dumps(res.get('programs', []))
-                    contact = res.get('contact_info', {})
-                    area = contact.get('service_area', 'Unspecified')
-                    cats = [res.get('category', 'Uncategorized')]
-                    sec = res.get('secondary_categories', [])
-                    if sec: cats.extend(sec)
-                    cat_str = ", ".join(cats)
-                    
-                    context_msg += (
-                        f"- Name: '{res['name']}'\n"
-                        f"  Categories: {cat_str}\n" 
-                        f"  Service Area: {area}\n"
-                        f"  Description: {res['description']}\n"
-                        f"  Application Process: {process}\n"
-                        f"  Available Programs: {programs}\n\n"
-                    )
+                    context_msg += res.context_snippet()
                 context_msg += "INSTRUCTION: Explain the best match first, prioritizing LOCATION match. Mention others if they might help."
                 print(f"💡 RAG Context: {context_msg[:200]}...") 
 
@@ -295,15 +469,21 @@ async def get_ai_response(state: ConversationState, user_text):
         if context_msg:
             state.history.append({"role": "system", "content": context_msg})
 
-    # 3. Call OpenAI with Tools
+        cached = response_cache.get(cache_key)
+        if cached:
+            print(f"⚡ Cached reply for '{cache_key[1]}'")
+            return cached
+
+    # 3. Call OpenAI on the tier this turn needs (tools only where a tool call can happen)
+    route = model_router.route(state.history, user_text, intent, rag_context=bool(context_msg))
     try:
-        completion = await openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=state.history,
-            tools=TOOLS,
-            tool_choice="auto"
-        )
-        return completion.choices[0].message
+        start = time.perf_counter()
+        completion, route = await model_router.complete(openai_client, state.history, route, TOOLS)
+        print(f"🧭 {model_router.models[route.tier]} ({route.reason})")
+        message = completion.choices[0].message
+        if not message.tool_calls:
+            response_cache.put(cache_key, message.content, time.perf_counter() - start)
+        return message
     except Exception as e:
         print(f"❌ OpenAI Error: {e}")
         return None
@@ -319,6 +499,7 @@ async def send_message(room: rtc.Room, text):
 
 async def handle_message(state: ConversationState, room: rtc.Room, message):
     try:
+        prefetch_account_lookups(state, message)
 
         ai_message = await get_ai_response(state, message)
         
@@ -333,122 +514,23 @@ async def handle_message(state: ConversationState, room: rtc.Room, message):
             # Append the assistant's tool call message to history
             state.history.append(ai_message)
 
-            for tool_call in ai_message.tool_calls:
-                if tool_call.function.name == "create_account":
-                    args = json.loads(tool_call.function.arguments)
-                    print(f"   -> Processing Lead for: {args.get('name')}, Program: {args.get('program_name')}")
-                    
-                    # Logic
-                    name = args.get('name', 'Guest')
-                    email_raw = args.get('email', '')
-                    phone = args.get('phone', 'N/A')
-                    program = args.get('program_name', 'General Inquiry')
-                    summary = args.get('summary', 'System Generated')
-                    
-                    email = normalize_email_input(email_raw)
-                    
-                    replacement_msg = ""
-                    if not validate_email_format(email):
-                         replacement_msg = f"[Error: The email you provided ({email}) looks incomplete.]"
-                         # Feedback to tool
-                         state.history.append({
-                             "tool_call_id": tool_call.id,
-                             "role": "tool",
-                             "name": "create_account",
-                             "content": json.dumps({"error": "Invalid email format. Please ask user to clarify."})
-                         })
-                         # Trigger AI again to explain error
-                         followup = await get_ai_response(state, None) # None text means just run loop
-                         if followup and followup.content:
-                             await send_message(room, followup.content)
-                         return
-
-                    # Authenticated check
-                    is_authenticated = any("CONTEXT UPDATE: The user is authenticated" in h.get('content', '') for h in state.history if isinstance(h, dict))
-
-                    result_msg = ""
-                    try:
-                        # Logic Reuse (refactor ideal, but keeping inline for minimal diff risk)
-                        # ... [Logic from previous version, adapted] ...
-                        
-                        # Simplify: We just run the creation logic
-                        user_id = None
-                        temp_pass = None
-                        
-                        if not is_authenticated:
-                            user_id, temp_pass = await create_magic_user(name, email, phone, program)
-                        else:
-                            # Assume current user (in real app we'd get ID from context/session)
-                            # For MVP voice, we rely on email lookup
-                            user_id = await get_user_id_by_email(email)
-
-                        if not user_id:
-                             result_msg = json.dumps({"status": "error", "message": "Could not create/find user account."})
-                        else:
-                             # Create Lead
-                             # (Resource Lookup Logic)
-                             # Note: .limit() chaining might fail after text_search in some versions, using range(0,1) or just executing.
-                             res_query = supabase.table('resources').select('id, name').filter('description', 'wfts', program).execute()
-                             if not res_query.data:
-                                  res_query = supabase.table('resources').select('id, name').ilike('description', f"%{program}%").limit(1).execute()
-                             
-                             rid = None
-                             rname = program
-                             if res_query.data:
-                                 rid = res_query.data[0]['id']
-                                 rname = res_query.data[0]['name']
-
-                             if rid:
-                                 existing = supabase.table('leads').select('*').eq('user_id', user_id).eq('resource_id', rid).execute()
-                                 if not existing.data:
-                                     supabase.table('leads').insert({
-                                         "user_id": user_id,
-                                         "resource_id": rid,
-                                         "status": "submitted",
-                                         "notes": f"{summary}\n(Source: Keith Voice Tool)"
-                                     }).execute()
-                                     
-                                     auth_info = ""
-                                     if temp_pass:
-                                         base_url = os.getenv("NEXT_PUBLIC_APP_URL", "https://callkeith.vercel.app")
-                                         magic_link = f"{base_url}/magic/{user_id}"
-                                         auth_info = f" Magic Link: {magic_link} | Temp Password: {temp_pass}"
-                                         
-                                     result_msg = json.dumps({"status": "success", "message": f"Application submitted for {rname}.{auth_info}"})
-                                 else:
-                                     result_msg = json.dumps({"status": "exists", "message": f"Application for {rname} already exists."})
-                             else:
-                                 result_msg = json.dumps({"status": "error", "message": f"Could not find resource '{program}'."})
-
-                    except Exception as e:
-                        print(f"❌ Tool Execution Error: {e}")
-                        result_msg = json.dumps({"status": "error", "message": str(e)})
-
-                    # Send Tool Output back to AI
-                    state.history.append({
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "name": "create_account",
-                        "content": result_msg
-                    })
+            # Independent calls run concurrently; results are appended in tool_call order
+            lookups = TurnLookups(warm=state.prefetch)
+            start = time.perf_counter()
+            results = await run_tool_calls(ai_message.tool_calls, {
+                "create_account": lambda args, lookups: execute_create_account(state, args, lookups),
+            }, lookups)
+            print(f"🛠️ Tools done in {(time.perf_counter() - start) * 1000:.0f} ms ({lookups.stats['warm']} prefetched lookups)")
+            state.history.extend(results)
 
             # Get final AI response after tool execution
             final_response = await get_ai_response(state, None)
             if final_response and final_response.content:
                  await send_message(room, final_response.content)
             
-            # Check for disconnect signals
-            should_disconnect = False
-            for tool_call in ai_message.tool_calls:
-                 if tool_call.function.name == "create_account":
-                     # Check the tool result in history to see if it was success/exists
-                     # We can just assume if we ran create_account, we're done.
-                     # But let's check the result content we appended.
-                     last_msg = state.history[-1]
-                     if last_msg.get('role') == 'tool' and last_msg.get('name') == 'create_account':
-                         res_data = json.loads(last_msg['content'])
-                         if res_data.get('status') in ['success', 'exists']:
-                             should_disconnect = True
+            # Check for disconnect signals: every application went through (or already existed)
+            accounts = [json.loads(r['content']) for r in results if r['name'] == 'create_account']
+            should_disconnect = bool(accounts) and all(r.get('status') in ['success', 'exists'] for r in accounts)
             
             if should_disconnect:
                 print("👋 Account Created/Found. Initiating Auto-Disconnect Sequence...")
@@ -478,6 +560,10 @@ async def entrypoint(ctx: JobContext):
     
     # Connect
     await ctx.connect()
+
+    # Warm the name index so create_account resolves without a round-trip
+    if catalog_index.is_stale():
+        asyncio.create_task(asyncio.to_thread(refresh_catalog))
     
     room = ctx.room
 
@@ -522,8 +608,29 @@ async def health_check_server():
     async def handle(request):
         return web.Response(text="Keith is alive and listening.")
 
+    async def handle_tasks(request):
+        if not task_runner:
+            return web.json_response({"running": False})
+        return web.json_response({
+            "running": True,
+            "busy": task_runner.busy,
+            "concurrency": task_runner.concurrency,
+            "by_type": task_runner.metrics.snapshot(),
+        })
+
     app = web.Application()
-    app.add_routes([web.get('/', handle), web.get('/health', handle)])
+    async def handle_cache(request):
+        return web.json_response(response_cache.snapshot())
+
+    async def handle_models(request):
+        return web.json_response({
+            "mode": model_router.mode,
+            "models": model_router.models,
+            "by_tier": model_router.metrics.snapshot(),
+        })
+
+    app.add_routes([web.get('/', handle), web.get('/health', handle), web.get('/tasks', handle_tasks),
+                    web.get('/models', handle_models), web.get('/cache', handle_cache)])
     
     runner = web.AppRunner(app)
     await runner.setup()
@@ -534,530 +641,121 @@ async def health_check_server():
     print(f"🌍 HTTP Health Check running on port {port}")
     return site
 
-if __name__ == "__main__":
-    # Start Health Check in Background
-    # Since cli.run_app controls the loop, we need to schedule the health check 
-    # slightly differently or just run it before.
-    # However, cli.run_app starts its own loop.
-    # We can inject it by creating a task *inside* the loop possibly?
-    # Or just run it as a separate thread? No, aiohttp is async.
-    
-    # Correct Pattern: Use a custom worker or start it in a pre-hook. 
-    # But cli.run_app works on the main thread.
-    
-    # Alternative: Start the loop manually.
-    # But cli.run_app is robust.
-    
-    # Let's try to just schedule it on the loop created by cli.run_app?
-    # Actually, we can just run the health check *before* passing control to cli.
-    # Wait, cli.run_app blocks.
-    
-    # We can define a simplified worker.
-    
-    async def worker_wrapper():
-        # Start health check
-        _server = await health_check_server()
-        
-        # Start Agent
-        # Use new WorkerOptions
-        opts = WorkerOptions(entrypoint_fnc=entrypoint)
-        # Note: In newer livekit-agents 0.8+, we use cli.run_app(opts)
-        # But we need to ensure we don't block health check.
-        # cli.run_app manages the loop.
-        
-        # We can pass the loop?
-        # Let's rely on standard cli usage but customize via 'run_app' internal args if needed?
-        # Actually, let's just use the CLI but we need the health check.
-        pass
-
-    # Better approach:
-    # Just run the health check *inside* the first job? No, because it needs to be up immediately for Render.
-    
-    # Best MVP:
-    # Create the loop, start health check task, then run app.
-    # But run_app creates loop.
-    
-    # Let's inspect livekit.agents.
-    # We'll stick to the recommended pattern but use a background task hook if available.
-    
-    # Actually, we can use `asyncio.new_event_loop` logic manually if we want full control,
-    # but `cli.run_app` is safer.
-    
-    # Let's try to cheat:
-    # Define a minimal shim that starts the server then calls run_app?
-    # No, run_app expects to own the entrypoint.
-    
-    # For now, let's just add the health check server startup to the TOP of `entrypoint`?
-    # No, entrypoint is per job.
-    
-    # Let's use the `pre_shutdown` hook or similar? No.
-    
-    # Let's just run the health check on a separate thread/loop? 
-    # Or just spawn it in the global event loop?
-    
-    # Actually, standard python generic:
-    # loop = asyncio.get_event_loop() ...
-    
-    # Let's assume cli.run_app uses the current loop if running?
-    # Docs say: "It will create a new event loop if one is not running."
-    
-    pass
-
-    # Final Decision:
-    # We will start the health check inside a standard asyncio run manually, 
-    # and use `Worker` class directly instead of `cli`.
-    # This gives us control over the loop.
-    
-async def main_worker():
-    # 1. Start Health Check Server (Background Task)
-    # We use a separate thread for the health check so it doesn't block the agent worker
-    import threading
-
-    def run_health_check_thread():
-         loop = asyncio.new_event_loop()
-         asyncio.set_event_loop(loop)
-         loop.run_until_complete(health_check_server())
-         loop.run_forever()
-         
-    t = threading.Thread(target=run_health_check_thread, daemon=True)
-    t.start()
-    print("✅ Health Check Thread Started")
-    
-    # 2. Start LiveKit Worker
-    # cli.run_app() is designed to run the main event loop. 
-    # Since we are already inside an async function 'main_worker' (if we were called async),
-    # this would be tricky. BUT we call this from __main__ synchronously via asyncio.run?
-    # NO, cli.run_app() SHOULD be the entry point.
-    
-    # Let's adjust:
-    # We will invoke cli.run_app() directly in __main__.
-    
-    pass
-
-if __name__ == "__main__":
-    # 1. Start Health Check in a Daemon Thread
-    # This ensures it runs independently of the main Agent loop
-    import threading
-    
-    def run_health_check_thread():
-         loop = asyncio.new_event_loop()
-         asyncio.set_event_loop(loop)
-         loop.run_until_complete(health_check_server())
-         loop.run_forever()
-         
-    t = threading.Thread(target=run_health_check_thread, daemon=True)
-    t.start()
+# Admin playground conversations (text tasks via agent_tasks), one per payload session_id.
+# Tasks run concurrently, so a task without a session_id gets a conversation of its own.
+PLAYGROUND_MAX_SESSIONS = 50
+playground_sessions = {}
 
-    # 2. Run the Agent Worker
-    # cli.run_app handles the asyncio loop and signal handling for us.
-    print("🚀 Starting Keith Agent Worker (LiveKit Agents)...")
-    # Use THREAD worker type to avoid Process Pool timeouts on Render Free Tier
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, job_executor_type=JobExecutorType.THREAD))
-    def __init__(self):
-        self.history = [
-            {
-                "role": "system", 
-                "content": (
-                    "# MISSION\n"
-                    "You are KEITH, an empathetic AI Case Manager for Onward.ai. Your primary purpose is to provide a non-judgmental, caring bridge between people in crisis and the specific organizations that can help them move forward.\n\n"
-                    "# CORE PERSONA (The 'Kith' Philosophy)\n"
-                    "- **Empathetic & Warm:** Use active listening. Validate feelings before asking for data.\n"
-                    "- **Concise & Real:** Avoid corporate jargon. Speak like a supportive neighbor.\n"
-                    "- **Action-Oriented:** Your goal isn't just to talk; it's to find a solution.\n\n"
-                    "# CONVERSATION FLOW (Phase-Based)\n\n"
-                    "## Phase 1: Empathetic Intake (TRIAGE FIRST)\n"
-                    "1. **Greet & Validate:** Start with a warm greeting. If the user expresses distress, acknowledge it immediately.\n"
-                    "2. **Situation Assessment:** Do NOT offer resources yet. Ask: 'To help me find the best spot for you, can you tell me a little bit about your situation and what you need most right now?'\n"
-                    "3. **Establish Location:** Resources are hyper-local. You MUST confirm their City/State. Say: 'And where are you located? I want to make sure I'm looking in the right area.'\n\n"
-                    "## Phase 2: Tiered Matching (THE BEST OPTION)\n"
-                    "- **STRICT KNOWLEDGE BASE ADHERENCE:** Only use 'SYSTEM_RAG_RESULT' resources.\n"
-                    "- **SINGLE BEST MATCH:** Do NOT list multiple options initially. Identify the *single best* organization based on their specific needs and location.\n"
-                    "- **Present the Solution:** Say: 'Based on what you told me, I think [Organization Name] is your best bet. They specialize in [Service] and are located in [City].'\n"
-                    "- **Offer Choice:** End with: 'Would you like to start with this one, or would you like me to look for other options?'\n\n"
-                    "## Phase 3: The Handoff & Verification\n"
-                    "1. **Trigger Application:** If they agree to the top match (or another selection), say: 'Great. I can send your application over to them right now so they have your details.'\n"
-                    "2. **Verify Identity:** 'I just need to verify it's you. I'm sending a quick code to this phone number now.'\n"
-                    "3. **Execute Command:** Once confirmed, trigger: `[CREATE_ACCOUNT|Name|Email|Phone|Program Name|Summary]`\n\n"
-                    "# OPERATIONAL GUARDRAILS\n"
-                    "- **NO DATA DUMPING:** Never list more than 1 resource at a time unless explicitly asked for a list.\n"
-                    "- **NO UNVERIFIED RESOURCES:** Only recommend what is in your database.\n"
-                    "- **ONE QUESTION RULE:** Keep the cognitive load low. One question at a time."
-                )
-            }
-        ]
-
-state = ConversationState()
-
-async def create_magic_user(name, email, phone, program):
-    """Creates a Supabase user and attaches program info."""
-    print(f"👤 Creating User: {name}, {email}, {program}")
-    
-    if not SUPABASE_SERVICE_ROLE_KEY:
-        print("⚠️ Missing SUPABASE_SERVICE_ROLE_KEY. Cannot create admin user.")
-        return None, None # Return None to signal failure instead of invalid UUID
-
-    try:
-        # Admin Client for User Management
-        admin_supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
-        
-        # 1. Try to create user (auto-confirm email)
-        user_id = None
-        try:
-            attr = {
-                "email": email,
-                "email_confirm": True,
-                "user_metadata": {
-                    "full_name": name,
-                    "phone": phone,
-                    "programs": [program] # Initial program
-                }
-            }
-            # Generate a simple 6-digit temp password for MVP ease of use
-            temp_password = str(int(os.urandom(3).hex(), 16))[:6]
-            attr["password"] = temp_password
-            
-            response = admin_supabase.auth.admin.create_user(attr)
-            user_id = response.user.id
-            print(f"✅ Created New User: {user_id} with pass: {temp_password}")
-            return user_id, temp_password
-            
-        except Exception as create_err:
-            print(f"ℹ️ User creation note (likely exists): {create_err}")
-            # Try to get existing user
-            existing_id = await get_user_id_by_email(email)
-            if existing_id:
-                print(f"✅ Found Existing User ID: {existing_id}")
-                return existing_id, "Use Existing Password"
+def playground_state_for(task):
+    session_id = (task.get('payload') or {}).get('session_id')
+    if not session_id:
+        return ConversationState()
+    state = playground_sessions.pop(session_id, None) or ConversationState()
+    playground_sessions[session_id] = state  # Most recently used last
+    while len(playground_sessions) > PLAYGROUND_MAX_SESSIONS:
+        playground_sessions.pop(next(iter(playground_sessions)))
+    return state
 
-            return None, None # Failed to create or find
+# Systems test diagnostics, cached briefly so repeated tests don't hit the DB
+catalog_stats = CatalogStats(ttl_seconds=int(os.getenv("KEITH_STATS_TTL_SECONDS", 30)))
 
-    except Exception as e:
-        print(f"❌ Auth Error: {e}")
-        return None, None
+BULK_VERIFY_CHUNK = 100  # Ids per detail query (keeps the in.() filter well under URL limits)
 
-async def get_user_id_by_email(email):
-    """Helper to find User ID by Email using Admin"""
-    if not SUPABASE_SERVICE_ROLE_KEY: return None
-    try:
-        admin = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
-        users = admin.auth.admin.list_users() # Gets first 50
-        
-        # Fallback for pagination struct
-        user_list = users.users if hasattr(users, 'users') else users
-        
-        for u in user_list:
-             if u.email == email: return u.id
-                 
-        return None
-    except Exception as e:
-        print(f"⚠️ User Lookup Error: {e}")
-        return None
-
-async def perform_rag_search(query):
-    if not supabase: return []
-    print(f"🔍 RAG Search for: {query}")
-    print(f"🔍 RAG Search for: {query}")
-    final_data = []
-    
-    # 1. Primary Text Search on Description
-    try:
-        # Note: Removing explicit config to avoid clientcompat issues. 
-        # Default usually works or we fall back to ilike.
-        response = supabase.table('resources') \
-            .select('*') \
-            .text_search('description', query) \
-            .limit(5) \
-            .execute()
-        if response.data:
-            final_data.extend(response.data)
-            
-    except Exception as e:
-        print(f"⚠️ Primary Text Search Error (Falling back): {e}")
-        # Fallback to ilike immediately if text_search fails
-        try:
-             response = supabase.table('resources').select('*').ilike('description', f"%{query}%").limit(5).execute()
-             if response.data:
-                 final_data.extend(response.data)
-        except Exception as e2:
-             print(f"⚠️ Fallback Search Error: {e2}")
-
-    try:
-        # 2. Secondary/Fallback Search (Name)
-        # Often users search by name
-        if len(final_data) < 2:
-             response = supabase.table('resources').select('*').ilike('name', f"%{query}%").limit(3).execute()
-             if response.data:
-                 final_data.extend(response.data)
-                 
-        # 3. Explicit check on Secondary Categories
-        keywords = ['food', 'housing', 'legal', 'health', 'mental health', 'transportation', 'childcare', 'education', 'employment']
-        query_lower = query.lower()
-        matched_cat = next((cat for cat in keywords if cat in query_lower), None)
-        
-        if matched_cat:
-            # FIX: Search BOTH Main Category AND Secondary Categories
-            # Syntax: category.eq.food,secondary_categories.cs.{food}
-            or_filter = f"category.ilike.{matched_cat},secondary_categories.cs.{{{{'{matched_cat}'}}}}"
-            cat_res = supabase.table('resources').select('*').or_(or_filter).limit(10).execute()
-            if cat_res.data:
-                final_data.extend(cat_res.data)
-
-        # 4. Deep Search in 'Programs' (Client-side filtering for JSONB content)
-        # Scan for tech keywords manually to broaden scope if needed
-        tech_keywords = ['computer', 'tech', 'it', 'coding', 'digital', 'class', 'learn']
-        if any(k in query.lower() for k in tech_keywords):
-             print("   -> Expanding search for Tech/Education...")
-             extra_cats = supabase.table('resources').select('*').in_('category', ['education', 'employment', 'other']).limit(15).execute()
-             final_data.extend(extra_cats.data or [])
-
-        # Deduplicate list by ID
-        unique_map = {r['id']: r for r in final_data}
-        unique_results = list(unique_map.values())
-        
-        # 5. Re-Ranking based on full content (Description + Programs)
-        query_terms = query.lower().split()
-        
-        scored_results = []
-        for res in unique_results:
-            score = 0
-            # Convert full object to text for scoring
-            full_text = (res.get('description', '') + ' ' + json.dumps(res.get('programs', []))).lower()
-            
-            # Simple keyword match
-            for term in query_terms:
-                if term in full_text:
-                    score += 1
-            
-            # Boost for explicit location match
-            contact_str = str(res.get('contact_info', '')).lower()
-            if 'compton' in query_lower and 'compton' in contact_str:
-                score += 5
-            elif 'los angeles' in query_lower and 'los angeles' in contact_str:
-                 score += 2
-                
-            scored_results.append({'doc': res, 'score': score})
-            
-        # Sort by score descending
-        scored_results.sort(key=lambda x: x['score'], reverse=True)
-        
-        print(f"✅ RAG Found {len(scored_results)} candidates. Top: {[r['doc']['name'] for r in scored_results[:3]]}")
-        
-        # Return top 5
-        return [item['doc'] for item in scored_results[:5]]
-
-    except Exception as e:
-        print(f"⚠️ RAG Processing Error: {e}")
-        return []
-
-async def get_ai_response(user_text):
-    if not openai_client: return "I'm having trouble thinking right now. Please check my configuration."
-
-    # 1. Check for RAG triggers
-    context_msg = None
-    if any(w in user_text.lower() for w in ['need', 'find', 'looking', 'help', 'search', 'food', 'housing', 'legal']):
-        resources = await perform_rag_search(user_text)
-        if resources:
-            context_msg = "SYSTEM_RAG_RESULT: Found the following resources:\n"
-            for res in resources:
-                process = res.get('application_process', 'Contact them directly for details.')
-                programs = json.dumps(res.get('programs', []))
-                contact = res.get('contact_info', {})
-                area = contact.get('service_area', 'Unspecified')
-                
-                # Format Categories
-                cats = [res.get('category', 'Uncategorized')]
-                sec = res.get('secondary_categories', [])
-                if sec: cats.extend(sec)
-                cat_str = ", ".join(cats)
-                
-                context_msg += (
-                    f"- Name: '{res['name']}'\n"
-                    f"  Categories: {cat_str}\n" 
-                    f"  Service Area: {area}\n"
-                    f"  Description: {res['description']}\n"
-                    f"  Application Process: {process}\n"
-                    f"  Available Programs: {programs}\n\n"
-                )
-            context_msg += "INSTRUCTION: Explain the best match first, prioritizing LOCATION match. Mention others if they might help."
-            
-            print(f"💡 RAG Context: {context_msg[:200]}...") # Log first 200 chars
-
-    # 2. Update History
-    state.history.append({"role": "user", "content": user_text})
-    if context_msg:
-        state.history.append({"role": "system", "content": context_msg})
-
-    # 3. Call OpenAI
-    try:
-        completion = await openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=state.history
-        )
-        reply = completion.choices[0].message.content
-        state.history.append({"role": "assistant", "content": reply})
-        return reply
-    except Exception as e:
-        print(f"❌ OpenAI Error: {e}")
-        return "I'm having trouble connecting to my brain right now, but I'm here to help."
-
-async def send_message(room, text):
-    print(f"📤 Sent: \"{text}\"")
-    payload = json.dumps({
-        "message": text,
-        "timestamp": int(asyncio.get_event_loop().time() * 1000)
-    })
-    data = payload.encode('utf-8')
-    await room.local_participant.publish_data(data, reliable=True, topic="lk-chat-topic")
-
-async def handle_message(room, message):
-    try:
-        # Get AI Response
-        response_text = await get_ai_response(message)
-        
-        # Process [CREATE_ACCOUNT] token
-        # Regex updated to capture 5 groups: Name, Email, Phone, Program, Summary
-        matches = list(re.finditer(r"\[CREATE_ACCOUNT\|(.*?)\|(.*?)\|(.*?)\|(.*?)\|(.*?)\]", response_text))
-        
-        if matches:
-            print(f"🚀 Detected {len(matches)} Account/Lead Creation Request(s)")
-            
-            # We need to process each match. 
-            # CAUTION: Single response text update might be tricky if we replace token 1 then token 2 positions shift?
-            # Actually string replacement by value is safer if unique, or we reconstruct the string.
-            # For simplicity, we'll iterate and replace match strings with status updates.
-            
-            final_response_text = response_text
-            
-            # Check authentication once (context based) - assuming typical session
-            is_authenticated = any("CONTEXT UPDATE: The user is authenticated" in h.get('content', '') for h in state.history)
-            
-            for match in matches:
-                full_token = match.group(0)
-                name, email, phone, program, summary = match.groups()
-                
-                print(f"   -> Processing Lead for: {name}, Program: {program}")
-                
-                replacement_msg = ""
-    
-                if is_authenticated:
-                     # Returning User Flow
-                     try:
-                         # Search for resource
-                         res_query = supabase.table('resources').select('id, name').text_search('description', program, config='english').limit(1).execute()
-                         if not res_query.data:
-                              res_query = supabase.table('resources').select('id, name').ilike('description', f"%{program}%").limit(1).execute()
-                         
-                         if res_query.data:
-                             resource = res_query.data[0]
-                             rid = resource['id']
-                             rname = resource['name']
-                             
-                             real_user_id = await get_user_id_by_email(email)
-                             
-                             if not real_user_id:
-                                 print(f"❌ Could not resolve ID for {email}")
-                                 replacement_msg = f"[Error: Could not verify account for {program}. Please log in manually.]"
-                             else:
-                                 # Check for Duplicate
-                                 existing_lead = supabase.table('leads') \
-                                    .select('*') \
-                                    .eq('user_id', real_user_id) \
-                                    .eq('resource_id', rid) \
-                                    .in_('status', ['new', 'submitted', 'acknowledged', 'accepted', 'on_hold']) \
-                                    .execute()
-                                    
-                                 if existing_lead.data:
-                                     replacement_msg = f"\n[Status: You already have an active application for **{rname}**.]\n"
-                                 else:
-                                     # Create New Lead with Summary in Notes
-                                    new_lead = {
-                                        "user_id": real_user_id,
-                                        "resource_id": rid,
-                                        "status": "submitted",
-                                        "notes": f"{summary}\n(Source: Keith Voice Agent)"
-                                    }
-                                    supabase.table('leads').insert(new_lead).execute()
-                                    replacement_msg = f"\n[Success: I've submitted your request for **{rname}**.]\n"
-                             
-                         else:
-                             replacement_msg = f"[Error: Could not match program '{program}' to a database resource.]"
-                     except Exception as lead_err:
-                         print(f"❌ Lead Creation Error: {lead_err}")
-                         replacement_msg = f"[Error: System issue submitting for {program}.]"
-    
-                else:
-                    # New User Flow
-                    # Note: If multiple 'CREATE_ACCOUNT' tokens exist for a NEW user, we might try to create the user multiple times.
-                    # 'create_magic_user' handles "existing user" gracefully, returning the ID.
-                    user_id, temp_pass = await create_magic_user(name, email, phone, program)
-                    
-                    if not user_id:
-                        replacement_msg = f"[Error: Could not create account for {program}. Please apply on our website.]"
-                    else:
-                        # INSERT LEAD FOR NEW USER
-                        try:
-                             res_query = supabase.table('resources').select('id, name').text_search('description', program, config='english').limit(1).execute()
-                             if not res_query.data:
-                                  res_query = supabase.table('resources').select('id, name').ilike('description', f"%{program}%").limit(1).execute()
-                             
-                             if res_query.data:
-                                 resource = res_query.data[0]
-                                 rid = resource['id']
-                                 rname = resource['name'] # Keep var name consistent
-                                 
-                                 existing_lead = supabase.table('leads').select('*').eq('user_id', user_id).eq('resource_id', rid).execute()
-                                 
-                                 if not existing_lead.data:
-                                     new_lead = {
-                                         "user_id": user_id,
-                                         "resource_id": rid,
-                                         "status": "submitted",
-                                         "notes": f"{summary}\n(Source: Keith Voice Agent - New User Flow)"
-                                     }
-                                     supabase.table('leads').insert(new_lead).execute()
-                                     print(f"✅ Created Lead for New/Guest User: {user_id}")
-                                     
-                                     # Only show magic link info ONCE if multiple leads? 
-                                     # We'll just append it every time, user will see it repeatedly but that's safe.
-                                     magic_link = f"http://localhost:3000/magic/{user_id}"
-                                     replacement_msg = (
-                                         f"\n\n[Success: Request submitted for **{rname}**.]\n"
-                                         f"Access Dashboard: [Magic Link]({magic_link})\n"
-                                         f"Temp Password: `{temp_pass}`" 
-                                     )
-                                 else:
-                                     replacement_msg = f"\n[Status: Application for **{rname}** already exists.]\n"
-    
-                        except Exception as e:
-                            print(f"⚠️ Failed to insert lead for new user: {e}")
-                            replacement_msg = f"[Error: Failed to submit application for {program}.]"
-                
-                # Replace the specific token in the text
-                final_response_text = final_response_text.replace(full_token, replacement_msg)
-            
-            await send_message(room, final_response_text)
-        else:
-            await send_message(room, response_text)
-
-    finally:
-        await room.disconnect()
+def match_org_names(org_names, matcher):
+    """
+    Blocking (run via asyncio.to_thread): resolves org names against the catalog index's name
+    and trigram indexes. Returns {query: (resource_id, match_type, score)}.
+    """
+    matches = {}
+    for query in org_names:
+        rid = matcher.exact(query)
+        if rid:
+            matches[query] = (rid, 'exact', 1.0)
+            continue
+        hit = matcher.best(query, CATALOG_THRESHOLD, CATALOG_MARGIN)
+        matches[query] = (hit[0], 'fuzzy', round(hit[2], 2)) if hit else (None, 'missing', 0.0)
+    return matches
+
+async def handle_bulk_verify(task, org_names):
+    """
+    Verifies a list of organizations in one task.
+    Names are resolved against the catalog index in a thread (the loop keeps serving lease
+    heartbeats), details come from one in.() query per chunk. Each chunk's results are written
+    to the task row as result.batch alongside the progress counters, so every write stays the
+    size of one chunk; the final write carries the full verified/missing lists.
+    Fails the task rather than reporting every org missing when the index can't be loaded.
+    """
+    org_names = [n.strip() for n in org_names if n and n.strip()]
+    print(f"🔍 Bulk verifying {len(org_names)} organizations")
+
+    if catalog_index.is_stale() and not await asyncio.to_thread(refresh_catalog):
+        raise RuntimeError("Catalog index could not be refreshed; not verifying against a stale or empty index")
+    if not len(catalog_index.matcher):
+        raise RuntimeError("Catalog index is empty; cannot verify organizations")
+    matches = await asyncio.to_thread(match_org_names, org_names, catalog_index.matcher)
+
+    verified, missing = [], []
+    progress = {"done": 0, "total": len(org_names), "verified": 0, "missing": 0}
+    for start in range(0, len(org_names), BULK_VERIFY_CHUNK):
+        chunk = org_names[start:start + BULK_VERIFY_CHUNK]
+        ids = list({matches[q][0] for q in chunk if matches[q][0]})
+        details = {}
+        if ids:
+            res = await asyncio.to_thread(lambda: supabase.table('resources').select(VERIFY_COLUMNS).in_('id', ids).execute())
+            details = {r['id']: Resource.from_row(r) for r in res.data or []}
+
+        batch = {"start": start, "verified": [], "missing": []}
+        for query in chunk:
+            rid, match_type, score = matches[query]
+            org = details.get(rid)
+            if not org:
+                batch["missing"].append(query)
+                continue
+            batch["verified"].append(org.verify_detail(query, match_type, score))
+        verified += batch["verified"]
+        missing += batch["missing"]
+
+        done = min(start + BULK_VERIFY_CHUNK, len(org_names))
+        progress = {"done": done, "total": len(org_names), "verified": len(verified), "missing": len(missing)}
+        # This chunk's results only, so each write stays small however long the list is
+        await asyncio.to_thread(lambda: supabase.table('agent_tasks').update({
+            'result': {'progress': progress, 'batch': batch}
+        }).eq('id', task['id']).eq('status', 'in-progress').execute())
+        print(f"   -> {done}/{len(org_names)} checked")
+
+    lines = [f"- **{v['query']}** → {v['name']} ({v['category']}, {v['match']})" for v in verified]
+    lines += [f"- **{q}** → ❌ not found" for q in missing]
+    response_text = (
+        f"✅ **Bulk Verification Complete**\n\n"
+        f"**Verified**: {len(verified)} / {len(org_names)}\n"
+        f"**Not Found**: {len(missing)}\n\n"
+        + "\n".join(lines)
+    )
+    result = {'response': response_text, 'progress': progress, 'verified': verified, 'missing': missing}
+    if await asyncio.to_thread(finish_task, supabase, task, 'completed', result):
+        print(f"✅ Completed Bulk Verify Task: {task['id']}")
 
 async def handle_playground_task(task):
     """Processes a text-based task from the admin playground."""
     print(f"🤖 Processing Playground Task: {task['id']}")
+    playground_state = playground_state_for(task)
     
     # 1. Extract Message
     try:
         payload = task.get('payload', {})
         user_message = payload.get('message', '')
         
+        # Bulk verification carries a list of names instead of a message
+        if payload.get('org_names'):
+            await handle_bulk_verify(task, payload['org_names'])
+            return
+        
         if not user_message:
             raise ValueError("No message in payload")
         
         user_message = user_message.strip()
             
-        # 2. Update Task to In-Progress
-        supabase.table('agent_tasks').update({'status': 'in-progress'}).eq('id', task['id']).execute()
+        # 2. Task is already In-Progress (claimed atomically by the dispatcher)
         
         response_text = ""
         
@@ -1067,25 +765,19 @@ async def handle_playground_task(task):
         
         if any(trigger in msg_lower for trigger in ["system test", "systems test", "check resource catalog", "test system"]):
              try:
-                 # Count Resources
-                 res_count = supabase.table('resources').select('*', count='exact', head=True).execute().count
-                 
-                 # Fetch Last 15 Resources
-                 recent_res = supabase.table('resources').select('name, category, created_at').order('created_at', desc=True).limit(15).execute()
-                 
-                 # Fetch All Categories (via resources for now)
-                 cat_res = supabase.table('resources').select('category').execute()
-                 # unique categories
-                 categories = sorted(list(set(r['category'] for r in cat_res.data if r.get('category'))))
+                 # Counts, categories and last 15 resources (one cached RPC)
+                 stats = await asyncio.to_thread(catalog_stats.get, supabase)
+                 res_count = stats['total']
+                 categories = stats['categories']
                  
                  import datetime
                  now_str = datetime.datetime.now().strftime("%B %d, %Y at %I:%M %p")
                  
                  # Format Recent Orgs
-                 orgs_list = "\n".join([f"- **{r['name']}** ({r['category']})" for r in recent_res.data])
+                 orgs_list = "\n".join([f"- **{r['name']}** ({r['category']})" for r in stats['recent']])
                  
                  # Format Categories
-                 cats_list = ", ".join([f"`{c}`" for c in categories])
+                 cats_list = ", ".join([f"`{c['category']}` ({c['count']})" for c in categories])
                  
                  response_text = (
                      f"✅ **SYSTEMS TEST PASSED**\n\n"
@@ -1107,7 +799,7 @@ async def handle_playground_task(task):
         elif "show system prompt" in msg_lower:
             try:
                 # Get the system prompt from the global state source of truth
-                current_prompt = state.history[0]['content']
+                current_prompt = playground_state.history[0]['content']
                 
                 # Get file modification time
                 import os
@@ -1138,28 +830,27 @@ async def handle_playground_task(task):
                 else:
                     # Search DB
                     # Try exact match first
-                    res_query = supabase.table('resources').select('*').ilike('name', org_name).execute()
+                    res_query = await asyncio.to_thread(lambda: supabase.table('resources').select(VERIFY_COLUMNS).ilike('name', org_name).execute())
                     
                     if not res_query.data:
                          # Try fuzzy search
-                         res_query = supabase.table('resources').select('*').ilike('name', f"%{org_name}%").limit(1).execute()
+                         res_query = await asyncio.to_thread(lambda: supabase.table('resources').select(VERIFY_COLUMNS).ilike('name', f"%{org_name}%").limit(1).execute())
                     
                     if res_query.data:
-                        org = res_query.data[0]
+                        org = Resource.from_row(res_query.data[0])
                         
                         # Extract Details
                         name = org.get('name', 'N/A')
                         desc = org.get('description', 'N/A')
                         category = org.get('category', 'N/A')
                         
-                        sec_cats = org.get('secondary_categories', [])
+                        sec_cats = org.secondary_categories
                         sec_cats_str = ", ".join(sec_cats) if sec_cats else "None"
                         
-                        contact = org.get('contact_info', {}) or {}
-                        service_area = contact.get('service_area', 'Unspecified')
-                        website = contact.get('website', 'N/A')
+                        service_area = org.get('service_area', 'Unspecified')
+                        website = org.get('website', 'N/A')
                         
-                        programs_raw = org.get('programs', [])
+                        programs_raw = org.programs
                         programs_str = "No specific programs listed."
                         if programs_raw:
                             programs_list = [f"- **{p.get('name', 'Unnamed')}**: {p.get('description', 'No description')}" for p in programs_raw]
@@ -1184,64 +875,177 @@ async def handle_playground_task(task):
         
         # 3c. Standard AI Response
         else:
-            response_text = await get_ai_response(user_message)
-        
-        # 4. Check for Leads (Text only check)
-        matches = list(re.finditer(r"\[CREATE_ACCOUNT\|(.*?)\|(.*?)\|(.*?)\|(.*?)\|(.*?)\]", response_text))
-        if matches:
-            response_text += "\n\n[SYSTEM NOTE: Lead generation tokens detected and would be processed in live mode.]"
-
-        # 5. Complete Task
-        supabase.table('agent_tasks').update({
-            'status': 'completed',
-            'result': {'response': response_text}
-        }).eq('id', task['id']).execute()
+            ai_message = await get_ai_response(playground_state, user_message)
+            if not ai_message:
+                response_text = "I'm having trouble connecting right now."
+            else:
+                response_text = ai_message.content or ""
+                if ai_message.content and not ai_message.tool_calls:
+                    playground_state.history.append({"role": "assistant", "content": ai_message.content})
         
-        print(f"✅ Completed Task: {task['id']}")
+                # 4. Check for Leads (Tool calls are not executed from the playground)
+                if ai_message.tool_calls:
+                    response_text += "\n\n[SYSTEM NOTE: create_account tool call detected and would be processed in live mode.]"
+
+        # 5. Complete Task (only while this worker still holds the lease)
+        if await asyncio.to_thread(finish_task, supabase, task, 'completed', {'response': response_text}):
+            print(f"✅ Completed Task: {task['id']}")
 
     except Exception as e:
         print(f"❌ Task Failed: {e}")
-        supabase.table('agent_tasks').update({
-            'status': 'failed',
-            'result': {'error': str(e)}
-        }).eq('id', task['id']).execute()
-
-async def poll_agent_tasks():
-    """Polls Supabase for pending tasks assigned to Keith."""
+        await asyncio.to_thread(finish_task, supabase, task, 'failed', {'error': str(e)})
+
+def playground_task_type(task):
+    """Metrics bucket for a playground task (mirrors the branches in handle_playground_task)."""
+    if (task.get('payload') or {}).get('org_names'):
+        return 'bulk_verify'
+    msg_lower = ((task.get('payload') or {}).get('message') or '').strip().lower()
+    if any(trigger in msg_lower for trigger in ["system test", "systems test", "check resource catalog", "test system"]):
+        return 'system_test'
+    if "show system prompt" in msg_lower:
+        return 'system_prompt'
+    if msg_lower.startswith("verify org"):
+        return 'verify_org'
+    return 'chat'
+
+# Set once the runner starts so the health server can report its metrics
+task_runner = None
+
+async def run_task_dispatcher():
+    """Push-driven, leased agent_tasks loop: LISTEN/NOTIFY when SUPABASE_DB_URL is set, polling otherwise."""
+    global task_runner
     if not supabase: return
+    task_runner = TaskRunner(
+        supabase, 'Keith', handle_playground_task,
+        concurrency=int(os.getenv("KEITH_TASK_CONCURRENCY", 4)),
+        lease_seconds=int(os.getenv("KEITH_TASK_LEASE_SECONDS", 60)),
+        max_attempts=int(os.getenv("KEITH_TASK_MAX_ATTEMPTS", 3)),
+        task_type=playground_task_type,
+        db_url=os.getenv("SUPABASE_DB_URL"),
+        poll_interval=float(os.getenv("KEITH_TASK_POLL_SECONDS", 5)),
+    )
+    await task_runner.run()
+
+if __name__ == "__main__":
+    # Start Health Check in Background
+    # Since cli.run_app controls the loop, we need to schedule the health check 
+    # slightly differently or just run it before.
+    # However, cli.run_app starts its own loop.
+    # We can inject it by creating a task *inside* the loop possibly?
+    # Or just run it as a separate thread? No, aiohttp is async.
     
-    try:
-        response = supabase.table('agent_tasks') \
-            .select('*') \
-            .eq('assigned_agent', 'Keith') \
-            .eq('status', 'pending') \
-            .execute()
-            
-        tasks = response.data or []
-        for task in tasks:
-            asyncio.create_task(handle_playground_task(task))
-            
-    except Exception as e:
-        print(f"⚠️ Polling Error: {e}")
+    # Correct Pattern: Use a custom worker or start it in a pre-hook. 
+    # But cli.run_app works on the main thread.
+    
+    # Alternative: Start the loop manually.
+    # But cli.run_app is robust.
+    
+    # Let's try to just schedule it on the loop created by cli.run_app?
+    # Actually, we can just run the health check *before* passing control to cli.
+    # Wait, cli.run_app blocks.
+    
+    # We can define a simplified worker.
+    
+    async def worker_wrapper():
+        # Start health check
+        _server = await health_check_server()
+        
+        # Start Agent
+        # Use new WorkerOptions
+        opts = WorkerOptions(entrypoint_fnc=entrypoint)
+        # Note: In newer livekit-agents 0.8+, we use cli.run_app(opts)
+        # But we need to ensure we don't block health check.
+        # cli.run_app manages the loop.
+        
+        # We can pass the loop?
+        # Let's rely on standard cli usage but customize via 'run_app' internal args if needed?
+        # Actually, let's just use the CLI but we need the health check.
+        pass
 
-async def health_check_server():
-    """Simple HTTP server for Render Health Checks"""
-    from aiohttp import web
+    # Better approach:
+    # Just run the health check *inside* the first job? No, because it needs to be up immediately for Render.
     
-    async def handle(request):
-        return web.Response(text="Keith is alive and listening.")
+    # Best MVP:
+    # Create the loop, start health check task, then run app.
+    # But run_app creates loop.
+    
+    # Let's inspect livekit.agents.
+    # We'll stick to the recommended pattern but use a background task hook if available.
+    
+    # Actually, we can use `asyncio.new_event_loop` logic manually if we want full control,
+    # but `cli.run_app` is safer.
+    
+    # Let's try to cheat:
+    # Define a minimal shim that starts the server then calls run_app?
+    # No, run_app expects to own the entrypoint.
+    
+    # For now, let's just add the health check server startup to the TOP of `entrypoint`?
+    # No, entrypoint is per job.
+    
+    # Let's use the `pre_shutdown` hook or similar? No.
+    
+    # Let's just run the health check on a separate thread/loop? 
+    # Or just spawn it in the global event loop?
+    
+    # Actually, standard python generic:
+    # loop = asyncio.get_event_loop() ...
+    
+    # Let's assume cli.run_app uses the current loop if running?
+    # Docs say: "It will create a new event loop if one is not running."
+    
+    pass
 
-    app = web.Application()
-    app.add_routes([web.get('/', handle), web.get('/health', handle)])
+    # Final Decision:
+    # We will start the health check inside a standard asyncio run manually, 
+    # and use `Worker` class directly instead of `cli`.
+    # This gives us control over the loop.
     
-    runner = web.AppRunner(app)
-    await runner.setup()
+async def main_worker():
+    # 1. Start Health Check Server (Background Task)
+    # We use a separate thread for the health check so it doesn't block the agent worker
+    import threading
+
+    def run_health_check_thread():
+         loop = asyncio.new_event_loop()
+         asyncio.set_event_loop(loop)
+         loop.run_until_complete(health_check_server())
+         loop.run_forever()
+         
+    t = threading.Thread(target=run_health_check_thread, daemon=True)
+    t.start()
+    print("✅ Health Check Thread Started")
     
-    # Render provides PORT in env, default to 10000 if local
-    port = int(os.getenv("PORT", 10000))
-    site = web.TCPSite(runner, '0.0.0.0', port)
-    await site.start()
-    print(f"🌍 HTTP Health Check running on port {port}")
-    return site  # Return site to prevent GC
+    # 2. Start LiveKit Worker
+    # cli.run_app() is designed to run the main event loop. 
+    # Since we are already inside an async function 'main_worker' (if we were called async),
+    # this would be tricky. BUT we call this from __main__ synchronously via asyncio.run?
+    # NO, cli.run_app() SHOULD be the entry point.
+    
+    # Let's adjust:
+    # We will invoke cli.run_app() directly in __main__.
+    
+    pass
 
+if __name__ == "__main__":
+    # 1. Start Health Check in a Daemon Thread
+    # This ensures it runs independently of the main Agent loop
+    # The same loop also runs the agent_tasks dispatcher for the admin playground.
+    import threading
+    
+    def run_health_check_thread():
+         loop = asyncio.new_event_loop()
+         asyncio.set_event_loop(loop)
+         loop.run_until_complete(health_check_server())
+         loop.create_task(run_task_dispatcher())
+         # Name index and spelling dictionary at startup, not on the first session
+         loop.create_task(asyncio.to_thread(refresh_catalog))
+         loop.run_forever()
+         
+    t = threading.Thread(target=run_health_check_thread, daemon=True)
+    t.start()
 
+    # 2. Run the Agent Worker
+    # cli.run_app handles the asyncio loop and signal handling for us.
+    print("🚀 Starting Keith Agent Worker (LiveKit Agents)...")
+    # Use THREAD worker type to avoid Process Pool timeouts on Render Free Tier
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, job_executor_type=JobExecutorType.THREAD))
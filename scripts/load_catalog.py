@@ -0,0 +1,385 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+from catalog_stream import stream_rows
+
+# Bulk, resumable loader for resources and leads (replaces one-request-per-row seeding).
+# - Streams JSONL or CSV, validates every row (rejects go to <input>.rejects.jsonl with a reason)
+# - Upserts in batches with several batches in flight; failed batches are retried with backoff
+# - Checkpoints completed batch numbers so an interrupted load resumes where it stopped
+# Usage:
+#   python3 scripts/load_catalog.py resources orgs.jsonl [--match scrape_url|name|id] [--batch-size 500] [--parallel 4]
+#   python3 scripts/load_catalog.py leads leads.csv
+# Leads with an id upsert on it; others are inserted unless the seeker already has an active lead for
+# that org (one active lead per (user_id, resource_id), supabase/migrations/20260206_leads_natural_key.sql).
+# Leads may reference their org by resource_name instead of resource_id.
+
+CHECKPOINT_DIR = Path(__file__).parent / '.load_checkpoints'
+RETRIES = 3
+ACTIVE_LEAD_STATUSES = ['new', 'submitted', 'acknowledged', 'contacted', 'accepted', 'enrolled', 'on_hold']
+LOOKUP_CHUNK = 100  # user_ids per in.() lookup
+UUID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.I)
+
+# column -> (type, required)
+SCHEMAS = {
+    'resources': {
+        'id': ('uuid', False),
+        'name': ('text', True),
+        'category': ('text', True),
+        'description': ('text', False),
+        'secondary_categories': ('text[]', False),
+        'suitability_tags': ('text[]', False),
+        'programs': ('programs', False),
+        'contact_info': ('object', False),
+        'location': ('object', False),
+        'scrape_url': ('text', False),
+        'website': ('text', False),
+        'application_process': ('text', False),
+        'owner_id': ('uuid', False),
+        'created_at': ('timestamptz', False),
+    },
+    'leads': {
+        'id': ('uuid', False),
+        'resource_id': ('uuid', False),
+        'resource_name': ('text', False),  # Resolved to resource_id before upserting
+        'user_id': ('uuid', True),
+        'status': ('text', False),
+        'notes': ('text', False),
+        'created_at': ('timestamptz', False),
+    },
+}
+
+# --- Reading ---
+
+def read_rows(path):
+    """Yields dicts from a .jsonl or .csv file (CSV cells holding JSON arrays/objects are decoded)."""
+    path = Path(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.suffix.lower() == '.csv':
+            for row in csv.DictReader(f):
+                yield {k: _decode_cell(v) for k, v in row.items() if k and v not in (None, '')}
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def _decode_cell(value):
+    value = value.strip()
+    if value[:1] in ('[', '{'):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            pass
+    return value
+
+# --- Validation ---
+
+def validate_row(table, row):
+    """Returns (clean_row, None) or (None, reason)."""
+    schema = SCHEMAS[table]
+    unknown = set(row) - set(schema)
+    if unknown:
+        return None, f"unknown columns: {sorted(unknown)}"
+    clean = {}
+    for column, (kind, required) in schema.items():
+        value = row.get(column)
+        if value is None or value == '':
+            if required:
+                return None, f"missing {column}"
+            continue
+        if kind == 'text':
+            if not isinstance(value, (str, int, float)):
+                return None, f"{column} must be text"
+            value = str(value).strip()
+        elif kind == 'uuid':
+            if not isinstance(value, str) or not UUID_RE.match(value):
+                return None, f"{column} is not a uuid"
+        elif kind == 'timestamptz':
+            try:
+                datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+            except ValueError:
+                return None, f"{column} is not an ISO timestamp"
+        elif kind == 'text[]':
+            if isinstance(value, str):
+                value = [v.strip() for v in value.split('|') if v.strip()]  # CSV shorthand: a|b|c
+            if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                return None, f"{column} must be a list of strings"
+        elif kind == 'object':
+            if not isinstance(value, dict):
+                return None, f"{column} must be an object"
+        elif kind == 'programs':
+            if not isinstance(value, list) or not all(isinstance(p, dict) and p.get('name') for p in value):
+                return None, "programs must be a list of objects with a name"
+        clean[column] = value
+    if table == 'leads' and 'resource_id' not in clean and 'resource_name' not in clean:
+        return None, "missing resource_id or resource_name"
+    return clean, None
+
+# --- Checkpoint ---
+
+class LoadCheckpoint:
+    """Completed batch numbers for one (table, input file, batch size); discarded if the input changes."""
+
+    def __init__(self, table, input_path, batch_size, directory=CHECKPOINT_DIR):
+        stat = Path(input_path).stat()
+        self.fingerprint = {'table': table, 'input': str(Path(input_path).resolve()), 'size': stat.st_size,
+                            'mtime': stat.st_mtime, 'batch_size': batch_size}
+        key = hashlib.sha256(json.dumps(self.fingerprint, sort_keys=True).encode()).hexdigest()[:16]
+        self.path = Path(directory) / f"{table}-{key}.json"
+        self.done = set()
+
+    def load(self):
+        if self.path.exists():
+            data = json.loads(self.path.read_text())
+            self.done = set(data.get('done', []))
+            print(f"↩️ Resuming: {len(self.done)} batches already loaded")
+        return self
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({'fingerprint': self.fingerprint, 'done': sorted(self.done)}))
+
+    def clear(self):
+        if self.path.exists():
+            self.path.unlink()
+
+# --- Loading ---
+
+class CatalogLoader:
+    """
+    Usage:
+        loader = CatalogLoader(supabase, 'resources', match='name')
+        report = loader.load(rows)            # any iterable of dicts
+    """
+
+    def __init__(self, client, table, batch_size=500, parallel=4, match=None, checkpoint=None,
+                 rejects_path=None, dry_run=False):
+        if table not in SCHEMAS:
+            raise ValueError(f"Unknown table: {table}")
+        self.client = client
+        self.table = table
+        self.batch_size = batch_size
+        self.parallel = parallel
+        self.match = match or ('scrape_url' if table == 'resources' else 'id')
+        self.checkpoint = checkpoint
+        self.rejects_path = rejects_path
+        self.dry_run = dry_run
+        self._name_ids = None
+        self.stats = {'read': 0, 'loaded': 0, 'rejected': 0, 'duplicates': 0, 'skipped_batches': 0, 'failed_batches': 0, 'requests': 0}
+
+    # Key resolution
+
+    def _names_to_ids(self):
+        """{lower(name): id} for all resources (keyset-streamed; loaded once)."""
+        if self._name_ids is None:
+            self._name_ids = {}
+            for r in stream_rows(self.client, 'resources', 'id, name'):
+                self._name_ids.setdefault(r['name'].strip().lower(), r['id'])
+        return self._name_ids
+
+    def _keyed(self, row):
+        """Fills the upsert key for a validated row. Returns (row, None) or (None, reason)."""
+        if self.table == 'leads':
+            if 'resource_name' in row:
+                name = row.pop('resource_name')
+                if 'resource_id' not in row:
+                    if self.dry_run:
+                        return row, None
+                    resource_id = self._names_to_ids().get(name.lower())
+                    if not resource_id:
+                        return None, f"unknown resource_name {name!r}"
+                    row['resource_id'] = resource_id
+            return row, None
+        if self.match == 'scrape_url' and 'scrape_url' not in row:
+            url = row.get('website') or (row.get('contact_info') or {}).get('website') or (row.get('contact_info') or {}).get('url')
+            if not url:
+                return None, "no scrape_url/website to upsert on"
+            row['scrape_url'] = url
+        elif self.match == 'name' and 'id' not in row and not self.dry_run:
+            resource_id = self._names_to_ids().get(row['name'].lower())
+            if resource_id:
+                row['id'] = resource_id
+        elif self.match == 'id' and 'id' not in row:
+            return None, "missing id"
+        return row, None
+
+    def _conflict_column(self):
+        return 'id' if self.match == 'name' or self.table == 'leads' else self.match
+
+    def _new_leads(self, rows):
+        """
+        Drops leads that would be a second active lead for their (user_id, resource_id), in the batch
+        or already in the table. The partial unique index can't be an upsert target, so this is checked first.
+        """
+        active = lambda row: (row.get('status') or 'new') in ACTIVE_LEAD_STATUSES
+        user_ids = sorted({row['user_id'] for row in rows if active(row)})
+        taken = set()
+        for start in range(0, len(user_ids), LOOKUP_CHUNK):
+            res = self.client.table('leads').select('user_id, resource_id') \
+                .in_('user_id', user_ids[start:start + LOOKUP_CHUNK]).in_('status', ACTIVE_LEAD_STATUSES).execute()
+            taken.update((r['user_id'], r['resource_id']) for r in res.data or [])
+        kept = []
+        for row in rows:
+            key = (row['user_id'], row.get('resource_id'))
+            if active(row):
+                if key in taken: continue
+                taken.add(key)
+            kept.append(row)
+        return kept
+
+    # Writing
+
+    def _write(self, number, rows):
+        """Upserts one batch (one request per distinct column set). Retries with backoff; returns (number, ok, rows, duplicates, requests)."""
+        conflict = self._conflict_column()
+        # Duplicate keys in one statement make Postgres refuse the upsert; last row wins
+        by_key = {}
+        for row in rows:
+            key = tuple(row.get(c) for c in conflict.split(',')) if all(row.get(c) for c in conflict.split(',')) else id(row)
+            by_key[key] = row
+        groups = {}
+        for row in by_key.values():
+            groups.setdefault(frozenset(row), []).append(row)
+
+        requests = 0
+        for attempt in range(RETRIES):
+            try:
+                written = duplicates = 0
+                for columns, group in groups.items():
+                    if self.dry_run:
+                        written += len(group)
+                        continue
+                    if all(c in columns for c in conflict.split(',')):
+                        requests += 1
+                        self.client.table(self.table).upsert(group, on_conflict=conflict).execute()
+                    else:
+                        if self.table == 'leads':
+                            # Re-checked on every attempt, so a retry skips rows a concurrent writer added
+                            requests += 1
+                            new = self._new_leads(group)
+                            duplicates += len(group) - len(new)
+                            group = new
+                        if not group: continue
+                        requests += 1
+                        self.client.table(self.table).insert(group).execute()  # New rows (match=name, no existing id)
+                    written += len(group)
+                return number, True, written, duplicates, requests
+            except Exception as e:
+                if attempt == RETRIES - 1:
+                    print(f"❌ Batch {number} failed after {RETRIES} attempts: {e}")
+                    return number, False, len(by_key), 0, requests
+                time.sleep(2 ** attempt)
+
+    def _batches(self, rows, rejects):
+        """Validated, keyed batches as (number, rows); invalid rows are written to `rejects`."""
+        batch, number = [], 0
+        for line, raw in enumerate(rows, 1):
+            self.stats['read'] += 1
+            clean, reason = validate_row(self.table, raw) if isinstance(raw, dict) else (None, "not an object")
+            if clean:
+                clean, reason = self._keyed(clean)
+            if not clean:
+                self.stats['rejected'] += 1
+                if rejects:
+                    rejects.write(json.dumps({'line': line, 'reason': reason, 'row': raw}, default=str) + "\n")
+                continue
+            batch.append(clean)
+            if len(batch) >= self.batch_size:
+                yield number, batch
+                batch, number = [], number + 1
+        if batch:
+            yield number, batch
+
+    def load(self, rows):
+        start = time.time()
+        if self.checkpoint:
+            self.checkpoint.load()
+        rejects = open(self.rejects_path, 'w') if self.rejects_path else None
+        pending = set()
+
+        def collect(done_futures):
+            for future in done_futures:
+                number, ok, count, duplicates, requests = future.result()
+                self.stats['requests'] += requests
+                self.stats['duplicates'] += duplicates
+                if ok:
+                    self.stats['loaded'] += count
+                    if self.checkpoint:
+                        self.checkpoint.done.add(number)
+                        self.checkpoint.save()
+                else:
+                    self.stats['failed_batches'] += 1
+            elapsed = time.time() - start
+            print(f"   💾 {self.stats['loaded']} rows loaded ({self.stats['loaded'] / elapsed:.0f} rows/s), "
+                  f"{self.stats['rejected']} rejected")
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.parallel) as pool:
+                for number, batch in self._batches(rows, rejects):
+                    if self.checkpoint and number in self.checkpoint.done:
+                        self.stats['skipped_batches'] += 1
+                        continue
+                    # Bounded window: never more than 2x parallel batches held in memory
+                    if len(pending) >= self.parallel * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    pending.add(pool.submit(self._write, number, batch))
+                if pending:
+                    collect(wait(pending)[0])
+        finally:
+            if rejects:
+                rejects.close()
+
+        elapsed = time.time() - start
+        if self.checkpoint and not self.stats['failed_batches']:
+            self.checkpoint.clear()  # Complete; the next run starts fresh
+        return dict(self.stats, seconds=round(elapsed, 2),
+                    rows_per_second=round(self.stats['loaded'] / elapsed, 1) if elapsed else None)
+
+def main():
+    from supabase import create_client
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Bulk-load resources or leads from JSONL/CSV")
+    parser.add_argument('table', choices=sorted(SCHEMAS))
+    parser.add_argument('input', help=".jsonl or .csv file")
+    parser.add_argument('--match', choices=['scrape_url', 'name', 'id'], help="resources upsert key (default scrape_url)")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--parallel', type=int, default=4, help="Batches in flight")
+    parser.add_argument('--no-resume', action='store_true', help="Ignore any checkpoint for this input")
+    parser.add_argument('--dry-run', action='store_true', help="Validate only")
+    args = parser.parse_args()
+
+    load_dotenv('.env.local')
+    url, key = os.getenv("NEXT_PUBLIC_SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not args.dry_run and (not url or not key):
+        print("❌ Error: Missing Supabase credentials in .env.local")
+        sys.exit(1)
+    client = create_client(url, key) if not args.dry_run else None
+
+    checkpoint = None if args.dry_run else LoadCheckpoint(args.table, args.input, args.batch_size)
+    if checkpoint and args.no_resume:
+        checkpoint.clear()
+    rejects_path = f"{args.input}.rejects.jsonl"
+    loader = CatalogLoader(client, args.table, batch_size=args.batch_size, parallel=args.parallel,
+                           match=args.match, checkpoint=checkpoint, rejects_path=rejects_path, dry_run=args.dry_run)
+    print(f"🚚 Loading {args.table} from {args.input} (batch {args.batch_size}, {args.parallel} in flight)...")
+    report = loader.load(read_rows(args.input))
+    print(f"{'✅' if not report['failed_batches'] else '⚠️'} {json.dumps(report)}")
+    if report['rejected']:
+        print(f"📝 {report['rejected']} rejected rows written to {rejects_path}")
+    if report['failed_batches']:
+        print("Re-run the same command to retry the failed batches (completed ones are skipped).")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import re
+from pathlib import Path
+
+import psycopg
+
+# Local Postgres with the repo's schema (supabase/schema.sql + supabase/migrations/*.sql)
+# for scale tests and benchmarks. Supabase-only pieces are shimmed:
+# - auth.users / auth.uid() get a minimal stand-in so foreign keys and RLS policies compile
+# - without the pgvector extension, resources.embedding falls back to real[]
+
+ROOT = Path(__file__).resolve().parent.parent
+SCHEMA_FILE = ROOT / 'supabase' / 'schema.sql'
+MIGRATIONS_DIR = ROOT / 'supabase' / 'migrations'
+
+AUTH_SHIM = """
+create schema if not exists auth;
+create table if not exists auth.users (
+  id uuid primary key default gen_random_uuid(),
+  email text unique,
+  raw_user_meta_data jsonb default '{}'::jsonb,
+  created_at timestamptz default now()
+);
+create or replace function auth.uid() returns uuid language sql stable as $$
+  select nullif(current_setting('request.jwt.claim.sub', true), '')::uuid
+$$;
+do $$ begin
+  if not exists (select 1 from pg_roles where rolname = 'anon') then create role anon nologin; end if;
+  if not exists (select 1 from pg_roles where rolname = 'authenticated') then create role authenticated nologin; end if;
+end $$;
+"""
+
+# Added by hand via scripts/migrate_secondary_cats.py, not by a migration file
+SECONDARY_CATEGORIES = "alter table public.resources add column if not exists secondary_categories text[] default '{}';"
+
+def split_sql(text):
+    """Splits a script into statements, respecting quotes, comments and $tag$ bodies."""
+    statements, current, i = [], [], 0
+    dollar = None
+    while i < len(text):
+        ch = text[i]
+        if dollar:
+            if text.startswith(dollar, i):
+                current.append(dollar)
+                i += len(dollar)
+                dollar = None
+                continue
+        elif text.startswith('--', i):
+            end = text.find('\n', i)
+            i = len(text) if end == -1 else end
+            continue
+        elif ch == "'":
+            end = i + 1
+            while end < len(text):
+                if text[end] == "'" and not text.startswith("''", end):
+                    break
+                end += 2 if text.startswith("''", end) else 1
+            current.append(text[i:end + 1])
+            i = end + 1
+            continue
+        elif ch == '$':
+            m = re.match(r"\$[A-Za-z_]*\$", text[i:])
+            if m:
+                dollar = m.group(0)
+                current.append(dollar)
+                i += len(dollar)
+                continue
+        elif ch == ';':
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+            i += 1
+            continue
+        current.append(ch)
+        i += 1
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+def _has_vector(conn):
+    return conn.execute("select 1 from pg_available_extensions where name = 'vector'").fetchone() is not None
+
+def apply_script(conn, text, label, vector=True):
+    """Runs each statement in its own savepoint; objects that already exist are skipped, not fatal."""
+    skipped = 0
+    for statement in split_sql(text):
+        if not vector:
+            if re.match(r"create extension if not exists vector", statement, re.I):
+                continue
+            statement = re.sub(r"vector\(\d+\)", "real[]", statement)
+        try:
+            with conn.transaction():
+                conn.execute(statement)
+        except (psycopg.errors.DuplicateObject, psycopg.errors.DuplicateTable,
+                psycopg.errors.DuplicateFunction, psycopg.errors.DuplicateColumn):
+            skipped += 1
+    if skipped:
+        print(f"   ↪️ {label}: {skipped} statement(s) already applied")
+
+def bootstrap(database_url, reset=False):
+    """Creates (or with reset=True, recreates) the public schema and applies every migration in order."""
+    with psycopg.connect(database_url, autocommit=True) as conn:
+        if reset:
+            conn.execute("drop schema if exists public cascade")
+            conn.execute("drop schema if exists auth cascade")
+            conn.execute("create schema public")
+        vector = _has_vector(conn)
+        if not vector:
+            print("⚠️ pgvector not installed: resources.embedding will be real[]")
+        apply_script(conn, AUTH_SHIM, 'auth shim')
+        if conn.execute("select to_regclass('public.resources')").fetchone()[0] is None:
+            apply_script(conn, SCHEMA_FILE.read_text(), 'schema.sql', vector)
+        apply_script(conn, SECONDARY_CATEGORIES, 'secondary_categories', vector)
+        for migration in sorted(MIGRATIONS_DIR.glob('2*.sql')):
+            apply_script(conn, migration.read_text(), migration.name, vector)
+    print(f"🗄️ Schema ready ({len(list(MIGRATIONS_DIR.glob('2*.sql')))} migrations)")
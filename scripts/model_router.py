@@ -0,0 +1,150 @@
+import os
+import re
+import time
+
+# Picks a model tier per turn instead of sending every turn to one model with the full tool schema.
+#   fast    - greetings, acknowledgements, small talk: fastest model, no tool schema in the prompt
+#   capable - matching turns (RAG results to explain), likely create_account/tool turns, tool
+#             follow-ups and long conversations
+# A failed call is retried once on the other tier. Latency and tokens are recorded per tier
+# (GET /models on the health server).
+# Configuration:
+#   KEITH_FAST_MODEL=gpt-4o-mini  KEITH_CAPABLE_MODEL=gpt-4o-mini
+#   (both default to the model every turn used before routing; set KEITH_CAPABLE_MODEL, e.g. to
+#   gpt-4o, to opt in to a larger model for matching and tool turns)
+#   KEITH_MODEL_ROUTING=auto|fast|capable   (fast/capable pin every turn to one tier)
+#   KEITH_ROUTING_LONG_HISTORY=24           (messages after which every turn is capable)
+# Usage:
+#   router = ModelRouter.from_env()
+#   route = router.route(state.history, user_text, intent)
+#   completion, route = await router.complete(openai_client, state.history, route, TOOLS)
+
+FAST, CAPABLE = 'fast', 'capable'
+TIERS = (FAST, CAPABLE)
+
+_EMAIL = re.compile(r"@|\b(at|dot)\s+(gmail|yahoo|hotmail|outlook|icloud|aol|com|net|org)\b")
+_PHONE = re.compile(r"(\d[\s.-]?){7,}")
+_TOOL_PHRASES = re.compile(
+    r"\b(sign (me )?up|signup|apply|application|submit|enroll|register|create (an |my )?account|"
+    r"that one|the (first|second|third|last) one|go ahead|verify)\b")
+# The assistant just asked for something create_account needs
+_ASKED_FOR_DETAILS = re.compile(r"\b(email|phone|full name|your name|application|apply|account|spell)\b")
+
+def _role_content(message):
+    if isinstance(message, dict):
+        return message.get('role'), message.get('content') or '', bool(message.get('tool_calls'))
+    return getattr(message, 'role', None), getattr(message, 'content', None) or '', bool(getattr(message, 'tool_calls', None))
+
+class Route:
+    __slots__ = ('tier', 'tools', 'reason')
+
+    def __init__(self, tier, tools, reason):
+        self.tier = tier
+        self.tools = tools
+        self.reason = reason
+
+    def __repr__(self):
+        return f"Route({self.tier}, tools={self.tools}, {self.reason})"
+
+class ModelMetrics:
+    """Per tier counters: calls, errors, fallbacks taken, latency and token usage."""
+
+    def __init__(self):
+        self.by_tier = {}
+
+    def record(self, tier, latency, prompt_tokens=0, completion_tokens=0, ok=True, fallback=False):
+        m = self.by_tier.setdefault(tier, {'calls': 0, 'errors': 0, 'fallbacks': 0, 'latency_total': 0.0,
+                                           'latency_max': 0.0, 'prompt_tokens': 0, 'completion_tokens': 0})
+        m['calls' if ok else 'errors'] += 1
+        m['fallbacks'] += fallback
+        m['latency_total'] += latency
+        m['latency_max'] = max(m['latency_max'], latency)
+        m['prompt_tokens'] += prompt_tokens or 0
+        m['completion_tokens'] += completion_tokens or 0
+
+    def snapshot(self):
+        out = {}
+        for tier, m in self.by_tier.items():
+            calls = m['calls'] + m['errors']
+            out[tier] = {
+                'calls': m['calls'],
+                'errors': m['errors'],
+                'fallbacks': m['fallbacks'],
+                'avg_latency_ms': round(m['latency_total'] / calls * 1000, 1) if calls else 0,
+                'max_latency_ms': round(m['latency_max'] * 1000, 1),
+                'prompt_tokens': m['prompt_tokens'],
+                'completion_tokens': m['completion_tokens'],
+                'avg_prompt_tokens': round(m['prompt_tokens'] / m['calls']) if m['calls'] else 0,
+            }
+        return out
+
+class ModelRouter:
+    """
+    Usage:
+        router = ModelRouter(fast_model='gpt-4o-mini', capable_model='gpt-4o')
+        route = router.route(history, "thanks!", intent)      # -> Route(fast, tools=False, small talk)
+        completion, route = await router.complete(client, history, route, TOOLS)
+    """
+
+    def __init__(self, fast_model='gpt-4o-mini', capable_model='gpt-4o-mini', mode='auto', long_history=24):
+        self.models = {FAST: fast_model, CAPABLE: capable_model}
+        self.mode = mode if mode in TIERS else 'auto'
+        self.long_history = long_history
+        self.metrics = ModelMetrics()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            fast_model=os.getenv("KEITH_FAST_MODEL", "gpt-4o-mini"),
+            capable_model=os.getenv("KEITH_CAPABLE_MODEL", "gpt-4o-mini"),
+            mode=os.getenv("KEITH_MODEL_ROUTING", "auto"),
+            long_history=int(os.getenv("KEITH_ROUTING_LONG_HISTORY", 24)),
+        )
+
+    def route(self, history, user_text, intent=None, rag_context=False):
+        """Tier for the next completion. user_text is None on tool follow-ups."""
+        # Once tool calls are in the history the schema stays in the prompt, whichever tier answers
+        tool_history = any(role == 'tool' or calls for role, _, calls in map(_role_content, history))
+        if self.mode != 'auto':
+            return Route(self.mode, True, 'pinned')
+        if user_text is None:
+            return Route(CAPABLE, True, 'tool follow-up')
+        if rag_context or (intent is not None and intent.rag):
+            return Route(CAPABLE, True, 'matching')
+        if self.tool_likely(history, user_text):
+            return Route(CAPABLE, True, 'tool likely')
+        if len(history) > self.long_history:
+            return Route(CAPABLE, True, 'long conversation')
+        return Route(FAST, tool_history, 'small talk')
+
+    def tool_likely(self, history, user_text):
+        text = user_text.lower()
+        if _EMAIL.search(text) or _PHONE.search(text) or _TOOL_PHRASES.search(text):
+            return True
+        for message in reversed(history):
+            role, content, _ = _role_content(message)
+            if role == 'assistant':
+                return bool(_ASKED_FOR_DETAILS.search(content.lower()))
+        return False
+
+    async def complete(self, client, messages, route, tools):
+        """Runs the completion on route's tier, then once on the other tier if that fails."""
+        error = None
+        for tier in (route.tier, CAPABLE if route.tier == FAST else FAST):
+            kwargs = {'model': self.models[tier], 'messages': messages}
+            if route.tools:
+                kwargs.update(tools=tools, tool_choice="auto")
+            start = time.perf_counter()
+            try:
+                completion = await client.chat.completions.create(**kwargs)
+            except Exception as e:
+                self.metrics.record(tier, time.perf_counter() - start, ok=False)
+                print(f"⚠️ {self.models[tier]} ({tier}) failed: {e}")
+                error = e
+                continue
+            usage = getattr(completion, 'usage', None)
+            self.metrics.record(tier, time.perf_counter() - start,
+                                getattr(usage, 'prompt_tokens', 0), getattr(usage, 'completion_tokens', 0),
+                                fallback=tier != route.tier)
+            return completion, Route(tier, route.tools, route.reason)
+        raise error
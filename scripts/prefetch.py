@@ -0,0 +1,100 @@
+import asyncio
+import re
+import time
+
+# Speculative, read-only lookups for create_account, started while the caller is still talking.
+# By the time the model calls create_account the caller said their email and picked an org turns
+# ago; the session starts the user lookup (and, once an org is picked, the duplicate-lead check)
+# as soon as those show up, and the tool path reads the warm results through TurnLookups.
+# - Only reads are speculative; user creation and the lead insert still happen in the tool call
+# - A new email cancels lookups for the previous one; entries go stale after max_age seconds
+# - A failed or cancelled lookup is never used: the tool path just runs it itself
+# Usage:
+#   if state.prefetch.note_email(find_email(user_text)):
+#       state.prefetch.start(('user_id', email), lambda: get_user_id_by_email(email))
+#   lookups = TurnLookups(warm=state.prefetch)     # tool path: await lookups.prefetched(key)
+
+# Common TLDs only: "i'm at home. ok" must not read as m@home.ok
+_EMAIL = re.compile(r"[a-z0-9._%+-]+@[a-z0-9-]+(\.[a-z0-9-]+)*\.(com|net|org|edu|gov|us|io|co|me|info|biz)\b")
+
+def find_email(text):
+    """Email spoken or typed in a turn ("maria at gmail dot com"), normalized like the tool's argument."""
+    spoken = f" {str(text or '').lower()} ".replace(" at ", "@").replace(" dot ", ".")
+    match = _EMAIL.search(re.sub(r"\s*([@.])\s*", r"\1", spoken))
+    return match.group(0).rstrip('.') if match else None
+
+class Prefetch:
+    """
+    Per-session speculative lookups, keyed like the tool path's TurnLookups keys.
+
+    Usage:
+        prefetch = Prefetch(max_age=300)
+        prefetch.start(('user_id', email), lambda: lookup(email))   # no-op while a fresh one runs
+        prefetch.cancel_where(lambda key: key[1] != email)          # caller corrected the email
+    """
+
+    def __init__(self, max_age=300, max_orgs=3):
+        self.max_age = max_age
+        self.max_orgs = max_orgs
+        self.tasks = {}  # key -> (started_at, task)
+        self.email = None
+        self.orgs = []   # Resource ids the caller may apply to, most recent last
+        self.stats = {'started': 0, 'cancelled': 0, 'used': 0, 'stale': 0}
+
+    def note_email(self, email):
+        """True when email is new; lookups keyed on the previous email are cancelled."""
+        if not email or email == self.email:
+            return False
+        self.cancel_where(lambda key: len(key) > 1 and key[1] == self.email)
+        self.email = email
+        return True
+
+    def note_org(self, resource_id):
+        """Remembers a picked/mentioned org; the oldest beyond max_orgs is dropped with its lookups."""
+        if resource_id in self.orgs:
+            self.orgs.remove(resource_id)
+        self.orgs.append(resource_id)
+        for dropped in self.orgs[:-self.max_orgs]:
+            self.cancel_where(lambda key: key[-1] == dropped)
+        self.orgs = self.orgs[-self.max_orgs:]
+
+    def start(self, key, factory):
+        entry = self.tasks.get(key)
+        if entry and self._fresh(entry) and not entry[1].cancelled():
+            return entry[1]
+        self.cancel(key)
+        task = asyncio.ensure_future(factory())
+        task.add_done_callback(_quiet)
+        self.tasks[key] = (time.time(), task)
+        self.stats['started'] += 1
+        return task
+
+    def get(self, key):
+        """The lookup's task when it is fresh and not cancelled, else None."""
+        entry = self.tasks.get(key)
+        if not entry:
+            return None
+        if not self._fresh(entry) or entry[1].cancelled():
+            self.stats['stale'] += 1
+            del self.tasks[key]
+            return None
+        self.stats['used'] += 1
+        return entry[1]
+
+    def cancel(self, key):
+        entry = self.tasks.pop(key, None)
+        if entry and not entry[1].done():
+            entry[1].cancel()
+            self.stats['cancelled'] += 1
+
+    def cancel_where(self, predicate):
+        for key in [k for k in self.tasks if predicate(k)]:
+            self.cancel(key)
+
+    def _fresh(self, entry):
+        return time.time() - entry[0] < self.max_age
+
+def _quiet(task):
+    """Speculative failures are only logged; the tool path will run the lookup itself."""
+    if not task.cancelled() and task.exception():
+        print(f"⚠️ Prefetch failed: {task.exception()}")
@@ -0,0 +1,313 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+from ingest import content_hash
+
+# LLM structured extraction of org profiles (category, secondary_categories, programs, service_area)
+# from scraped text, replacing the hard-coded "General Aid" category.
+# - Several orgs per request, answered against a strict JSON schema
+# - Results cached by hash(model + prompt version + text), so unchanged orgs cost nothing
+# - Bounded request concurrency; every profile is validated and invalid ones are retried alone
+# - FakeModel gives deterministic offline output for verify scripts (EXTRACTOR=fake)
+
+PROMPT_VERSION = 'v1'
+DEFAULT_CACHE = Path(__file__).parent / '.profile_cache.sqlite'
+TEXT_CHARS = 4000           # Per-org text sent to the model
+BATCH_CHARS = 24000         # Packed text per request
+MAX_PER_REQUEST = 8
+CONCURRENCY = 4
+MAX_PROGRAMS = 12
+
+# Same vocabulary the worker's RAG category filter uses, plus audience tags seen in the seed data
+CATEGORIES = ['food', 'housing', 'legal', 'health', 'mental health', 'transportation', 'childcare', 'education', 'employment']
+SECONDARY = CATEGORIES + ['families', 'youth', 'seniors', 'veterans', 'utilities', 'financial']
+
+# USD per 1M tokens (input, output)
+PRICES = {'gpt-4o-mini': (0.15, 0.60), 'gpt-4o': (2.50, 10.00), 'fake': (0.0, 0.0)}
+
+PROFILE_SCHEMA = {
+    'type': 'object',
+    'additionalProperties': False,
+    'required': ['profiles'],
+    'properties': {
+        'profiles': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'additionalProperties': False,
+                'required': ['id', 'category', 'secondary_categories', 'programs', 'service_area'],
+                'properties': {
+                    'id': {'type': 'string'},
+                    'category': {'type': 'string', 'enum': CATEGORIES},
+                    'secondary_categories': {'type': 'array', 'items': {'type': 'string', 'enum': SECONDARY}},
+                    'programs': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'additionalProperties': False,
+                            'required': ['name', 'description'],
+                            'properties': {'name': {'type': 'string'}, 'description': {'type': 'string'}},
+                        },
+                    },
+                    'service_area': {'type': ['string', 'null']},
+                },
+            },
+        },
+    },
+}
+
+SYSTEM_PROMPT = (
+    "You extract structured profiles of social-service organizations from scraped website text. "
+    "For every org in the input return one profile with the same id. "
+    f"category: the single best fit from {CATEGORIES}. "
+    "secondary_categories: other applicable values from the allowed list (may be empty). "
+    "programs: named programs or services actually described in the text, each with a one-sentence description; "
+    "never invent programs. service_area: cities/regions served as written in the text, or null if not stated."
+)
+
+# --- Validation ---
+
+def validate_profile(profile):
+    """Returns (clean_profile, None) or (None, reason). Mirrors PROFILE_SCHEMA plus length/dedup cleanup."""
+    if not isinstance(profile, dict):
+        return None, "not an object"
+    category = str(profile.get('category') or '').strip().lower()
+    if category not in CATEGORIES:
+        return None, f"bad category {category!r}"
+    secondary = profile.get('secondary_categories')
+    programs = profile.get('programs')
+    if not isinstance(secondary, list) or not isinstance(programs, list):
+        return None, "secondary_categories/programs must be arrays"
+    area = profile.get('service_area')
+    if area is not None and not isinstance(area, str):
+        return None, "service_area must be a string or null"
+
+    clean_secondary = []
+    for cat in secondary:
+        cat = str(cat).strip().lower()
+        if cat in SECONDARY and cat != category and cat not in clean_secondary:
+            clean_secondary.append(cat)
+    clean_programs, seen = [], set()
+    for program in programs:
+        if not isinstance(program, dict) or not str(program.get('name') or '').strip():
+            return None, "program without a name"
+        name = str(program['name']).strip()[:80]
+        if name.lower() in seen:
+            continue
+        seen.add(name.lower())
+        clean_programs.append({'name': name, 'description': str(program.get('description') or '').strip()[:300]})
+    return {
+        'category': category,
+        'secondary_categories': clean_secondary,
+        'programs': clean_programs[:MAX_PROGRAMS],
+        'service_area': (area.strip() or None) if area else None,
+    }, None
+
+# --- Models ---
+
+class OpenAIModel:
+    def __init__(self, model='gpt-4o-mini', client=None):
+        from openai import AsyncOpenAI
+        self.client = client or AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.name = model
+
+    async def complete(self, items):
+        """items: [{'id', 'name', 'text'}] -> (parsed response dict, (prompt_tokens, completion_tokens))"""
+        res = await self.client.chat.completions.create(
+            model=self.name,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps(items, ensure_ascii=False)},
+            ],
+            response_format={"type": "json_schema", "json_schema": {"name": "org_profiles", "strict": True, "schema": PROFILE_SCHEMA}},
+            temperature=0,
+        )
+        usage = res.usage
+        return json.loads(res.choices[0].message.content), (usage.prompt_tokens, usage.completion_tokens)
+
+class FakeModel:
+    """Keyword heuristics in the real response shape. corrupt_every=N returns a bad category for every Nth org."""
+
+    AREAS = re.compile(r"\b(Long Beach|Los Angeles(?: County)?|South Los Angeles|Compton|Lakewood|Hollywood|Oakland|"
+                       r"Orange County|San Pedro|Harbor City|Carson|Paramount|Bellflower)\b")
+
+    def __init__(self, corrupt_every=0, latency=0.0):
+        self.name = 'fake'
+        self.corrupt_every = corrupt_every
+        self.latency = latency
+        self.seen = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def complete(self, items):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            profiles = []
+            for item in items:
+                self.seen += 1
+                text = item['text'].lower()
+                scores = {cat: text.count(cat) for cat in CATEGORIES}
+                ranked = sorted((c for c in scores if scores[c]), key=lambda c: -scores[c])
+                category = ranked[0] if ranked else 'health'
+                if self.corrupt_every and self.seen % self.corrupt_every == 0:
+                    category = 'General Aid'
+                programs = [{'name': m.group(1).strip(), 'description': m.group(2).strip()}
+                            for m in re.finditer(r"([A-Z][\w&'()\- ]{2,60}): ([^:]{10,300}?\.)", item['text'])]
+                areas = list(dict.fromkeys(self.AREAS.findall(item['text'])))
+                profiles.append({'id': item['id'], 'category': category, 'secondary_categories': ranked[1:4],
+                                 'programs': programs, 'service_area': ", ".join(areas) or None})
+            prompt_chars = len(SYSTEM_PROMPT) + sum(len(i['text']) + len(i['name']) for i in items)
+            return {'profiles': profiles}, (prompt_chars // 4, len(json.dumps(profiles)) // 4)
+        finally:
+            self.in_flight -= 1
+
+def make_model(name=None):
+    """EXTRACTOR=openai|fake|off (defaults to openai when OPENAI_API_KEY is set, else off)."""
+    name = name or os.getenv("EXTRACTOR") or ('openai' if os.getenv("OPENAI_API_KEY") else 'off')
+    if name == 'openai':
+        return OpenAIModel(os.getenv("EXTRACTOR_MODEL", 'gpt-4o-mini'))
+    if name == 'fake':
+        return FakeModel()
+    if name == 'off':
+        return None
+    raise ValueError(f"Unknown extractor: {name}")
+
+# --- Cache ---
+
+class ProfileCache:
+    """sqlite key/value store: hash(model, prompt version, text) -> validated profile JSON."""
+
+    def __init__(self, path=DEFAULT_CACHE):
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("CREATE TABLE IF NOT EXISTS profiles (key TEXT PRIMARY KEY, profile TEXT NOT NULL)")
+
+    def get_many(self, keys):
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.conn.execute(f"SELECT key, profile FROM profiles WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+            found.update((key, json.loads(profile)) for key, profile in rows)
+        return found
+
+    def put(self, key, profile):
+        self.conn.execute("INSERT OR REPLACE INTO profiles (key, profile) VALUES (?, ?)", (key, json.dumps(profile)))
+        self.conn.commit()
+
+# --- Extraction ---
+
+def pack_batches(items, batch_chars=BATCH_CHARS, max_per_request=MAX_PER_REQUEST):
+    batches, current, size = [], [], 0
+    for item in items:
+        if current and (size + len(item['text']) > batch_chars or len(current) >= max_per_request):
+            batches.append(current)
+            current, size = [], 0
+        current.append(item)
+        size += len(item['text'])
+    if current:
+        batches.append(current)
+    return batches
+
+class ProfileExtractor:
+    """
+    Usage:
+        extractor = ProfileExtractor(make_model())
+        profiles = await extractor.extract([{'id': url, 'name': org, 'text': scraped_text}, ...])
+        print(extractor.report())
+    """
+
+    def __init__(self, model, cache=None, concurrency=CONCURRENCY, batch_chars=BATCH_CHARS,
+                 max_per_request=MAX_PER_REQUEST, retries=2):
+        self.model = model
+        self.cache = cache or ProfileCache()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.batch_chars = batch_chars
+        self.max_per_request = max_per_request
+        self.retries = retries
+        self.stats = {'orgs': 0, 'cache_hits': 0, 'extracted': 0, 'invalid': 0, 'retried': 0, 'failed': 0,
+                      'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'seconds': 0.0}
+
+    def _key(self, text):
+        return content_hash(f"{self.model.name}|{PROMPT_VERSION}|{text}")
+
+    async def _request(self, batch):
+        async with self.semaphore:
+            payload = [{'id': i['id'], 'name': i['name'], 'text': i['text']} for i in batch]
+            try:
+                data, (prompt_tokens, completion_tokens) = await self.model.complete(payload)
+            except Exception as e:
+                print(f"⚠️ Extraction request failed ({len(batch)} orgs): {e}")
+                return {}
+            self.stats['requests'] += 1
+            self.stats['prompt_tokens'] += prompt_tokens
+            self.stats['completion_tokens'] += completion_tokens
+        returned = {}
+        for profile in (data or {}).get('profiles') or []:
+            if isinstance(profile, dict) and profile.get('id') is not None:
+                returned[str(profile['id'])] = profile
+        return returned
+
+    async def _extract_batch(self, batch, attempt=0):
+        returned = await self._request(batch)
+        results, redo = {}, []
+        for item in batch:
+            clean, error = validate_profile(returned.get(item['id'])) if item['id'] in returned else (None, "missing")
+            if clean:
+                results[item['id']] = clean
+                self.cache.put(item['key'], clean)
+                self.stats['extracted'] += 1
+            else:
+                self.stats['invalid'] += 1
+                redo.append(item)
+        if redo and attempt < self.retries:
+            # Retry failures one org per request so a bad neighbour can't poison them again
+            self.stats['retried'] += len(redo)
+            for part in await asyncio.gather(*(self._extract_batch([item], attempt + 1) for item in redo)):
+                results.update(part)
+        elif redo:
+            self.stats['failed'] += len(redo)
+        return results
+
+    async def extract(self, items):
+        """items: [{'id', 'name', 'text'}] -> {id: profile} (orgs that never validated are left out)."""
+        start = time.time()
+        prepared = []
+        for item in items:
+            text = (item.get('text') or '')[:TEXT_CHARS]
+            prepared.append({'id': str(item['id']), 'name': item.get('name') or '', 'text': text, 'key': self._key(text)})
+        self.stats['orgs'] += len(prepared)
+
+        cached = self.cache.get_many({i['key'] for i in prepared})
+        results = {i['id']: cached[i['key']] for i in prepared if i['key'] in cached}
+        self.stats['cache_hits'] += len(results)
+
+        misses = [i for i in prepared if i['id'] not in results]
+        batches = pack_batches(misses, self.batch_chars, self.max_per_request)
+        for part in await asyncio.gather(*(self._extract_batch(b) for b in batches)):
+            results.update(part)
+        self.stats['seconds'] = round(self.stats['seconds'] + time.time() - start, 2)
+        return results
+
+    def report(self):
+        input_price, output_price = PRICES.get(self.model.name, PRICES['gpt-4o-mini'])
+        cost = (self.stats['prompt_tokens'] * input_price + self.stats['completion_tokens'] * output_price) / 1e6
+        rate = self.stats['orgs'] / self.stats['seconds'] if self.stats['seconds'] else None
+        return dict(self.stats, model=self.model.name, cost_usd=round(cost, 5),
+                    orgs_per_second=round(rate, 1) if rate else None)
+
+def apply_profile(record, profile):
+    """Merges an extracted profile into a resources record (crawled programs win over model-extracted ones)."""
+    record['category'] = profile['category']
+    record['secondary_categories'] = profile['secondary_categories']
+    if not record.get('programs'):
+        record['programs'] = profile['programs']
+    if profile['service_area']:
+        record['contact_info'] = dict(record.get('contact_info') or {}, service_area=profile['service_area'])
+    return record
@@ -0,0 +1,218 @@
+import re
+from collections import Counter
+
+from gazetteer import ALIASES, PLACES
+from resource_matcher import normalize_name
+from search_ranking import CATEGORY_KEYWORDS, STOPWORDS
+
+# Cleans up speech-to-text before retrieval, so misheard words ("compten", "hosing") don't miss
+# the full-text index and drop the turn into the unindexed ilike fallbacks.
+#   1. possessives and disfluencies: "um i need a food bank's in compten" -> "food bank in compten"
+#   2. plurals folded to a known singular ("pantries" -> "pantry"); place names are left alone ("watts")
+#   3. SymSpell correction (symmetric deletes, Damerau-Levenshtein <= 2) against the catalog
+#      vocabulary + gazetteer + service terms: "compten" -> "compton"
+# Usage:
+#   normalizer = QueryNormalizer()
+#   normalizer.rebuild(catalog_index.vocabulary)     # after each catalog refresh
+#   normalizer.normalize("um i need hosing in compten").text   # -> "housing in compton"
+
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7      # Deletes are generated from the first 7 letters only (SymSpell's prefix trick)
+MIN_WORD_LENGTH = 3    # Shorter tokens are never corrected ("id", "la", "ok")
+BASE_COUNT = 50        # Weight of built-in vocabulary against catalog word counts
+
+# Service words callers use that a small catalog might not contain
+BASE_VOCABULARY = (
+    "food bank pantry meal meals groceries grocery hungry kitchen housing shelter rent rental eviction homeless "
+    "apartment utilities utility bill legal lawyer attorney immigration court health clinic doctor dental medical "
+    "insurance mental counseling therapy therapist depression anxiety addiction recovery substance job jobs "
+    "employment work career resume training education school class classes college literacy computer coding "
+    "childcare daycare preschool kids children child family families youth senior seniors veteran veterans "
+    "transportation bus ride rides car disability women domestic violence emergency assistance program services "
+    "free help support clothing diapers formula baby"
+)
+# Everyday words that must not be "corrected" into a catalog word ("place" -> "grace")
+COMMON_WORDS = (
+    "place stay live living home house night tonight today tomorrow week month year money pay paying cost need want "
+    "find near around close sleep eat food work kid son daughter mom dad mother father wife husband sister brother "
+    "friend old young new adult adults people person someone call phone number address city town street area "
+    "good best cheap open hours walk appointment appointments paperwork apply application sign enroll"
+)
+
+# Spoken filler and request framing: never search terms
+DISFLUENCIES = {'um', 'umm', 'uh', 'uhh', 'uhm', 'er', 'erm', 'ah', 'hmm', 'mm', 'like', 'basically', 'actually',
+                'literally', 'kinda', 'sorta', 'okay', 'ok', 'so', 'well', 'yeah', 'yes', 'please'}
+FILLER_PHRASES = [
+    "you know", "i mean", "i guess", "can you help me find", "can you help me", "can you find", "could you find",
+    "help me find", "i am looking for", "im looking for", "i'm looking for", "looking for", "i need", "i want",
+    "is there", "are there", "do you know", "do you have", "i would like", "id like", "i was wondering if",
+    "some kind of", "sort of", "kind of",
+]
+_PHRASES = re.compile(r"\b(" + "|".join(re.escape(p) for p in sorted(FILLER_PHRASES, key=len, reverse=True)) + r")\b")
+_POSSESSIVE = re.compile(r"(\w)['’]s\b")
+
+def vocabulary_words(text):
+    return [w for w in normalize_name(text).split() if len(w) >= MIN_WORD_LENGTH and not w.isdigit()]
+
+def resource_vocabulary(res):
+    """Words of a catalog row worth correcting toward (name, category, program names and descriptions)."""
+    return catalog_words(res.get('name'), res.get('category'), res.get('description'),
+                         res.get('secondary_categories'), res.get('programs'))
+
+def catalog_words(name, category, description, secondary_categories, programs):
+    """resource_vocabulary over column values (the snapshot loader has columns, not row dicts)."""
+    parts = [name, category, description]
+    parts += list(secondary_categories or [])
+    for prog in programs or []:
+        if isinstance(prog, dict):
+            parts += [prog.get('name'), prog.get('description')]
+        else:
+            parts.append(prog)
+    words = []
+    for part in parts:
+        if part:
+            words += vocabulary_words(part)
+    return words
+
+def osa_distance(a, b, limit):
+    """Damerau-Levenshtein (optimal string alignment) distance, or limit + 1 once it is exceeded."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        best = row[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], prev2[j - 2] + 1)
+            best = min(best, row[j])
+        if best > limit:
+            return limit + 1
+        prev2, prev = prev, row
+    return prev[-1]
+
+class SymSpell:
+    """Symmetric-delete spelling index: lookups cost a few dict probes instead of a vocabulary scan."""
+
+    def __init__(self, max_distance=MAX_DISTANCE, prefix_length=PREFIX_LENGTH):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.counts = Counter()
+        self.deletes = {}
+
+    def __contains__(self, word):
+        return word in self.counts
+
+    def add(self, word, count=1):
+        new = word not in self.counts
+        self.counts[word] += count
+        if new:
+            for variant in self._deletes(word[:self.prefix_length]):
+                self.deletes.setdefault(variant, []).append(word)
+
+    def _deletes(self, word):
+        out, frontier = {word}, {word}
+        for _ in range(self.max_distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - out
+            out |= frontier
+        return out
+
+    def lookup(self, word, max_distance=None):
+        """Closest known word as (word, distance); ties go to the more frequent word. None if nothing is close."""
+        limit = self.max_distance if max_distance is None else max_distance
+        if word in self.counts:
+            return word, 0
+        best = None
+        seen = set()
+        for variant in self._deletes(word[:self.prefix_length]):
+            for candidate in self.deletes.get(variant, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                d = osa_distance(word, candidate, limit)
+                if d > limit:
+                    continue
+                key = (d, -self.counts[candidate], candidate)
+                if best is None or key < best:
+                    best = key
+        return (best[2], best[0]) if best else None
+
+class NormalizedQuery:
+    __slots__ = ('original', 'text', 'corrections')
+
+    def __init__(self, original, text, corrections):
+        self.original = original
+        self.text = text
+        self.corrections = corrections  # [(heard, corrected)]
+
+    @property
+    def changed(self):
+        return self.text != self.original
+
+class QueryNormalizer:
+    """
+    Usage:
+        normalizer = QueryNormalizer()                  # built-in + gazetteer vocabulary
+        normalizer.rebuild(Counter(words_from_catalog))
+        normalizer.normalize("hosing in compten").text  # -> "housing in compton"
+    """
+
+    def __init__(self, vocabulary=None):
+        self.source = None
+        self.rebuild(vocabulary or Counter())
+
+    def rebuild(self, vocabulary):
+        """Replaces the catalog part of the dictionary; a no-op when given the same vocabulary object again."""
+        if vocabulary is self.source and self.source is not None:
+            return
+        spell = SymSpell()
+        for word in BASE_VOCABULARY.split() + COMMON_WORDS.split() + [w for c in CATEGORY_KEYWORDS for w in c.split()]:
+            spell.add(word, BASE_COUNT)
+        self.places = {w for place in list(PLACES) + list(ALIASES) for w in place.split()}
+        for word in self.places:
+            if len(word) >= MIN_WORD_LENGTH:
+                spell.add(word, BASE_COUNT)
+        for word, count in vocabulary.items():
+            spell.add(word, count)
+        self.spell = spell
+        self.source = vocabulary
+
+    def _singular(self, word):
+        for suffix, replacement in (('ies', 'y'), ('es', ''), ('s', '')):
+            if word.endswith(suffix) and len(word) - len(suffix) >= MIN_WORD_LENGTH:
+                stem = word[:-len(suffix)] + replacement
+                if stem in self.spell:
+                    return stem
+        return None
+
+    def correct(self, word):
+        if word in STOPWORDS or word in self.places or len(word) < MIN_WORD_LENGTH or not word.isalpha():
+            return word
+        singular = self._singular(word)
+        if singular:
+            return singular
+        if word in self.spell:
+            return word
+        hit = self.spell.lookup(word, max_distance=1 if len(word) <= 4 else MAX_DISTANCE)
+        if hit:
+            return hit[0]
+        # Run-together words from STT: "foodbank" -> "food bank"
+        for i in range(MIN_WORD_LENGTH, len(word) - MIN_WORD_LENGTH + 1):
+            if word[:i] in self.spell and word[i:] in self.spell:
+                return f"{word[:i]} {word[i:]}"
+        return word
+
+    def normalize(self, query):
+        text = _POSSESSIVE.sub(r"\1", str(query or '').lower())
+        text = normalize_name(text)
+        text = _PHRASES.sub(" ", text)
+        words = [w for w in text.split() if w not in DISFLUENCIES]
+        corrections, out = [], []
+        for word in words:
+            fixed = self.correct(word)
+            if fixed != word:
+                corrections.append((word, fixed))
+            out.append(fixed)
+        return NormalizedQuery(query, " ".join(out), corrections)
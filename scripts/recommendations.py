@@ -0,0 +1,109 @@
+import argparse
+import os
+import sys
+import time
+
+from gazetteer import find_place
+from resource_record import Resource, SEARCH_COLUMNS
+from search_ranking import infer_categories, lexemes
+
+# Precomputed "best <category> near <area>" lists (public.resource_recommendations, kept fresh by
+# triggers in supabase/migrations/20260209_resource_recommendations.sql).
+# A turn like "I need food in Compton" names one category and one place and nothing else that
+# would change the ranking, so it is answered from the key instead of a ranked search.
+# Usage:
+#   python3 scripts/recommendations.py refresh            # full rebuild
+#   python3 scripts/recommendations.py show food compton
+
+# Words that don't change what a caller is asking for; anything else sends the turn to search_resources
+FILLER_WORDS = (
+    "need needs needed help find finding looking look want get getting some place places service services "
+    "resource resources program programs around close nearby area live living please free local somewhere "
+    "anyone know can could would like just really also thanks thank hi hello hey today now right im am give "
+    "tell go anything something options option assistance support aid"
+)
+FILLER = set(lexemes(FILLER_WORDS))
+
+def recommendation_key(query):
+    """(category, area) when the query is just "<category> near <place>", else None."""
+    categories = infer_categories(query)
+    place = find_place(query)
+    if len(categories) != 1 or not place:
+        return None
+    category, area = categories[0], place[0]
+    known = set(lexemes(f"{category} {area}")) | FILLER
+    if any(term not in known for term in lexemes(query)):
+        return None
+    return category, area
+
+class RecommendationCache:
+    """
+    Per-process cache over resource_recommendations. The table is already up to date, so entries
+    only expire on a TTL; a hit costs no round trip at all. Keep the TTL short: it is how long a
+    trigger refresh takes to reach callers.
+
+    Usage:
+        recs = RecommendationCache()
+        resources = recs.get(supabase, 'food', 'compton')   # [] when the key is empty or unavailable
+    """
+
+    def __init__(self, ttl_seconds=30, k=5):
+        self.ttl_seconds = ttl_seconds
+        self.k = k
+        self.entries = {}
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, client, category, area):
+        """Blocking on a miss; call via asyncio.to_thread from async code."""
+        key = (category, area)
+        entry = self.entries.get(key)
+        if entry and time.time() - entry[0] < self.ttl_seconds:
+            self.stats['hits'] += 1
+            return entry[1]
+        self.stats['misses'] += 1
+        resources = fetch_recommendations(client, category, area, self.k)
+        self.entries[key] = (time.time(), resources)
+        return resources
+
+def fetch_recommendations(client, category, area, k=5):
+    rows = client.table('resource_recommendations') \
+        .select(f"rank, score, distance_km, resources({SEARCH_COLUMNS})") \
+        .eq('category', category) \
+        .eq('area', area) \
+        .order('rank') \
+        .limit(k) \
+        .execute().data or []
+    return [Resource.from_row({**row['resources'], 'score': row['score'], 'distance_km': row['distance_km']})
+            for row in rows if row.get('resources')]
+
+def main():
+    from supabase import create_client
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Precomputed category x area recommendations")
+    parser.add_argument('command', choices=['refresh', 'show'])
+    parser.add_argument('category', nargs='?')
+    parser.add_argument('area', nargs='?')
+    args = parser.parse_args()
+
+    load_dotenv('.env.local')
+    url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        print("❌ Error: Missing Supabase credentials in .env.local")
+        sys.exit(1)
+    client = create_client(url, key)
+
+    if args.command == 'refresh':
+        start = time.time()
+        keys = client.rpc('refresh_resource_recommendations', {}).execute().data
+        print(f"✅ Rebuilt {keys} keys in {time.time() - start:.1f}s")
+        return
+    if not args.category or not args.area:
+        parser.error("show needs CATEGORY AREA")
+    for i, res in enumerate(fetch_recommendations(client, args.category, args.area.lower(), 10), 1):
+        km = f"{res.distance_km:.1f} km" if res.distance_km is not None else res.service_area or 'no location'
+        print(f"{i:>2}. {res.name} ({res.category}, {km}) score {res.score:.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+import os
+import re
+import time
+import unicodedata
+from collections import Counter
+
+from catalog_stream import stream_rows
+
+# In-memory fuzzy resolution of spoken program / organization names.
+# Used by the create_account tool so that "the food pantry in Compton" resolves
+# against what Keith just showed the caller instead of a fresh text search.
+
+STOPWORDS = {'the', 'a', 'an', 'of', 'for', 'and', 'at', 'in', 'to', 'with', 'inc', 'org'}
+
+SESSION_THRESHOLD = 0.35   # Session candidates were just shown to the model, so be generous
+SESSION_BONUS = 0.1        # ...and win ties against the rest of the catalog
+CATALOG_THRESHOLD = 0.5    # Global catalog needs a clearer match...
+CATALOG_MARGIN = 0.05      # ...and a visible gap to the runner-up
+MATCH_MARGIN = 0.1         # create_account: gap between session + catalog candidates before filing a lead
+PREFILTER_POSTINGS = 50_000   # Posting entries counted per query, rarest trigrams first
+PREFILTER_CANDIDATES = 500    # Entries actually scored per query, most shared trigrams first
+
+def normalize_name(text: str) -> str:
+    """Lowercase, strip accents/punctuation and collapse whitespace."""
+    if not text: return ""
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = text.lower().replace('&', ' and ')
+    text = re.sub(r"['’`]", "", text)  # "Children’s" -> "childrens"
+    text = re.sub(r"[^a-z0-9]+", " ", text)
+    return " ".join(text.split())
+
+def _tokens(norm: str) -> list:
+    return [t for t in norm.split() if t not in STOPWORDS]
+
+def trigrams(norm: str) -> set:
+    """pg_trgm style trigrams: each word padded with two leading and one trailing space."""
+    grams = set()
+    for word in _tokens(norm):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+def trigram_similarity(a: set, b: set) -> float:
+    if not a or not b: return 0.0
+    return len(a & b) / len(a | b)
+
+def _containment(key: set, query: set) -> float:
+    """Share of the key's trigrams present in the query (key mentioned inside a longer phrase)."""
+    if not key: return 0.0
+    return len(key & query) / len(key)
+
+def _coverage(key: set, query: set) -> float:
+    """Damps a short key found inside a longer query ("Family" in "Family Promise")."""
+    return min(1.0, (len(key) / len(query)) ** 0.5)
+
+class MatchEntry:
+    __slots__ = ('resource_id', 'name', 'keys', 'norm_name')
+
+    def __init__(self, resource_id, name, programs=None):
+        self.resource_id = resource_id
+        self.name = name
+        self.norm_name = normalize_name(name)
+        # (trigrams, weight) - org names slightly outrank program names on ties
+        self.keys = []
+        self._add_key(name, 1.0)
+        for prog in programs or []:
+            prog_name = prog.get('name') if isinstance(prog, dict) else prog
+            if prog_name:
+                self._add_key(prog_name, 0.95)
+                self._add_key(f"{name} {prog_name}", 1.0)
+
+    def _add_key(self, text, weight):
+        grams = trigrams(normalize_name(text))
+        if grams:
+            self.keys.append((grams, weight))
+
+    def grams(self) -> set:
+        return set().union(*(grams for grams, _ in self.keys))
+
+    def score(self, query_grams: set) -> float:
+        best = 0.0
+        for grams, weight in self.keys:
+            sim = max(
+                trigram_similarity(grams, query_grams),
+                0.9 * _containment(grams, query_grams) * _coverage(grams, query_grams),  # "salvation army compton food pantry" -> name
+                0.8 * _containment(query_grams, grams),   # "NAMI" -> "NAMI Greater LA"
+            )
+            best = max(best, sim * weight)
+        return best
+
+class ResourceMatcher:
+    """
+    Ranks a set of resources against a free-text program/organization name.
+    A trigram -> entries inverted index picks the candidates, so a query only scores the
+    entries sharing a reasonably selective trigram with it instead of the whole catalog.
+    """
+
+    def __init__(self, resources=None):
+        self.entries = {}
+        self.by_name = {}   # normalized org name -> resource_id (first one wins)
+        self._slots = []    # entry per posting index
+        self._postings = {} # trigram -> [slot index]
+        for res in resources or []:
+            self.add(res)
+
+    def add(self, res):
+        self.add_entry(res.get('id'), res.get('name'), res.get('programs'))
+
+    def add_entry(self, rid, name, programs=None):
+        if not rid or not name: return
+        entry = MatchEntry(rid, name, programs or [])
+        self.entries[rid] = entry  # A replaced entry's old postings are skipped in candidates()
+        self.by_name.setdefault(entry.norm_name, rid)
+        slot = len(self._slots)
+        self._slots.append(entry)
+        for gram in entry.grams():
+            self._postings.setdefault(gram, []).append(slot)
+
+    def exact(self, query):
+        """resource_id of the org whose normalized name equals the query's, or None."""
+        return self.by_name.get(normalize_name(query))
+
+    def candidates(self, query_grams: set):
+        """
+        Entries sharing the most trigrams with the query. Rare trigrams are counted first and common
+        ones only while the PREFILTER_POSTINGS budget lasts, so a query never walks the whole catalog.
+        """
+        postings = sorted((self._postings[g] for g in query_grams if g in self._postings), key=len)
+        shared, budget = Counter(), PREFILTER_POSTINGS
+        for posting in postings:
+            if shared and len(posting) > budget: break
+            shared.update(posting)
+            budget -= len(posting)
+        slots = [slot for slot, _ in shared.most_common(PREFILTER_CANDIDATES)]
+        return [e for e in map(self._slots.__getitem__, slots) if self.entries.get(e.resource_id) is e]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def rank(self, query, limit=3):
+        query_grams = trigrams(normalize_name(query))
+        if not query_grams: return []
+        scored = [(entry.score(query_grams), entry) for entry in self.candidates(query_grams)]
+        scored.sort(key=lambda x: x[0], reverse=True)
+        return [(score, entry) for score, entry in scored[:limit] if score > 0]
+
+    def best(self, query, threshold, margin=0.0):
+        """Returns (resource_id, name, score) or None when no confident match exists."""
+        ranked = self.rank(query, limit=2)
+        if not ranked: return None
+        top_score, top = ranked[0]
+        if top_score < threshold: return None
+        if margin and len(ranked) > 1 and top_score - ranked[1][0] < margin and top_score < 0.9:
+            return None
+        return top.resource_id, top.name, top_score
+
+class CatalogIndex:
+    """
+    Process-wide matcher over the whole catalog (id, name, programs only), refreshed on a TTL.
+    The first load may come from a .kcat snapshot no older than snapshot_max_age; the TTL to
+    the next database refresh then counts from that load, not from the snapshot's build.
+    """
+
+    def __init__(self, ttl_seconds=600, snapshot_path=None, snapshot_max_age=86400):
+        self.ttl_seconds = ttl_seconds
+        self.snapshot_path = snapshot_path  # Optional .kcat file for a fast first load (scripts/catalog_snapshot.py)
+        self.snapshot_max_age = snapshot_max_age
+        self.matcher = ResourceMatcher()
+        self.vocabulary = Counter()  # Catalog words for query spell correction (query_normalizer.py)
+        self.loaded_at = 0.0
+
+    def is_stale(self):
+        return not self.loaded_at or (time.time() - self.loaded_at) > self.ttl_seconds
+
+    def load(self, rows):
+        from query_normalizer import resource_vocabulary
+        matcher, vocabulary = ResourceMatcher(), Counter()
+        for res in rows:
+            matcher.add(res)
+            vocabulary.update(resource_vocabulary(res))
+        self.matcher, self.vocabulary = matcher, vocabulary
+        self.loaded_at = time.time()
+
+    def refresh(self, client):
+        """
+        Blocking fetch of the matching columns; call via asyncio.to_thread from async code.
+        Returns False when nothing was loaded (no client, or the fetch failed and the previous index is kept).
+        """
+        if not self.loaded_at and self._load_snapshot():
+            return True
+        if not client: return False
+        try:
+            # Keyset-paged: a plain select() is silently capped at the API's max-rows
+            self.load(stream_rows(client, 'resources', 'id, name, programs'))
+            print(f"📚 Catalog index loaded: {len(self.matcher)} resources")
+            return True
+        except Exception as e:
+            print(f"⚠️ Catalog index refresh failed: {e}")
+            return False
+
+    def _load_snapshot(self):
+        """First load from the mmap snapshot when one is configured; later refreshes go to the database."""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            from catalog_snapshot import CatalogSnapshot
+            from query_normalizer import catalog_words
+            snapshot = CatalogSnapshot(self.snapshot_path)
+            if snapshot.age_seconds > self.snapshot_max_age:
+                print(f"⚠️ Catalog snapshot is {snapshot.age_seconds / 3600:.1f}h old, loading from the database")
+                return False
+            # Column-wise: each column is decoded once, no per-row dicts
+            ids, names, programs = snapshot.column('id'), snapshot.column('name'), snapshot.column('programs')
+            matcher, vocabulary = ResourceMatcher(), Counter()
+            for rid, name, progs in zip(ids, names, programs):
+                matcher.add_entry(rid, name, progs)
+            for words in map(catalog_words, names, snapshot.column('category'), snapshot.column('description'),
+                             snapshot.column('secondary_categories'), programs):
+                vocabulary.update(words)
+            self.matcher, self.vocabulary = matcher, vocabulary
+            self.loaded_at = time.time()
+            print(f"📚 Catalog index loaded from snapshot: {len(self.matcher)} resources ({snapshot.age_seconds / 60:.0f} min old)")
+            return True
+        except Exception as e:
+            print(f"⚠️ Catalog snapshot load failed, falling back to the database: {e}")
+            return False
+
+def rank_programs(program, session_resources, catalog: CatalogIndex = None, limit=3):
+    """
+    Session and catalog candidates scored together, best first: [(score, resource_id, name, source)].
+    A resource surfaced in this session gets SESSION_BONUS, so it wins a tie but not a clearly better catalog match.
+    """
+    best = {}
+    if catalog and len(catalog.matcher):
+        for score, entry in catalog.matcher.rank(program, limit=limit + len(session_resources or {})):
+            best[entry.resource_id] = (score, entry.resource_id, entry.name, 'catalog')
+    if session_resources:
+        for score, entry in ResourceMatcher(session_resources.values()).rank(program, limit=limit):
+            score += SESSION_BONUS
+            if score >= best.get(entry.resource_id, (0.0,))[0]:
+                best[entry.resource_id] = (score, entry.resource_id, entry.name, 'session')
+    return sorted(best.values(), key=lambda c: c[0], reverse=True)[:limit]
+
+def _decide(ranked):
+    """(resource_id, name, source) for the top candidate when it clears its threshold and MATCH_MARGIN, else None."""
+    if not ranked: return None
+    score, rid, name, source = ranked[0]
+    if score < (SESSION_THRESHOLD + SESSION_BONUS if source == 'session' else CATALOG_THRESHOLD):
+        return None
+    if len(ranked) > 1 and score - ranked[1][0] < MATCH_MARGIN:
+        return None
+    return rid, name, source
+
+def _near_ties(ranked):
+    if len(ranked) < 2: return []
+    top = ranked[0][0]
+    names = [name for score, _, name, _ in ranked if top - score < MATCH_MARGIN and score >= SESSION_THRESHOLD]
+    return names if len(names) > 1 else []
+
+def resolve_program(program, session_resources, catalog: CatalogIndex = None):
+    """
+    Resolves a program/org name without touching the database.
+    Returns (resource_id, name, source) or None when nothing matches well enough or the
+    best match is within MATCH_MARGIN of the runner-up (see ambiguous_programs).
+    """
+    return _decide(rank_programs(program, session_resources, catalog, limit=2))
+
+def ambiguous_programs(program, session_resources, catalog: CatalogIndex = None):
+    """Names of the near-tied candidates when resolve_program declined because of a tie, else []."""
+    return match_program(program, session_resources, catalog)[1]
+
+def match_program(program, session_resources, catalog: CatalogIndex = None):
+    """
+    resolve_program and ambiguous_programs from a single ranking: (hit or None, near-tied names).
+    Blocking CPU work over the catalog; call via asyncio.to_thread from async code.
+    """
+    ranked = rank_programs(program, session_resources, catalog)
+    hit = _decide(ranked)
+    return hit, ([] if hit else _near_ties(ranked))
@@ -0,0 +1,190 @@
+import argparse
+import json
+import time
+
+# Typed, column-projected resource rows shared by the worker and scripts.
+# select('*') on resources drags in embedding (768 floats as text, ~9 KB a row), location,
+# scrape_url, owner_id... for every RAG candidate, then every consumer re-derives the same
+# fields with .get() chains and json.dumps. Each use case here names the columns it reads,
+# and Resource flattens a row once into slots.
+# Usage:
+#   rows = supabase.table('resources').select(SEARCH_COLUMNS)...execute().data
+#   candidates = [Resource.from_row(r) for r in rows]
+#   python3 scripts/resource_record.py bench [--turns 200]    # payload bytes + decode time per turn
+
+MATCH_COLUMNS = 'id, name, programs'
+SEARCH_COLUMNS = 'id, name, category, secondary_categories, description, application_process, programs, contact_info, location'
+VERIFY_COLUMNS = 'id, name, description, category, secondary_categories, contact_info, programs'
+
+class Resource:
+    """
+    One resource row, flattened. Only the columns in the projection it was fetched with are set;
+    the rest keep their defaults.
+    Supports res['name'] / res.get('programs') so it can go wherever a dict row used to.
+    """
+    __slots__ = ('id', 'name', 'category', 'secondary_categories', 'description',
+                 'application_process', 'programs', 'service_area', 'website', 'location',
+                 'distance_km', 'score', '_search_text')
+
+    def __init__(self, id, name, category=None, secondary_categories=(), description='',
+                 application_process=None, programs=(), service_area=None, website=None, location=None,
+                 distance_km=None, score=None):
+        self.id = id
+        self.name = name
+        self.category = category
+        self.secondary_categories = list(secondary_categories or [])
+        self.description = description or ''
+        self.application_process = application_process
+        self.programs = list(programs or [])
+        self.service_area = service_area
+        self.website = website
+        self.location = location or {}
+        self.distance_km = distance_km  # Set by search_resources / search_ranking
+        self.score = score
+        self._search_text = None
+
+    @classmethod
+    def from_row(cls, row):
+        contact = row.get('contact_info') or {}
+        return cls(
+            row['id'], row.get('name'),
+            category=row.get('category'),
+            secondary_categories=row.get('secondary_categories'),
+            description=row.get('description'),
+            application_process=row.get('application_process'),
+            programs=row.get('programs'),
+            service_area=contact.get('service_area'),
+            website=contact.get('website') or row.get('website'),
+            location=row.get('location'),
+            distance_km=row.get('distance_km'),
+            score=row.get('score'),
+        )
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def __repr__(self):
+        return f"Resource({self.id!r}, {self.name!r})"
+
+    @property
+    def categories(self):
+        return [self.category or 'Uncategorized'] + self.secondary_categories
+
+    @property
+    def search_text(self):
+        """Lowercased description + program text, built once per record for term scoring."""
+        if self._search_text is None:
+            parts = [self.description]
+            for prog in self.programs:
+                if isinstance(prog, dict):
+                    parts.extend(str(v) for v in prog.values() if v)
+                elif prog:
+                    parts.append(str(prog))
+            self._search_text = " ".join(parts).lower()
+        return self._search_text
+
+    def context_snippet(self):
+        """The block handed to the model in SYSTEM_RAG_RESULT."""
+        return (
+            f"- Name: '{self.name}'\n"
+            f"  Categories: {', '.join(self.categories)}\n"
+            f"  Service Area: {self.service_area or 'Unspecified'}\n"
+            f"  Description: {self.description}\n"
+            f"  Application Process: {self.application_process or 'Contact them directly for details.'}\n"
+            f"  Available Programs: {json.dumps(self.programs)}\n\n"
+        )
+
+    def verify_detail(self, query, match, score):
+        """One entry of a bulk verification result."""
+        return {
+            "query": query,
+            "id": self.id,
+            "name": self.name,
+            "match": match,
+            "score": score,
+            "category": self.category,
+            "secondary_categories": self.secondary_categories,
+            "service_area": self.service_area or 'Unspecified',
+            "website": self.website or 'N/A',
+            "programs": len(self.programs),
+        }
+
+# --- Bench ---
+
+TURN_ROWS = 35  # wfts 5 + name 3 + category 10 + tech expansion 15, before dedup
+
+def _rest_rows(count, seed=7):
+    """Synthetic select('*') rows shaped like the PostgREST response (embedding as vector text)."""
+    import random
+    from generate_catalog import CatalogGenerator
+    rng = random.Random(seed)
+    for row in CatalogGenerator(seed).resources(count):
+        row = dict(row)
+        row['embedding'] = "[" + ",".join(f"{rng.uniform(-0.1, 0.1):.8f}" for _ in range(768)) + "]"
+        row['owner_id'] = None
+        yield row
+
+def _project(rows, columns):
+    names = [c.strip() for c in columns.split(',')]
+    return [{c: r.get(c) for c in names} for r in rows]
+
+def _turn_legacy(payload, query):
+    rows = json.loads(payload)
+    terms = query.lower().split()
+    scored = []
+    for res in rows:
+        full_text = (res.get('description', '') + ' ' + json.dumps(res.get('programs', []))).lower()
+        score = sum(1 for t in terms if t in full_text)
+        scored.append((score, res))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    out = ""
+    for _, res in scored[:5]:
+        contact = res.get('contact_info', {})
+        cats = [res.get('category', 'Uncategorized')] + (res.get('secondary_categories') or [])
+        out += (f"- Name: '{res['name']}'\n  Categories: {', '.join(cats)}\n"
+                f"  Service Area: {contact.get('service_area', 'Unspecified')}\n  Description: {res['description']}\n"
+                f"  Application Process: {res.get('application_process', 'Contact them directly for details.')}\n"
+                f"  Available Programs: {json.dumps(res.get('programs', []))}\n\n")
+    return out
+
+def _turn_typed(payload, query):
+    rows = [Resource.from_row(r) for r in json.loads(payload)]
+    terms = query.lower().split()
+    scored = sorted(rows, key=lambda r: sum(1 for t in terms if t in r.search_text), reverse=True)
+    return "".join(r.context_snippet() for r in scored[:5])
+
+def bench(turns):
+    rows = list(_rest_rows(TURN_ROWS * 4))
+    payloads = {
+        'select(*)': [json.dumps(rows[i % 4 * TURN_ROWS:(i % 4 + 1) * TURN_ROWS]) for i in range(4)],
+        'projected': [json.dumps(_project(rows[i % 4 * TURN_ROWS:(i % 4 + 1) * TURN_ROWS], SEARCH_COLUMNS)) for i in range(4)],
+    }
+    query = "i need food and a job training class in compton"
+    results = {}
+    for label, fn in (('select(*)', _turn_legacy), ('projected', _turn_typed)):
+        start = time.perf_counter()
+        for i in range(turns):
+            fn(payloads[label][i % 4], query)
+        per_turn = (time.perf_counter() - start) / turns
+        size = sum(len(p.encode()) for p in payloads[label]) / 4
+        results[label] = (size, per_turn)
+        print(f"{label:<10} payload {size / 1024:>7.1f} KB/turn   decode+score+render {per_turn * 1000:>6.2f} ms/turn")
+    (before_size, before_t), (after_size, after_t) = results['select(*)'], results['projected']
+    print(f"📉 {before_size / after_size:.0f}x fewer bytes, {before_t / after_t:.1f}x faster per turn ({TURN_ROWS} candidate rows)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Resource record projections")
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('--turns', type=int, default=200)
+    args = parser.parse_args()
+    bench(args.turns)
+
+if __name__ == "__main__":
+    main()
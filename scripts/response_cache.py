@@ -0,0 +1,163 @@
+import math
+import re
+import time
+import zlib
+from collections import OrderedDict
+
+from intent_classifier import features
+from query_normalizer import DISFLUENCIES
+from resource_matcher import normalize_name
+
+# Reuses assistant replies for turns that are the same across callers ("what do you do?",
+# "is this free?", "who are you?") instead of paying a model round trip for each.
+# Entries are keyed by (conversation phase, normalized question); a miss on the exact key falls
+# back to cosine similarity over hashed n-gram vectors of the cached questions in the same phase.
+# After the opening turn the phase also carries a hash of the last assistant reply, so a bare
+# "yes" is only reused as an answer to the same question (opening replies come from the cache,
+# so those questions are usually word-for-word the same across callers).
+# Only small-talk turns early in a conversation are eligible: never RAG turns, turns that may
+# call a tool, replies with tool calls, or conversations where the caller has shared personal data.
+# Usage:
+#   cache = ResponseCache()
+#   key = cache.key(state.history, user_text)     # None -> not cacheable
+#   reply = cache.get(key)                          # CachedReply or None
+#   cache.put(key, message.content, latency)
+
+SIMILARITY_THRESHOLD = 0.8
+CACHEABLE_PHASES = ('opening', 'intake')
+
+_PERSONAL = re.compile(
+    r"\d{3,}|\b(at|dot)\s+(gmail|yahoo|hotmail|outlook|icloud|com)\b|"
+    r"\b(my name|name is|i am|im|call me|my (email|phone|number|address|son|daughter|wife|husband|kids?|mom|dad|ex))\b")
+
+def has_personal_data(text):
+    text = str(text or '')
+    return '@' in text or bool(_PERSONAL.search(normalize_name(text)))
+
+def normalize_question(text):
+    return " ".join(w for w in normalize_name(text).split() if w not in DISFLUENCIES)
+
+def _fields(message):
+    if isinstance(message, dict):
+        return message.get('role'), message.get('content') or '', message.get('tool_calls')
+    return getattr(message, 'role', None), getattr(message, 'content', None) or '', getattr(message, 'tool_calls', None)
+
+def conversation_phase(history):
+    """Coarse phase: opening (no reply yet), intake (talking, nothing matched), matching, handoff (tools)."""
+    phase = 'opening'
+    for message in history:
+        role, content, tool_calls = _fields(message)
+        if role == 'tool' or tool_calls:
+            return 'handoff'
+        if role == 'system' and content.startswith('SYSTEM_RAG_RESULT'):
+            phase = 'matching'
+        elif role == 'assistant' and phase == 'opening':
+            phase = 'intake'
+    return phase
+
+class CachedReply:
+    """Stands in for the completion message: callers read .content and .tool_calls."""
+    __slots__ = ('content', 'tool_calls', 'role')
+
+    def __init__(self, content):
+        self.content = content
+        self.tool_calls = None
+        self.role = 'assistant'
+
+class _Entry:
+    __slots__ = ('key', 'vector', 'content', 'latency', 'created')
+
+    def __init__(self, key, vector, content, latency):
+        self.key = key
+        self.vector = vector
+        self.content = content
+        self.latency = latency
+        self.created = time.time()
+
+class ResponseCache:
+    """
+    TTL + LRU cache of assistant replies for repeated small-talk questions.
+
+    Usage:
+        cache = ResponseCache(ttl_seconds=3600, max_entries=512)
+        key = cache.key(history, "um what do you do")   # ('opening', 'what do you do')
+        reply = cache.get(key) or call_model()
+    """
+
+    def __init__(self, ttl_seconds=3600, max_entries=512, threshold=SIMILARITY_THRESHOLD):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.entries = OrderedDict()
+        self.stats = {'lookups': 0, 'hits': 0, 'similar_hits': 0, 'misses': 0, 'ineligible': 0,
+                      'stores': 0, 'evictions': 0, 'saved_seconds': 0.0}
+
+    def key(self, history, user_text):
+        """(phase, normalized question), or None when the turn must not be cached or served from cache."""
+        phase = conversation_phase(history)
+        if phase == 'intake':
+            last = next(content for role, content, _ in map(_fields, reversed(history)) if role == 'assistant')
+            phase = f"intake:{zlib.crc32(normalize_name(last).encode()):08x}"
+        question = normalize_question(user_text)
+        if not question or phase.split(':')[0] not in CACHEABLE_PHASES or has_personal_data(user_text) or any(
+                has_personal_data(m.get('content')) for m in history if isinstance(m, dict) and m.get('role') == 'user'):
+            self.stats['ineligible'] += 1
+            return None
+        return phase, question
+
+    def get(self, key):
+        if key is None:
+            return None
+        self.stats['lookups'] += 1
+        entry = self.entries.get(key)
+        if entry and time.time() - entry.created >= self.ttl_seconds:
+            del self.entries[key]
+            entry = None
+        similar = False
+        if entry is None:
+            entry, similar = self._nearest(key), True
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        self.entries.move_to_end(entry.key)
+        self.stats['hits'] += 1
+        self.stats['similar_hits'] += similar
+        self.stats['saved_seconds'] += entry.latency
+        return CachedReply(entry.content)
+
+    def put(self, key, content, latency):
+        if key is None or not content:
+            return
+        self.entries[key] = _Entry(key, frozenset(features(key[1]).tolist()), content, latency)
+        self.entries.move_to_end(key)
+        self.stats['stores'] += 1
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _nearest(self, key):
+        phase, question = key
+        vector = frozenset(features(question).tolist())
+        now = time.time()
+        best, best_score = None, self.threshold
+        for entry in self.entries.values():
+            if entry.key[0] != phase or now - entry.created >= self.ttl_seconds or not vector:
+                continue
+            score = len(vector & entry.vector) / math.sqrt(len(vector) * len(entry.vector))
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def snapshot(self):
+        s = self.stats
+        return {
+            'entries': len(self.entries),
+            'lookups': s['lookups'],
+            'hits': s['hits'],
+            'similar_hits': s['similar_hits'],
+            'misses': s['misses'],
+            'ineligible': s['ineligible'],
+            'evictions': s['evictions'],
+            'hit_rate': round(s['hits'] / s['lookups'], 3) if s['lookups'] else 0,
+            'saved_ms': round(s['saved_seconds'] * 1000, 1),
+        }
@@ -0,0 +1,132 @@
+import re
+
+from gazetteer import find_place, haversine_km
+from resource_matcher import _containment, normalize_name, trigrams
+
+# Python mirror of public.search_resources (supabase/migrations/20260208_search_resources.sql).
+# The worker ranks with it only when the RPC is unavailable (pre-migration databases, RPC errors);
+# scripts/verify_search_rpc.py checks that both orderings agree.
+
+CATEGORY_KEYWORDS = ['mental health', 'food', 'housing', 'legal', 'health', 'transportation', 'childcare', 'education', 'employment']
+TECH_KEYWORDS = ['computer', 'tech', 'it', 'coding', 'digital', 'class', 'learn']
+TECH_CATEGORIES = ['education', 'employment', 'other']
+
+# ts_rank weights {D, C, B, A} = {0.1, 0.2, 0.4, 1.0}: name is A, categories + programs B, description C
+WEIGHT_NAME, WEIGHT_TAGS, WEIGHT_DESCRIPTION = 1.0, 0.4, 0.2
+NAME_WEIGHT = 0.5
+CATEGORY_WEIGHT, SECONDARY_WEIGHT = 0.3, 0.15
+PROXIMITY_WEIGHT, PROXIMITY_KM = 0.4, 10.0
+SERVICE_AREA_WEIGHT = 0.2  # No coordinates, but the place is in contact_info.service_area
+
+STOPWORDS = {
+    'a', 'about', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'but', 'by', 'can', 'do', 'for', 'from', 'have',
+    'he', 'her', 'him', 'how', 'i', 'if', 'in', 'into', 'is', 'it', 'me', 'my', 'near', 'no', 'not', 'of', 'on',
+    'or', 'our', 'she', 'so', 'some', 'that', 'the', 'their', 'them', 'there', 'they', 'this', 'to', 'up', 'us',
+    'was', 'we', 'what', 'where', 'which', 'who', 'will', 'with', 'you', 'your',
+}
+_SUFFIXES = ('ies', 'ing', 'es', 'ed', 'ly', 's')
+
+def lexemes(text):
+    """Rough stand-in for to_tsvector('english'): lowercase words, stopwords dropped, common suffixes stripped."""
+    out = []
+    for word in re.findall(r"[a-z0-9]+", normalize_name(text)):
+        if word in STOPWORDS:
+            continue
+        for suffix in _SUFFIXES:
+            if len(word) > len(suffix) + 2 and word.endswith(suffix):
+                word = word[:-len(suffix)]
+                break
+        out.append(word)
+    return out
+
+def infer_categories(query):
+    """Categories named in the query, plus the education/employment expansion for tech/class requests."""
+    lowered = (query or '').lower()
+    words = set(re.findall(r"[a-z]+", lowered))
+    categories = [c for c in CATEGORY_KEYWORDS if c in lowered]
+    if 'mental health' in categories and 'health' not in lowered.replace('mental health', ''):
+        categories.remove('health')
+    if any(k in words for k in TECH_KEYWORDS):
+        categories += [c for c in TECH_CATEGORIES if c not in categories]
+    return categories
+
+def search_params(query, k=5, categories=None):
+    """RPC arguments for search_resources, with location taken from a place mentioned in the query.
+    categories (e.g. from the intent classifier) are added to the ones named in the query."""
+    place = find_place(query)
+    inferred = infer_categories(query)
+    inferred += [c for c in categories or [] if c not in inferred]
+    return {
+        'p_query': query,
+        'p_lat': place[1] if place else None,
+        'p_lon': place[2] if place else None,
+        'p_categories': inferred or None,
+        'p_k': k,
+        'p_place': place[0] if place else None,
+    }
+
+def _field_lexemes(res):
+    programs = []
+    for prog in res.get('programs') or []:
+        if isinstance(prog, dict):
+            programs.extend(str(v) for v in prog.values() if isinstance(v, str))
+        elif prog:
+            programs.append(str(prog))
+    tags = " ".join([res.get('category') or ''] + list(res.get('secondary_categories') or []) + programs)
+    return set(lexemes(res.get('name'))), set(lexemes(tags)), set(lexemes(res.get('description')))
+
+def _location(res):
+    loc = res.get('location') or {}
+    lat, lon = loc.get('lat'), loc.get('long')
+    if lat is None or lon is None:
+        return None
+    return float(lat), float(lon)
+
+def _service_area(res):
+    area = res.get('service_area')  # Resource records flatten it
+    if area is None:
+        area = (res.get('contact_info') or {}).get('service_area')
+    return (area or '').lower()
+
+def score_resource(res, terms, query_grams, lat=None, lon=None, categories=(), place=None):
+    """(score, distance_km) or None when the row would not be a candidate in SQL either."""
+    name, tags, description = _field_lexemes(res)
+    rank = 0.0
+    for term in terms:
+        if term in name: rank += WEIGHT_NAME
+        elif term in tags: rank += WEIGHT_TAGS
+        elif term in description: rank += WEIGHT_DESCRIPTION
+    name_grams = trigrams(normalize_name(res.get('name')))
+    mention = _containment(name_grams, query_grams)
+
+    category = res.get('category')
+    secondary = set(res.get('secondary_categories') or [])
+    if categories and category in categories: category_score = CATEGORY_WEIGHT
+    elif categories and secondary.intersection(categories): category_score = SECONDARY_WEIGHT
+    else: category_score = 0.0
+
+    if not rank and not category_score and _containment(query_grams, name_grams) < 0.6:
+        return None
+    km = None
+    location = _location(res)
+    if lat is not None and lon is not None and location:
+        km = haversine_km(lat, lon, *location)
+    if km is not None:
+        proximity = PROXIMITY_WEIGHT / (1 + km / PROXIMITY_KM)
+    elif place and place.lower() in _service_area(res):
+        proximity = SERVICE_AREA_WEIGHT
+    else:
+        proximity = 0.0
+    return rank / (rank + 1) + NAME_WEIGHT * mention + category_score + proximity, km
+
+def rank_resources(resources, query, lat=None, lon=None, categories=None, k=5, place=None):
+    """Same ordering contract as search_resources: score desc, then name, then id."""
+    terms = list(dict.fromkeys(lexemes(query)))
+    query_grams = trigrams(normalize_name(query))
+    scored = []
+    for res in resources:
+        hit = score_resource(res, terms, query_grams, lat, lon, categories or (), place)
+        if hit:
+            scored.append((hit[0], hit[1], res))
+    scored.sort(key=lambda x: (-x[0], x[2].get('name') or '', str(x[2].get('id'))))
+    return [(res, score, km) for score, km, res in scored[:k]]
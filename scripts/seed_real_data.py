@@ -4,6 +4,8 @@ import json
 from dotenv import load_dotenv
 from supabase import create_client
 
+from load_catalog import CatalogLoader
+
 # Load Environment
 load_dotenv('.env.local')
 if not os.getenv("NEXT_PUBLIC_SUPABASE_URL"):
@@ -310,68 +312,14 @@ REAL_DATA = [
 
 def update_organizations():
     print(f"🚀 Starting Update for {len(REAL_DATA)} Organizations...")
-    
-    updated_count = 0
-    
-    for org in REAL_DATA:
-        try:
-            # 1. Find the org by name (Simple ILIKE)
-            # We assume unique names for this dataset
-            name_query = org['name']
-            
-            # Use 'ilike' to be forgiving
-            res = supabase.table('resources').select('id').ilike('name', name_query).execute()
-            
-            if not res.data:
-                print(f"⚠️ Could not find: {name_query} - Attempting INSERT...")
-                # Insert Logic
-                new_org = {
-                    "name": org['name'], # Use the correct clean name
-                    "category": org['category'],
-                    # secondary_categories is array text[] in schema? or text? 
-                    # Schema says: suitability_tags text[], 
-                    # wait, schema.sql showed: secondary_categories isn't in top level schema!
-                    # Ah, verifying schema first might be wise. 
-                    # But wait, we just updated 15 records successfully with 'secondary_categories'. 
-                    # So the column exists (likely added in migration).
-                    "secondary_categories": org['secondary_categories'],
-                    "description": org['description'],
-                    "programs": org['programs'],
-                    "contact_info": org['contact_info'],
-                    "suitability_tags": ["General"] # Default
-                }
-                
-                try:
-                    insert_res = supabase.table('resources').insert(new_org).execute()
-                    print(f"   ✅ Inserted: {org['name']}")
-                    updated_count += 1
-                except Exception as insert_err:
-                    print(f"   ❌ Insert Failed: {insert_err}")
-                
-                continue
-                
-            # If multiple found, update all? Or just first? 
-            # Logic: Update all matches to be consistent.
-            ids_to_update = [r['id'] for r in res.data]
-            
-            payload = {
-                "category": org['category'],
-                "secondary_categories": org['secondary_categories'],
-                "description": org['description'],
-                "programs": org['programs'],
-                "contact_info": org['contact_info']
-                # We do NOT overwrite location/owner_id unless we want to reset them
-            }
-            
-            for rid in ids_to_update:
-                supabase.table('resources').update(payload).eq('id', rid).execute()
-                print(f"✅ Updated: {org['name']} (ID: {rid})")
-                updated_count += 1
-                
-        except Exception as e:
-            print(f"❌ Error updating {org['name']}: {e}")
 
-    print(f"\n🎉 Update Complete. Total records modified: {updated_count}")
-    
+    # Matched on name (case-insensitive): existing orgs are upserted by id, new ones inserted.
+    # location/owner_id are not part of the payload, so they are never overwritten.
+    loader = CatalogLoader(supabase, 'resources', match='name')
+    report = loader.load(REAL_DATA)
+
+    print(f"\n🎉 Update Complete. Total records modified: {report['loaded']} "
+          f"({report['requests']} requests, {report['rows_per_second']} rows/s)")
+
 if __name__ == "__main__":
     update_organizations()
@@ -0,0 +1,402 @@
+import asyncio
+import datetime
+import json
+import os
+import socket
+import time
+
+# agent_tasks dispatch: atomic claiming + push wake-ups with a polling fallback.
+#
+# Claiming goes through the claim_next_task RPC (FOR UPDATE SKIP LOCKED, see
+# supabase/migrations/20260201_agent_task_claiming.sql). If the RPC is not
+# deployed yet we fall back to a conditional update guarded by status, so two
+# workers can never both move the same row from 'pending' to 'in-progress'.
+#
+# Wake-ups come from LISTEN agent_tasks (pg_notify from the insert trigger) when
+# SUPABASE_DB_URL is set; otherwise, and as a safety net, we poll.
+#
+# TaskRunner adds leases on top (supabase/migrations/20260202_agent_task_leases.sql):
+# a fixed pool of worker coroutines, heartbeats while a handler runs, a reaper that
+# re-queues expired leases, and dead-lettering after max_attempts.
+
+NOTIFY_CHANNEL = 'agent_tasks'
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def utc_now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+def claim_task(client, task_id, worker_id, lease_seconds=None, attempts=None):
+    """
+    Conditional pending -> in-progress update. Returns the claimed row, or None if someone else won.
+    With lease_seconds (leases migration applied) it also takes a lease and counts the attempt, like
+    claim_next_task, so the reaper can recover and dead-letter the task; `attempts` is the value read
+    when listing, and a row whose count moved since is left alone.
+    """
+    update = {'status': 'in-progress', 'claimed_by': worker_id, 'updated_at': utc_now()}
+    if lease_seconds:
+        lease_until = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=lease_seconds)
+        update.update({'lease_until': lease_until.isoformat(), 'attempts': (attempts or 0) + 1})
+    query = client.table('agent_tasks').update(update).eq('id', task_id).eq('status', 'pending')
+    if lease_seconds:
+        query = query.eq('attempts', attempts or 0)
+    res = query.execute()
+    return res.data[0] if res.data else None
+
+def claim_next_task(client, agent, worker_id, lease_seconds=None):
+    """Claims the oldest pending task for `agent`, or returns None when the queue is empty."""
+    params = {'p_agent': agent, 'p_worker': worker_id}
+    if lease_seconds: params['p_lease_seconds'] = int(lease_seconds)
+    res = client.rpc('claim_next_task', params).execute()
+    rows = res.data or []
+    if isinstance(rows, dict): rows = [rows]
+    return rows[0] if rows and rows[0].get('id') else None
+
+def rpc_missing(error):
+    """True when the RPC is not deployed (PostgREST PGRST202 / Postgres 42883), not for transient errors."""
+    code = str(getattr(error, 'code', '') or '')
+    return code in ('PGRST202', '42883') or 'PGRST202' in str(error) or '42883' in str(error)
+
+def column_missing(error):
+    """True when a column is not there yet (PostgREST PGRST204 / Postgres 42703), e.g. before the leases migration."""
+    code = str(getattr(error, 'code', '') or '')
+    return code in ('PGRST204', '42703') or 'PGRST204' in str(error) or '42703' in str(error)
+
+def finish_task(client, task, status, result):
+    """
+    Writes a handler's terminal status, but only while this worker still owns the task.
+    Returns False when the lease was lost and another worker re-claimed it (the write is dropped).
+    """
+    query = client.table('agent_tasks').update({'status': status, 'result': result, 'updated_at': utc_now()}) \
+        .eq('id', task['id']) \
+        .eq('status', 'in-progress')
+    if task.get('claimed_by'):
+        query = query.eq('claimed_by', task['claimed_by'])
+    res = query.execute()
+    if not res.data:
+        print(f"⚠️ Task {task['id']} is no longer ours; dropping its {status} result")
+    return bool(res.data)
+
+def claim_pending_fallback(client, agent, worker_id, limit=10, lease_seconds=None):
+    """Pre-RPC path: list pending ids, then race for each with a guarded update (leased when lease_seconds is set)."""
+    res = client.table('agent_tasks') \
+        .select('id, attempts' if lease_seconds else 'id') \
+        .eq('assigned_agent', agent) \
+        .eq('status', 'pending') \
+        .order('created_at') \
+        .limit(limit) \
+        .execute()
+    claimed = []
+    for row in res.data or []:
+        task = claim_task(client, row['id'], worker_id, lease_seconds, row.get('attempts'))
+        if task: claimed.append(task)
+    return claimed
+
+class TaskDispatcher:
+    """
+    Claims pending agent_tasks for one agent and hands each claimed row to `handler`.
+    A task is only ever handed out by the worker whose claim succeeded.
+    """
+
+    def __init__(self, client, agent, handler, db_url=None, poll_interval=5.0, worker_id=None):
+        self.client = client
+        self.agent = agent
+        self.handler = handler
+        self.db_url = db_url
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or default_worker_id()
+        self.wake = asyncio.Event()
+        self.use_rpc = True
+        self.use_leases = True  # Off once the lease columns turn out to be missing
+        self._listener = None
+
+    lease_seconds = None
+
+    def _claim_batch(self, limit=None):
+        """Blocking: claims up to `limit` pending tasks (all of them if None). Runs in a thread."""
+        claimed = []
+        if self.use_rpc:
+            try:
+                while limit is None or len(claimed) < limit:
+                    task = claim_next_task(self.client, self.agent, self.worker_id, self.lease_seconds)
+                    if not task: break
+                    claimed.append(task)
+                return claimed
+            except Exception as e:
+                if not rpc_missing(e):
+                    raise  # Transient: drain() logs it and the next poll retries the RPC
+                print(f"⚠️ claim_next_task RPC unavailable ({e}). Using guarded updates.")
+                self.use_rpc = False
+        remaining = 10 if limit is None else limit - len(claimed)
+        if remaining <= 0: return claimed
+        lease_seconds = self.lease_seconds if self.use_leases else None
+        try:
+            return claimed + claim_pending_fallback(self.client, self.agent, self.worker_id, remaining, lease_seconds)
+        except Exception as e:
+            if not (lease_seconds and column_missing(e)):
+                raise
+            print(f"⚠️ agent_tasks has no lease columns ({e}). Claiming without leases.")
+            self.use_leases = False
+            return claimed + claim_pending_fallback(self.client, self.agent, self.worker_id, remaining)
+
+    def capacity(self):
+        return None
+
+    async def drain(self):
+        """Claims pending tasks (up to capacity) and dispatches them. Returns the number claimed."""
+        limit = self.capacity()
+        if limit is not None and limit <= 0: return 0
+        try:
+            tasks = await asyncio.to_thread(self._claim_batch, limit)
+        except Exception as e:
+            print(f"⚠️ Claim Error: {e}")
+            return 0
+        for task in tasks:
+            await self.dispatch(task)
+        return len(tasks)
+
+    async def dispatch(self, task):
+        asyncio.create_task(self.handler(task))
+
+    async def listen(self):
+        """LISTEN on the notify channel and set the wake event on every notification."""
+        try:
+            import psycopg
+        except ImportError:
+            print("⚠️ psycopg not installed. Task dispatch will poll only.")
+            return
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self.db_url, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    print(f"👂 Listening for {NOTIFY_CHANNEL} notifications")
+                    self.wake.set()  # Catch anything inserted while we were connecting
+                    async for notify in conn.notifies():
+                        self.wake.set()
+            except Exception as e:
+                print(f"⚠️ LISTEN connection lost ({e}). Reconnecting in {self.poll_interval}s...")
+                await asyncio.sleep(self.poll_interval)
+
+    async def run(self):
+        print(f"📬 Task dispatcher started for '{self.agent}' as {self.worker_id}")
+        if self.db_url:
+            self._listener = asyncio.create_task(self.listen())
+        while True:
+            self.wake.clear()
+            await self.drain()
+            try:
+                await asyncio.wait_for(self.wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass  # Polling fallback
+
+def release_task(client, task, error, max_attempts):
+    """Hands a task back after a crash: re-queue it, or dead-letter it once attempts are used up."""
+    attempts = task.get('attempts') or 1
+    if attempts >= max_attempts:
+        update = {'status': 'failed', 'result': {'error': error, 'dead_letter': True}}
+    else:
+        update = {'status': 'pending'}
+    update.update({'claimed_by': None, 'lease_until': None, 'updated_at': utc_now()})
+    client.table('agent_tasks').update(update).eq('id', task['id']).eq('status', 'in-progress').execute()
+    return update['status']
+
+class TaskMetrics:
+    """Per task-type counters: throughput, handler latency and queue wait."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.by_type = {}
+
+    def record(self, task_type, latency, wait=None, ok=True):
+        m = self.by_type.setdefault(task_type, {'completed': 0, 'errors': 0, 'latency_total': 0.0, 'latency_max': 0.0, 'wait_total': 0.0, 'wait_count': 0})
+        m['completed' if ok else 'errors'] += 1
+        m['latency_total'] += latency
+        m['latency_max'] = max(m['latency_max'], latency)
+        if wait is not None:
+            m['wait_total'] += wait
+            m['wait_count'] += 1
+
+    def snapshot(self):
+        uptime = max(time.time() - self.started_at, 1e-9)
+        out = {}
+        for task_type, m in self.by_type.items():
+            runs = m['completed'] + m['errors']
+            out[task_type] = {
+                'completed': m['completed'],
+                'errors': m['errors'],
+                'per_minute': round(runs / uptime * 60, 2),
+                'avg_latency_ms': round(m['latency_total'] / runs * 1000, 1) if runs else 0,
+                'max_latency_ms': round(m['latency_max'] * 1000, 1),
+                'avg_wait_ms': round(m['wait_total'] / m['wait_count'] * 1000, 1) if m['wait_count'] else None,
+            }
+        return out
+
+def _queue_wait(task):
+    """Seconds between task creation and now (None if created_at is missing or unparsable)."""
+    try:
+        created = datetime.datetime.fromisoformat(task['created_at'].replace('Z', '+00:00'))
+        return (datetime.datetime.now(datetime.timezone.utc) - created).total_seconds()
+    except Exception:
+        return None
+
+class TaskRunner(TaskDispatcher):
+    """
+    TaskDispatcher with a fixed-size worker pool and leases.
+    Only claims as many tasks as there are idle workers, so a burst of inserts
+    waits in the table (unleased) instead of piling up in memory.
+    """
+
+    def __init__(self, client, agent, handler, concurrency=4, lease_seconds=60, max_attempts=3, task_type=None, **kwargs):
+        super().__init__(client, agent, handler, **kwargs)
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.task_type = task_type or (lambda task: 'default')
+        self.metrics = TaskMetrics()
+        self.queue = asyncio.Queue()
+        self.busy = 0
+        self.heartbeats = True  # Off once extend_task_lease turns out to be missing
+        self._workers = []
+        self._reaper = None
+
+    def capacity(self):
+        return self.concurrency - self.busy - self.queue.qsize()
+
+    async def dispatch(self, task):
+        await self.queue.put(task)
+
+    async def heartbeat(self, task, handler_task):
+        """Extends the lease every lease/3 seconds; cancels the handler if the lease was lost."""
+        interval = max(self.lease_seconds / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                res = await asyncio.to_thread(lambda: self.client.rpc('extend_task_lease', {
+                    'p_task': task['id'], 'p_worker': self.worker_id, 'p_lease_seconds': self.lease_seconds,
+                }).execute())
+                if res.data is False:
+                    print(f"⚠️ Lease lost for task {task['id']}. Abandoning it.")
+                    handler_task.cancel()
+                    return
+            except Exception as e:
+                if rpc_missing(e):
+                    print(f"⚠️ extend_task_lease RPC not deployed ({e}). Heartbeats off.")
+                    self.heartbeats = False
+                    return
+                print(f"⚠️ Heartbeat Error ({task['id']}): {e}")
+
+    async def _run_one(self, task):
+        task_type = self.task_type(task)
+        wait = _queue_wait(task)
+        start = time.perf_counter()
+        handler_task = asyncio.create_task(self.handler(task))
+        beat = asyncio.create_task(self.heartbeat(task, handler_task)) if self.heartbeats else None
+        ok = True
+        try:
+            await handler_task
+        except asyncio.CancelledError:
+            ok = False
+        except Exception as e:
+            ok = False
+            print(f"❌ Task {task['id']} crashed: {e}")
+            try:
+                status = await asyncio.to_thread(release_task, self.client, task, str(e), self.max_attempts)
+                print(f"   -> Task {task['id']} {'re-queued' if status == 'pending' else 'dead-lettered'}")
+            except Exception as release_err:
+                print(f"⚠️ Could not release task {task['id']} (lease will expire): {release_err}")
+        finally:
+            if beat: beat.cancel()
+        self.metrics.record(task_type, time.perf_counter() - start, wait, ok)
+
+    async def _worker(self, n):
+        while True:
+            task = await self.queue.get()
+            self.busy += 1
+            try:
+                await self._run_one(task)
+            finally:
+                self.busy -= 1
+                self.queue.task_done()
+                self.wake.set()  # A slot freed up; claim more
+
+    async def reap(self):
+        """Re-queues expired leases (and dead-letters exhausted ones) every half lease."""
+        while True:
+            await asyncio.sleep(max(self.lease_seconds / 2, 1))
+            try:
+                res = await asyncio.to_thread(lambda: self.client.rpc('requeue_expired_tasks', {
+                    'p_max_attempts': self.max_attempts,
+                }).execute())
+                for row in res.data or []:
+                    label = 're-queued' if row.get('status') == 'pending' else 'dead-lettered'
+                    print(f"♻️ Expired lease: task {row.get('id')} {label} (attempt {row.get('attempts')})")
+            except Exception as e:
+                if rpc_missing(e):
+                    print(f"⚠️ requeue_expired_tasks RPC not deployed ({e}). Reaper off.")
+                    return
+                print(f"⚠️ Reaper Error: {e}")
+
+    async def run(self):
+        self._workers = [asyncio.create_task(self._worker(n)) for n in range(self.concurrency)]
+        self._reaper = asyncio.create_task(self.reap())
+        print(f"👷 Task runner: {self.concurrency} workers, {self.lease_seconds}s leases, max {self.max_attempts} attempts")
+        await super().run()
+
+UPDATES_CHANNEL = 'agent_task_updates'
+TERMINAL_STATUSES = ('completed', 'failed')
+
+def fetch_task(client, task_id):
+    res = client.table('agent_tasks').select('*').eq('id', task_id).execute()
+    return res.data[0] if res.data else None
+
+async def wait_for_task(client, task_id, db_url=None, timeout=600, on_update=None):
+    """
+    Waits for a task to reach a terminal status, calling on_update(row) as it changes.
+    Uses LISTEN agent_task_updates when db_url is given, otherwise polls with backoff.
+    Returns the final row, or None on timeout.
+    """
+    async def wait():
+        if db_url:
+            try:
+                return await _wait_listening(client, task_id, db_url, on_update)
+            except Exception as e:
+                print(f"⚠️ LISTEN unavailable ({e}). Polling instead.")
+        return await _wait_polling(client, task_id, on_update)
+
+    try:
+        return await asyncio.wait_for(wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        return None
+
+async def _wait_listening(client, task_id, db_url, on_update):
+    import psycopg
+    async with await psycopg.AsyncConnection.connect(db_url, autocommit=True) as conn:
+        await conn.execute(f"LISTEN {UPDATES_CHANNEL}")
+        # The task may have moved before we started listening
+        task = await asyncio.to_thread(fetch_task, client, task_id)
+        if task and on_update: on_update(task)
+        if task and task['status'] in TERMINAL_STATUSES: return task
+        async for notify in conn.notifies():
+            if json.loads(notify.payload).get('id') != str(task_id): continue
+            task = await asyncio.to_thread(fetch_task, client, task_id)
+            if task and on_update: on_update(task)
+            if task and task['status'] in TERMINAL_STATUSES: return task
+
+async def _wait_polling(client, task_id, on_update, initial=0.5, maximum=5.0):
+    delay = initial
+    last_seen = None
+    while True:
+        task = await asyncio.to_thread(fetch_task, client, task_id)
+        if task:
+            marker = (task['status'], task.get('updated_at'), _result_size(task.get('result')))
+            if marker != last_seen:
+                last_seen = marker
+                delay = initial  # Something moved; check again soon
+                if on_update: on_update(task)
+            if task['status'] in TERMINAL_STATUSES: return task
+        await asyncio.sleep(delay)
+        delay = min(delay * 1.5, maximum)
+
+def _result_size(value):
+    return len(json.dumps(value, default=str)) if value is not None else 0
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import time
+
+# Runs the tool calls of one assistant message concurrently.
+# - Every call gets its own task; results come back in the order of message.tool_calls, so the
+#   tool messages appended to history line up with their tool_call_ids
+# - TurnLookups shares per-turn work between those tasks: the first call to ask for a key
+#   (the user behind an email, a program's resource, a lead) starts it, later calls await the
+#   same future, so two create_account calls for one email create the user once
+# - A failing call becomes an error result for that tool_call_id; the others still finish
+# - With warm= (the session's Prefetch), lookups started during earlier turns are reused
+# Usage:
+#   results = await run_tool_calls(ai_message.tool_calls, {'create_account': handler})
+#   state.history.extend(results)
+
+class TurnLookups:
+    """
+    Per-turn memo of in-flight lookups.
+
+    Usage:
+        lookups = TurnLookups()
+        user_id = await lookups.once(('user', email), lambda: find_user(email))
+    """
+
+    def __init__(self, warm=None):
+        self.futures = {}
+        self.warm = warm
+        self.stats = {'started': 0, 'shared': 0, 'warm': 0}
+
+    def once(self, key, factory):
+        """Awaitable for key's result; factory() (a coroutine) runs only for the first caller."""
+        future = self.futures.get(key)
+        if future is None:
+            prefetched = self.warm.get(key) if self.warm else None
+            if prefetched is not None:
+                self.stats['warm'] += 1
+            future = self.futures[key] = asyncio.ensure_future(self._warm_or_run(prefetched, factory))
+            self.stats['started'] += 1
+        else:
+            self.stats['shared'] += 1
+        return future
+
+    async def prefetched(self, key, default=None):
+        """A speculative lookup's result if one was started for key, else default (never runs anything)."""
+        future = self.futures.get(key)
+        if future is None:
+            prefetched = self.warm.get(key) if self.warm else None
+            if prefetched is None:
+                return default
+            self.stats['warm'] += 1
+            future = self.futures[key] = asyncio.ensure_future(self._warm_or_run(prefetched, None, default))
+        return await future
+
+    @staticmethod
+    async def _warm_or_run(prefetched, factory, default=None):
+        if prefetched is not None:
+            try:
+                return await asyncio.shield(prefetched)
+            except asyncio.CancelledError:
+                if not prefetched.cancelled():
+                    raise
+            except Exception:
+                pass
+        return await factory() if factory else default
+
+def tool_result(tool_call, content):
+    return {"tool_call_id": tool_call.id, "role": "tool", "name": tool_call.function.name, "content": content}
+
+async def run_tool_calls(tool_calls, handlers, lookups=None):
+    """
+    Runs every call concurrently; handlers map a tool name to async handler(args, lookups) -> str.
+    Returns one tool message per call, in the original order.
+    """
+    lookups = lookups or TurnLookups()
+
+    async def run(tool_call):
+        name = tool_call.function.name
+        handler = handlers.get(name)
+        if not handler:
+            return tool_result(tool_call, json.dumps({"status": "error", "message": f"Unknown tool '{name}'."}))
+        start = time.perf_counter()
+        try:
+            content = await handler(json.loads(tool_call.function.arguments or '{}'), lookups)
+        except Exception as e:
+            print(f"❌ Tool Execution Error ({name}): {e}")
+            content = json.dumps({"status": "error", "message": str(e)})
+        print(f"   -> {name} [{tool_call.id}] done in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return tool_result(tool_call, content)
+
+    return list(await asyncio.gather(*(run(tc) for tc in tool_calls)))
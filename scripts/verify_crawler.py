@@ -0,0 +1,147 @@
+
+import asyncio
+import sys
+
+from aiohttp import web
+
+from crawler import Frontier, crawl_all, canonicalize_url
+from extract_text import extract_text
+from fetcher import Fetcher
+
+# Crawls two fixture org sites served locally and checks the frontier rules:
+# sitemap/robots seeding, robots Disallow, canonical dedup, depth/page limits, path-scoped roots,
+# programs-first prioritization and structured program extraction (plus main-region text extraction).
+# Usage: python3 scripts/verify_crawler.py
+
+PORT = 8766
+MAX_PAGES = 8
+MAX_DEPTH = 3
+
+def page(title, body, links=()):
+    nav = "".join(f'<a href="{href}">{text}</a>' for href, text in links)
+    return (f"<html><head><title>{title}</title><script>var t=1;</script></head><body>"
+            f"<nav>{nav}</nav><main>{body}</main><footer>© Fixture Org</footer></body></html>")
+
+# Site A (127.0.0.1): robots.txt with a Sitemap line and a Disallow rule
+SITE_A = {
+    '/': page("Hope Center", "<h1>Hope Center</h1><p>We serve families in Long Beach.</p>",
+              [('/programs/', 'Our Programs'), ('/about?utm_source=nav', 'About'), ('/blog/1', 'Blog'), ('#top', 'Top')]),
+    '/programs': page("Programs | Hope Center",
+                      "<h2>Our Programs</h2>"
+                      "<h2>Emergency Food Pantry</h2><p>Weekly groceries for families in need, no ID required. Open Tuesdays and Thursdays.</p>"
+                      "<h3>Rental Assistance</h3><p>One-time help with back rent for households facing eviction in Long Beach.</p>"
+                      "<h2>Donate</h2><p>Your gift keeps the pantry shelves full all year long.</p>",
+                      [('/apply', 'How to apply'), ('/programs#food', 'Food'), ('/index.html', 'Home')]),
+    '/apply': page("Apply", "<h2>How to Apply</h2><p>Call our intake line at 562-555-0100 or walk in Monday to Friday with proof of address.</p>"),
+    '/about': page("About", "<h2>About Us</h2><p>Founded in 1990.</p>"),
+    '/private/staff': page("Staff only", "<p>secret</p>"),
+    '/sitemap.xml': None,  # Built in app()
+}
+for n in range(1, 30):
+    SITE_A[f'/blog/{n}'] = page(f"Post {n}", f"<p>News post {n}</p>", [(f'/blog/{n + 1}', 'Next post')])
+
+# Site B (localhost): no sitemap, services two levels deep, a long chain to test the depth limit
+SITE_B = {
+    '/': page("Safe Harbor", "<p>Shelter and counseling.</p>", [('/services', 'Services'), ('/chain/1', 'Chain')]),
+    '/services': page("Services", "<h2>Youth Shelter</h2><p>Emergency beds for youth aged 18 to 24, open around the clock.</p>",
+                      [('/services/counseling', 'Counseling'), ('/services/', 'Services again')]),
+    '/services/counseling': page("Counseling services", "<h2>Family Counseling</h2><p>Free bilingual counseling sessions for families and children.</p>"),
+}
+for n in range(1, 10):
+    SITE_B[f'/chain/{n}'] = page(f"Chain {n}", f"<p>Link {n}</p>", [(f'/chain/{n + 1}', 'Next')])
+
+class Fixture:
+    def __init__(self):
+        self.hits = []  # (host, path) in request order
+
+    def app(self):
+        async def handle(request):
+            host = request.host.split(':')[0]
+            path = request.path
+            self.hits.append((host, path))
+            site = SITE_A if host == '127.0.0.1' else SITE_B
+            if path == '/robots.txt':
+                if site is SITE_A:
+                    return web.Response(text=f"User-agent: *\nDisallow: /private/\nSitemap: http://127.0.0.1:{PORT}/sitemap.xml\n")
+                return web.Response(status=404)
+            if path == '/sitemap.xml' and site is SITE_A:
+                locs = ['/', '/programs', '/about', '/private/staff', '/blog/5', 'https://elsewhere.example/x']
+                urls = "".join(f"<url><loc>{l if l.startswith('http') else f'http://127.0.0.1:{PORT}{l}'}</loc></url>" for l in locs)
+                return web.Response(text=f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>',
+                                    content_type='application/xml')
+            key = path.rstrip('/') or '/'
+            if key in site and site[key]:
+                return web.Response(text=site[key], content_type='text/html')
+            return web.Response(status=404)
+
+        app = web.Application()
+        app.router.add_get('/{tail:.*}', handle)
+        return app
+
+def check(label, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {label} {detail}")
+    return ok
+
+async def main():
+    fixture = Fixture()
+    runner = web.AppRunner(fixture.app())
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', PORT).start()
+    targets = [{'org': 'Hope Center', 'url': f"http://127.0.0.1:{PORT}/"},
+               {'org': 'Safe Harbor', 'url': f"http://localhost:{PORT}"}]
+    results = []
+
+    async with Fetcher(concurrency=4, per_host_interval=0, retries=0, cache_dir=None) as fetcher:
+        a, b = await crawl_all(fetcher, targets, max_pages=MAX_PAGES, max_depth=MAX_DEPTH)
+
+    hits_a = [p for h, p in fixture.hits if h == '127.0.0.1']
+    hits_b = [p for h, p in fixture.hits if h == 'localhost']
+    pages_a = [p for p in hits_a if p not in ('/robots.txt', '/sitemap.xml')]
+
+    results.append(check("Sitemap seeded the frontier", a.sitemap_urls == 4, f"({a.sitemap_urls} same-site, allowed URLs)"))
+    results.append(check("robots.txt Disallow respected", '/private/staff' not in hits_a))
+    results.append(check("Each canonical URL fetched once", len(pages_a) == len(set(p.rstrip('/') or '/' for p in pages_a)),
+                         f"({pages_a})"))
+    results.append(check("Page limit", len(a.pages) == MAX_PAGES, f"({len(a.pages)} pages)"))
+    results.append(check("Programs/apply before blog", pages_a.index('/programs') < pages_a.index('/blog/1')
+                         and pages_a.index('/apply') < pages_a.index('/blog/1')))
+    names_a = [p['name'] for p in a.programs]
+    results.append(check("Program sections extracted", names_a == ['Emergency Food Pantry', 'Rental Assistance'], f"({names_a})"))
+    results.append(check("Program has description + source URL",
+                         a.programs and a.programs[0]['description'].startswith('Weekly groceries')
+                         and a.programs[0]['url'] == canonicalize_url(f"http://127.0.0.1:{PORT}/programs")))
+    results.append(check("Application process extracted", bool(a.application_process) and '562-555-0100' in a.application_process))
+    results.append(check("Homepage text skips nav/footer", a.homepage_text == "Hope Center We serve families in Long Beach.",
+                         f"({a.homepage_text!r})"))
+
+    names_b = sorted(p['name'] for p in b.programs)
+    results.append(check("No-sitemap site crawled via links", names_b == ['Family Counseling', 'Youth Shelter'], f"({names_b})"))
+    deepest = max(int(p.split('/')[-1]) for p in hits_b if p.startswith('/chain/'))
+    results.append(check("Depth limit", deepest == MAX_DEPTH, f"(deepest /chain/{deepest}, max depth {MAX_DEPTH})"))
+
+    # Frontier cap: 1000 discovered links, only the best-scored survive
+    frontier = Frontier(cap=20)
+    for n in range(1000):
+        frontier.push(f"http://x/{n}", 1, score=n % 50)
+    kept = [frontier.pop()[0] for _ in range(len(frontier))]
+    results.append(check("Frontier bounded, keeps best links", frontier.peak <= 40 and kept[0] == "http://x/49",
+                         f"(peak {frontier.peak}, first {kept[0]})"))
+
+    # A root with a path only crawls that section of the host
+    seen = len(fixture.hits)
+    async with Fetcher(concurrency=4, per_host_interval=0, retries=0, cache_dir=None) as fetcher:
+        scoped, = await crawl_all(fetcher, [{'org': 'Safe Harbor Services', 'url': f"http://localhost:{PORT}/services"}],
+                                  max_pages=MAX_PAGES, max_depth=MAX_DEPTH)
+    hits_s = sorted({p for _, p in fixture.hits[seen:] if p not in ('/robots.txt', '/sitemap.xml')})
+    results.append(check("Path-scoped root stays in its section", hits_s == ['/services', '/services/counseling'], f"({hits_s})"))
+
+    # role="main" on a div: nested divs inside it must not end the main region
+    nested = extract_text('<nav>Menu</nav><div role="main"><div><h1>Title</h1></div><p>Real content here.</p></div><footer>Footer</footer>')
+    results.append(check("role=main survives nested same-tag elements", nested == "Title Real content here.", f"({nested!r})"))
+
+    await runner.cleanup()
+    if not all(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
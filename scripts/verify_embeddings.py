@@ -0,0 +1,85 @@
+import copy
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from embeddings import EMBED_DIM, EMBEDDING_COLUMNS, EmbeddingCache, EmbeddingPipeline, HashEmbedder, chunk_text, resource_chunks
+from verify_program_matching import load_seed_catalog
+
+# Offline check of the embedding stage with the deterministic hash embedder:
+# cold run embeds everything, warm run is all cache hits, editing one program
+# re-embeds exactly one chunk, batching bounds the number of embedder calls, and an ingest
+# record and the backfill's row for the same org produce the same chunks.
+# Usage: python3 scripts/verify_embeddings.py
+
+BATCH_SIZE = 16
+SYNTHETIC_COPIES = 50  # Seed catalog x50 for a throughput number
+
+def check(label, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {label} {detail}")
+    return ok
+
+def main():
+    catalog = load_seed_catalog()
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = Path(tmp) / 'cache.sqlite'
+
+        # 1. Cold run
+        cold = EmbeddingPipeline(HashEmbedder(), EmbeddingCache(cache_path), batch_size=BATCH_SIZE)
+        vectors = cold.embed_records(catalog)
+        expected_calls = -(-cold.stats['embedded'] // BATCH_SIZE)
+        results.append(check("One vector per record", len(vectors) == len(catalog) and all(len(v) == EMBED_DIM for v in vectors)))
+        results.append(check("Cold run batched", cold.stats['calls'] == expected_calls,
+                             f"({cold.stats['embedded']} chunks in {cold.stats['calls']} calls)"))
+
+        # 2. Warm run over the unchanged catalog (fresh pipeline, same cache file)
+        warm = EmbeddingPipeline(HashEmbedder(), EmbeddingCache(cache_path), batch_size=BATCH_SIZE)
+        again = warm.embed_records(catalog)
+        results.append(check("Warm run: zero embedder calls", warm.embedder.calls == 0, f"({warm.stats})"))
+        results.append(check("Warm vectors match", all(max(abs(a - b) for a, b in zip(x, y)) < 1e-6 for x, y in zip(vectors, again))))
+
+        # 3. Edit one program: only that chunk is re-embedded
+        edited = copy.deepcopy(catalog)
+        edited[0]['programs'][0]['description'] += " Now also offering evening sessions."
+        partial = EmbeddingPipeline(HashEmbedder(), EmbeddingCache(cache_path), batch_size=BATCH_SIZE)
+        partial.embed_records(edited)
+        results.append(check("Edited program re-embeds one chunk", partial.stats['embedded'] == 1, f"({partial.stats['embedded']})"))
+
+        # 4. A different model never reads another model's vectors
+        other = EmbeddingPipeline(HashEmbedder(dim=384), EmbeddingCache(cache_path), batch_size=BATCH_SIZE)
+        other.embed_records(catalog[:1])
+        results.append(check("Cache keyed by model", other.stats['cache_hits'] == 0))
+
+        # 5. Chunking keeps every piece under the limit
+        long_text = " ".join(f"Sentence number {i} about rental assistance." for i in range(400))
+        chunks = chunk_text(long_text, max_chars=500, overlap=50)
+        results.append(check("Chunks respect max_chars", len(chunks) > 1 and all(len(c) <= 500 for c in chunks), f"({len(chunks)} chunks)"))
+
+        # 6. Ingest record (extra keys, scraped text) and backfill row (EMBEDDING_COLUMNS) embed the same
+        org = dict(catalog[0], secondary_categories=['Housing'])
+        stored = {c: org.get(c) for c in map(str.strip, EMBEDDING_COLUMNS.split(','))}
+        record = dict(org, scrape_url='https://example.org', content_hash='abc', _change='added', text='Scraped page text')
+        results.append(check("Ingest and backfill build the same chunks", resource_chunks(record) == resource_chunks(stored)))
+
+        # 7. Throughput on a synthetic catalog (distinct text per copy)
+        big = []
+        for n in range(SYNTHETIC_COPIES):
+            for org in catalog:
+                row = copy.deepcopy(org)
+                row['name'] = f"{org['name']} #{n}"
+                big.append(row)
+        bulk = EmbeddingPipeline(HashEmbedder(), EmbeddingCache(Path(tmp) / 'bulk.sqlite'), batch_size=96)
+        start = time.perf_counter()
+        bulk.embed_records(big)
+        elapsed = time.perf_counter() - start
+        print(f"📊 {len(big)} records / {bulk.stats['embedded']} chunks in {elapsed:.2f}s "
+              f"({bulk.stats['embedded'] / elapsed:.0f} chunks/s, {bulk.stats['calls']} calls)")
+
+    if not all(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
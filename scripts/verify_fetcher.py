@@ -0,0 +1,122 @@
+
+import asyncio
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+from fetcher import Fetcher
+
+# Checks the ingestion fetcher against a local fixture server:
+# conditional GET caching, retries, global concurrency cap and per-host spacing.
+# Usage: python3 scripts/verify_fetcher.py
+
+PORT = 8765
+CONCURRENCY = 3
+PER_HOST_INTERVAL = 0.2
+
+class Fixture:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.hits = {}
+        self.starts = {}
+
+    async def track(self, request, handler):
+        self.hits[request.path] = self.hits.get(request.path, 0) + 1
+        self.starts.setdefault(request.host.split(':')[0], []).append(time.monotonic())
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.05)
+            return await handler(request)
+        finally:
+            self.in_flight -= 1
+
+    def app(self):
+        async def etag_page(request):
+            if request.headers.get('If-None-Match') == '"v1"':
+                return web.Response(status=304)
+            return web.Response(text="<html><body>Food pantry</body></html>", headers={'ETag': '"v1"'}, content_type='text/html')
+
+        async def lastmod_page(request):
+            stamp = 'Wed, 21 Oct 2025 07:28:00 GMT'
+            if request.headers.get('If-Modified-Since') == stamp:
+                return web.Response(status=304)
+            return web.Response(text="<html><body>Shelter</body></html>", headers={'Last-Modified': stamp}, content_type='text/html')
+
+        async def flaky_page(request):
+            if self.hits[request.path] <= 2:
+                return web.Response(status=503, headers={'Retry-After': '0'})
+            return web.Response(text="<html><body>Recovered</body></html>", content_type='text/html')
+
+        async def gone_page(request):
+            return web.Response(status=404)
+
+        async def numbered_page(request):
+            return web.Response(text=f"page {request.match_info['n']}", content_type='text/html')
+
+        routes = {'/etag': etag_page, '/lastmod': lastmod_page, '/flaky': flaky_page, '/gone': gone_page}
+        app = web.Application()
+        for path, handler in routes.items():
+            app.router.add_get(path, lambda r, h=handler: self.track(r, h))
+        app.router.add_get('/page/{n}', lambda r: self.track(r, numbered_page))
+        return app
+
+def check(label, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {label} {detail}")
+    return ok
+
+async def main():
+    fixture = Fixture()
+    runner = web.AppRunner(fixture.app())
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', PORT).start()
+    base = f"http://127.0.0.1:{PORT}"
+    other_host = f"http://localhost:{PORT}"
+    results = []
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        opts = dict(concurrency=CONCURRENCY, per_host_interval=PER_HOST_INTERVAL, retries=3,
+                    backoff_base=0.05, cache_dir=cache_dir)
+
+        # 1. Cold run populates the cache; warm run revalidates with 304s
+        async with Fetcher(**opts) as fetcher:
+            cold = await fetcher.fetch_all([f"{base}/etag", f"{base}/lastmod"])
+        async with Fetcher(**opts) as fetcher:
+            warm = await fetcher.fetch_all([f"{base}/etag", f"{base}/lastmod"])
+        results.append(check("Cold fetch", all(r.status == 200 for r in cold)))
+        results.append(check("Warm fetch is 304 from cache",
+                             all(r.status == 304 and r.from_cache and r.ok for r in warm),
+                             f"({[r.status for r in warm]})"))
+
+        # 2. Retries: 503 twice, then success; 404 is not retried
+        async with Fetcher(**opts) as fetcher:
+            flaky, gone = await fetcher.fetch_all([f"{base}/flaky", f"{base}/gone"])
+        results.append(check("503 retried until success", flaky.ok and flaky.attempts == 3, f"(attempts={flaky.attempts})"))
+        results.append(check("404 not retried", not gone.ok and gone.attempts == 1, f"(attempts={gone.attempts})"))
+
+        # 3. Global concurrency cap (no host spacing so the cap is what limits us)
+        fixture.max_in_flight = 0
+        async with Fetcher(**dict(opts, per_host_interval=0)) as fetcher:
+            pages = await fetcher.fetch_all([f"{base}/page/{n}" for n in range(12)])
+        results.append(check("All pages fetched", all(p.ok for p in pages)))
+        results.append(check("Global concurrency cap", fixture.max_in_flight == CONCURRENCY,
+                             f"(max in flight {fixture.max_in_flight} / {CONCURRENCY})"))
+
+        # 4. Per-host spacing across two hosts
+        fixture.starts = {}
+        urls = [f"{host}/page/{n}" for n in range(6) for host in (base, other_host)]
+        async with Fetcher(**opts) as fetcher:
+            await fetcher.fetch_all(urls)
+        gaps = [b - a for starts in fixture.starts.values() for a, b in zip(starts, starts[1:])]
+        results.append(check("Per-host spacing", min(gaps) >= PER_HOST_INTERVAL * 0.9,
+                             f"(min gap {min(gaps):.3f}s, limit {PER_HOST_INTERVAL}s)"))
+
+    await runner.cleanup()
+    if not all(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
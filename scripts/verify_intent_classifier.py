@@ -0,0 +1,95 @@
+import json
+import random
+import sys
+import time
+
+from intent_classifier import EXAMPLES_PATH, IntentClassifier
+from search_ranking import infer_categories
+
+# Offline evaluation of the RAG intent classifier against the keyword gate it replaces.
+# 5-fold cross-validation over data/intent_examples.json: each fold is scored by a model that
+# never saw it. Reports precision/recall of "run RAG", category precision/recall on real needs
+# (search_params merges the classifier's categories with infer_categories), and CPU per call.
+# Usage: python3 scripts/verify_intent_classifier.py
+
+FOLDS = 5
+MIN_PRECISION = 0.85
+MIN_RECALL = 0.85
+MAX_CALL_US = 500
+# The gate get_ai_response used before the classifier
+LEGACY_TRIGGERS = ['need', 'find', 'looking', 'help', 'search', 'food', 'housing', 'legal']
+SPOT_CHECKS = [("where can I sleep tonight", True), ("thanks for the help", False)]
+
+def check(label, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {label} {detail}")
+    return ok
+
+def precision_recall(pairs):
+    """pairs of (predicted, actual) booleans."""
+    tp = sum(1 for p, a in pairs if p and a)
+    fp = sum(1 for p, a in pairs if p and not a)
+    fn = sum(1 for p, a in pairs if a and not p)
+    return tp / ((tp + fp) or 1), tp / ((tp + fn) or 1)
+
+def main():
+    examples = json.loads(EXAMPLES_PATH.read_text())
+    shuffled = list(examples)
+    random.Random(46).shuffle(shuffled)
+
+    rag_pairs, legacy_pairs, category_pairs, combined_pairs, keyword_pairs = [], [], [], [], []
+    train_ms, timings = [], []
+    for fold in range(FOLDS):
+        test = shuffled[fold::FOLDS]
+        train = [ex for i, ex in enumerate(shuffled) if i % FOLDS != fold]
+        start = time.perf_counter()
+        classifier = IntentClassifier.train(train)
+        train_ms.append((time.perf_counter() - start) * 1000)
+
+        for ex in test:
+            start = time.perf_counter()
+            intent = classifier.predict(ex['text'])
+            timings.append(time.perf_counter() - start)
+            rag_pairs.append((intent.rag, ex['rag']))
+            legacy_pairs.append((any(w in ex['text'].lower() for w in LEGACY_TRIGGERS), ex['rag']))
+            if ex['rag']:
+                predicted, actual = set(intent.categories), set(ex['categories'])
+                keywords = set(infer_categories(ex['text']))
+                for pairs, got in ((category_pairs, predicted), (keyword_pairs, keywords), (combined_pairs, predicted | keywords)):
+                    pairs += [(True, c in actual) for c in got]
+                    pairs += [(False, True) for c in actual - got]
+            if intent.rag != ex['rag']:
+                print(f"   ⚠️ {ex['text']!r}: predicted rag={intent.rag} ({intent.confidence:.2f})")
+
+    precision, recall = precision_recall(rag_pairs)
+    legacy_precision, legacy_recall = precision_recall(legacy_pairs)
+    cat_precision, cat_recall = precision_recall(category_pairs)
+    kw_precision, kw_recall = precision_recall(keyword_pairs)
+    both_precision, both_recall = precision_recall(combined_pairs)
+    avg_us = sum(timings) / len(timings) * 1e6
+    p99_us = sorted(timings)[int(len(timings) * 0.99)] * 1e6
+
+    print(f"📚 {len(examples)} labelled turns ({sum(ex['rag'] for ex in examples)} rag), {FOLDS}-fold CV, "
+          f"train {sum(train_ms) / FOLDS:.0f} ms/fold")
+    print(f"📊 keyword gate: precision {legacy_precision:.0%}, recall {legacy_recall:.0%}")
+    print(f"📊 classifier:   precision {precision:.0%}, recall {recall:.0%}")
+    print(f"📊 categories on rag turns (precision/recall): keywords {kw_precision:.0%}/{kw_recall:.0%}, "
+          f"classifier {cat_precision:.0%}/{cat_recall:.0%}, both {both_precision:.0%}/{both_recall:.0%}")
+    print(f"📊 CPU per call: avg {avg_us:.0f}µs, p99 {p99_us:.0f}µs")
+
+    full = IntentClassifier.train(examples)
+    results = [
+        check("RAG precision", precision >= MIN_PRECISION and precision > legacy_precision,
+              f"({precision:.0%} vs keyword gate {legacy_precision:.0%})"),
+        check("RAG recall", recall >= MIN_RECALL and recall > legacy_recall,
+              f"({recall:.0%} vs keyword gate {legacy_recall:.0%})"),
+        check("Categories: classifier adds recall over keywords", both_recall > kw_recall,
+              f"({kw_recall:.0%} -> {both_recall:.0%})"),
+        check("CPU per call", avg_us <= MAX_CALL_US, f"({avg_us:.0f}µs)"),
+    ]
+    for text, expected in SPOT_CHECKS:
+        results.append(check(f"{text!r} -> rag={expected}", full.predict(text).rag == expected))
+    if not all(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+
+from intent_classifier import IntentClassifier
+from model_router import CAPABLE, FAST, ModelRouter
+
+# Offline check of per-turn model routing: a scripted conversation must send small talk to the
+# fast tier (without the tool schema) and matching / account turns to the capable tier, and a
+# failing tier must fall back to the other one with latency and tokens recorded per tier.
+# The OpenAI client is replaced by a local fake, so no API key is needed.
+# Usage: python3 scripts/verify_model_routing.py
+
+# (speaker, text, expected tier for user turns)
+CONVERSATION = [
+    ('user', "hi there", FAST),
+    ('assistant', "Hi, I'm Keith. What's going on, and what do you need most right now?", None),
+    ('user', "where can I sleep tonight in compton", CAPABLE),
+    ('assistant', "I think Compton Family Shelter is your best bet. Would you like to start with this one?", None),
+    ('user', "thanks, that sounds good", FAST),
+    ('assistant', "Great. I can send your application over to them. What's your full name and email?", None),
+    ('user', "maria lopez, maria at gmail dot com", CAPABLE),
+    ('assistant', "Thanks Maria. And a phone number?", None),
+    ('user', "310 555 1234", CAPABLE),
+    ('assistant', "You're all set! Anything else?", None),
+    ('user', "no that's all, bye", FAST),
+]
+
+class FakeCompletions:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    async def create(self, model, messages, tools=None, tool_choice=None):
+        self.calls.append((model, tools is not None))
+        await asyncio.sleep(0.001)
+        if model in self.failing:
+            raise RuntimeError(f"{model} unavailable")
+        prompt = sum(len(str(m.get('content', ''))) for m in messages) // 4 + (400 if tools else 0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok", tool_calls=None))],
+                               usage=SimpleNamespace(prompt_tokens=prompt, completion_tokens=20))
+
+def fake_client(failing=()):
+    return SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(failing)))
+
+def check(label, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {label} {detail}")
+    return ok
+
+async def main():
+    classifier = IntentClassifier.from_file()
+    router = ModelRouter(fast_model='fast-model', capable_model='capable-model')
+    client = fake_client()
+    history, results = [{'role': 'system', 'content': 'You are KEITH.'}], []
+    for speaker, text, expected in CONVERSATION:
+        history.append({'role': speaker, 'content': text})
+        if speaker != 'user':
+            continue
+        route = router.route(history, text, classifier.predict(text))
+        _, route = await router.complete(client, history, route, tools=[{'type': 'function'}])
+        results.append(check(f"{text!r} -> {route.tier}", route.tier == expected,
+                             f"({route.reason}, tools={route.tools})" + ("" if route.tier == expected else f", expected {expected}")))
+
+    results.append(check("Fast turns skip the tool schema",
+                         all(not tools for model, tools in client.chat.completions.calls if model == 'fast-model')))
+    results.append(check("Tool follow-ups are capable", router.route(history, None).tier == CAPABLE))
+    pinned = ModelRouter(mode=FAST)
+    results.append(check("KEITH_MODEL_ROUTING pins the tier", pinned.route(history, "hi").tier == FAST))
+
+    failing = fake_client(failing={'fast-model'})
+    route = router.route(history[:2], "hello", classifier.predict("hello"))
+    _, used = await router.complete(failing, history[:2], route, tools=[])
+    results.append(check("Failed fast call falls back to capable", route.tier == FAST and used.tier == CAPABLE))
+    try:
+        await router.complete(fake_client(failing={'fast-model', 'capable-model'}), history, route, tools=[])
+        results.append(check("Both tiers failing raises", False))
+    except RuntimeError:
+        results.append(check("Both tiers failing raises", True))
+
+    for tier, m in router.metrics.snapshot().items():
+        print(f"📊 {tier}: {m}")
+    snapshot = router.metrics.snapshot()
+    results.append(check("Metrics record tokens, errors and fallbacks per tier",
+                         snapshot[FAST]['errors'] >= 1 and snapshot[CAPABLE]['fallbacks'] == 1
+                         and snapshot[FAST]['prompt_tokens'] > 0))
+    if not all(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
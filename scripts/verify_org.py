@@ -2,6 +2,7 @@
 import os
 from supabase import create_client
 from dotenv import load_dotenv
+from resource_record import VERIFY_COLUMNS
 
 load_dotenv('.env.local')
 
@@ -16,7 +17,7 @@ supabase = create_client(url, key)
 
 # Search for Forever Forward
 print("Searching for 'Forever Forward'...")
-response = supabase.table('resources').select('*').ilike('name', '%Forever Forward%').execute()
+response = supabase.table('resources').select(VERIFY_COLUMNS).ilike('name', '%Forever Forward%').execute()
 
 if response.data:
     for org in response.data:
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import sys
+import time
+from types import SimpleNamespace
+
+from tool_calls import TurnLookups, run_tool_calls
+
+# Offline check of concurrent tool execution with a fake model that answers one turn with three
+# create_account calls (same caller, two programs, one repeated). The handler follows the
+# worker's create_account steps (user, resource, duplicate check + insert) against an in-memory
+# backend with fixed latencies, so no Supabase or OpenAI access is needed.
+# Checks: calls overlap, the shared user is created once, the repeated program gets one lead,
+# results keep tool_call_id order, and a failing call doesn't take the others down.
+# Usage: python3 scripts/verify_parallel_tools.py
+
+USER_LATENCY, RESOURCE_LATENCY, LEAD_LATENCY = 0.3, 0.1, 0.15
+
+def check(label, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {label} {detail}")
+    return ok
+
+def tool_call(call_id, **args):
+    return SimpleNamespace(id=call_id, type='function',
+                           function=SimpleNamespace(name='create_account', arguments=json.dumps(args)))
+
+class FakeModel:
+    """First completion: three create_account calls; second: a reply naming the tool results it was given."""
+
+    def __init__(self, tool_calls):
+        self.tool_calls = tool_calls
+        self.seen = []
+
+    async def create(self, messages):
+        tool_messages = [m for m in messages if isinstance(m, dict) and m.get('role') == 'tool']
+        if not tool_messages:
+            return SimpleNamespace(content=None, tool_calls=self.tool_calls)
+        self.seen = [m['tool_call_id'] for m in tool_messages]
+        return SimpleNamespace(content=f"Done: {len(tool_messages)} applications", tool_calls=None)
+
+class FakeBackend:
+    def __init__(self, fail_program=None):
+        self.fail_program = fail_program
+        self.users, self.leads = {}, set()
+        self.calls = {'create_user': 0, 'resolve': 0, 'lead': 0}
+
+    async def create_user(self, email):
+        self.calls['create_user'] += 1
+        await asyncio.sleep(USER_LATENCY)
+        return self.users.setdefault(email, f"user-{len(self.users) + 1}"), "123456"
+
+    async def resolve(self, program):
+        self.calls['resolve'] += 1
+        await asyncio.sleep(RESOURCE_LATENCY)
+        if program == self.fail_program:
+            raise RuntimeError(f"resource lookup for {program!r} timed out")
+        return f"res-{program.lower().replace(' ', '-')}", program
+
+    async def submit_lead(self, user_id, rid):
+        self.calls['lead'] += 1
+        await asyncio.sleep(LEAD_LATENCY)
+        if (user_id, rid) in self.leads:
+            return False
+        self.leads.add((user_id, rid))
+        return True
+
+def make_handler(backend):
+    async def create_account(args, lookups):
+        email = args['email'].lower()
+        program = args['program_name']
+        user_id, _ = await lookups.once(('user', email), lambda: backend.create_user(email))
+        rid, rname = await lookups.once(('resource', program.lower()), lambda: backend.resolve(program))
+        inserted = await lookups.once(('lead', user_id, rid), lambda: backend.submit_lead(user_id, rid))
+        status = 'success' if inserted else 'exists'
+        return json.dumps({"status": status, "message": f"Application {'submitted' if inserted else 'exists'} for {rname}."})
+    return create_account
+
+async def run_sequential(tool_calls, handler):
+    """The previous behaviour: one call after another, nothing shared."""
+    results = []
+    for tc in tool_calls:
+        results.append({"tool_call_id": tc.id, "content": await handler(json.loads(tc.function.arguments), TurnLookups())})
+    return results
+
+async def main():
+    calls = [
+        tool_call('call_a', name="Maria Lopez", email="maria@example.com", phone="3105551234", program_name="Shields for Families"),
+        tool_call('call_b', name="Maria Lopez", email="maria@example.com", phone="3105551234", program_name="Food Bank"),
+        tool_call('call_c', name="Maria Lopez", email="Maria@example.com", phone="3105551234", program_name="shields for families"),
+    ]
+    model = FakeModel(calls)
+    history = [{'role': 'user', 'content': "sign me up for both"}]
+    results = []
+
+    sequential_backend = FakeBackend()
+    start = time.perf_counter()
+    await run_sequential(calls, make_handler(sequential_backend))
+    sequential_s = time.perf_counter() - start
+
+    backend = FakeBackend()
+    message = await model.create(history)
+    history.append(message)
+    lookups = TurnLookups()
+    start = time.perf_counter()
+    tool_messages = await run_tool_calls(message.tool_calls, {'create_account': make_handler(backend)}, lookups)
+    parallel_s = time.perf_counter() - start
+    history.extend(tool_messages)
+    reply = await model.create(history)
+
+    statuses = [json.loads(m['content'])['status'] for m in tool_messages]
+    print(f"📊 3 tool calls: sequential {sequential_s * 1000:.0f} ms -> concurrent {parallel_s * 1000:.0f} ms")
+    print(f"📊 backend calls sequential {sequential_backend.calls} -> concurrent {backend.calls}, lookups {lookups.stats}")
+    print(f"💬 {reply.content}: {statuses}")
+    results += [
+        check("Results keep tool_call_id order", [m['tool_call_id'] for m in tool_messages] == ['call_a', 'call_b', 'call_c']
+              and model.seen == ['call_a', 'call_b', 'call_c']),
+        check("Calls run concurrently", parallel_s < sequential_s * 0.6, f"({parallel_s / sequential_s:.0%} of sequential)"),
+        check("Shared email resolved once", backend.calls['create_user'] == 1, f"({backend.calls['create_user']})"),
+        check("Repeated program submits one lead", len(backend.leads) == 2 and backend.calls['lead'] == 2),
+        check("Every call gets a result", statuses == ['success', 'success', 'success']),
+    ]
+
+    # A failing call reports its own error; the others complete
+    failing = FakeBackend(fail_program="Food Bank")
+    tool_messages = await run_tool_calls(calls, {'create_account': make_handler(failing)})
+    statuses = [json.loads(m['content'])['status'] for m in tool_messages]
+    results.append(check("One failing call doesn't fail the turn", statuses == ['success', 'error', 'success'], f"({statuses})"))
+
+    unknown = [SimpleNamespace(id='call_x', function=SimpleNamespace(name='delete_everything', arguments='{}'))]
+    tool_messages = await run_tool_calls(unknown, {})
+    results.append(check("Unknown tool gets an error result", json.loads(tool_messages[0]['content'])['status'] == 'error'))
+    if not all(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
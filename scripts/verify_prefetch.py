@@ -0,0 +1,164 @@
+import asyncio
+import sys
+import time
+
+from prefetch import Prefetch, find_email
+from tool_calls import TurnLookups
+
+# Offline check of speculative create_account lookups. A scripted session says an email and picks
+# an org a few turns before the tool call; the handler follows the worker's create_account steps
+# (prefetched user, create, duplicate check, insert) against an in-memory backend with latencies
+# modelled on the Supabase admin/REST calls. Reports tool-execution latency cold vs warm.
+# Usage: python3 scripts/verify_prefetch.py
+
+LIST_USERS, CREATE_USER, LEAD_SELECT, LEAD_WRITE = 0.35, 0.3, 0.12, 0.15
+TURN_GAP = 0.5   # Time the caller takes between turns (prefetches run meanwhile)
+RESOURCE_ID = 'res-shields'
+
+def check(label, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {label} {detail}")
+    return ok
+
+class FakeBackend:
+    def __init__(self, existing_users=(), leads=()):
+        self.users = {email: f"user-{i}" for i, email in enumerate(existing_users)}
+        self.leads = set(leads)
+        self.calls = {'list_users': 0, 'create_user': 0, 'lead_select': 0, 'lead_write': 0}
+        self.fail_lookups = False
+
+    async def find_user(self, email):
+        self.calls['list_users'] += 1
+        await asyncio.sleep(LIST_USERS)
+        if self.fail_lookups:
+            raise RuntimeError("admin API unavailable")
+        return self.users.get(email)
+
+    async def create_magic_user(self, email):
+        """Like the worker's: try to create, fall back to looking the user up when it exists."""
+        self.calls['create_user'] += 1
+        await asyncio.sleep(CREATE_USER)
+        if email in self.users:
+            return await self.find_user(email), "Use Existing Password"
+        self.users[email] = f"user-{len(self.users)}"
+        return self.users[email], "123456"
+
+    async def lead_exists(self, user_id, rid):
+        self.calls['lead_select'] += 1
+        await asyncio.sleep(LEAD_SELECT)
+        return (user_id, rid) in self.leads
+
+    async def submit_lead(self, user_id, rid, exists):
+        if exists is None:
+            exists = await self.lead_exists(user_id, rid)
+        if exists:
+            return False
+        self.calls['lead_write'] += 1
+        await asyncio.sleep(LEAD_WRITE)
+        inserted = (user_id, rid) not in self.leads
+        self.leads.add((user_id, rid))
+        return inserted
+
+def observe(prefetch, backend, user_text=None, picked=None):
+    """Mirrors keith_worker.prefetch_account_lookups."""
+    email = find_email(user_text)
+    if prefetch.note_email(email):
+        prefetch.start(('user_id', email), lambda: backend.find_user(email))
+    if picked:
+        prefetch.note_org(picked)
+    if prefetch.email:
+        email = prefetch.email
+
+        async def lead_check(rid):
+            user_id = await prefetch.start(('user_id', email), lambda: backend.find_user(email))
+            return bool(user_id) and await backend.lead_exists(user_id, rid)
+        for rid in prefetch.orgs:
+            prefetch.start(('lead_exists', email, rid), lambda rid=rid: lead_check(rid))
+
+async def create_account(backend, email, lookups):
+    """Mirrors keith_worker.execute_create_account (resource resolution is in-memory there)."""
+    existing = await lookups.prefetched(('user_id', email))
+    if existing:
+        user_id, _ = existing, "Use Existing Password"
+    else:
+        user_id, _ = await lookups.once(('user', email), lambda: backend.create_magic_user(email))
+    exists = await lookups.prefetched(('lead_exists', email, RESOURCE_ID))
+    inserted = await lookups.once(('lead', user_id, RESOURCE_ID), lambda: backend.submit_lead(user_id, RESOURCE_ID, exists))
+    return 'success' if inserted else 'exists'
+
+async def session(backend, warm, turns):
+    prefetch = Prefetch()
+    for text, picked in turns:
+        if warm:
+            observe(prefetch, backend, text, picked)
+        await asyncio.sleep(TURN_GAP)
+    lookups = TurnLookups(warm=prefetch if warm else None)
+    start = time.perf_counter()
+    status = await create_account(backend, "maria@gmail.com", lookups)
+    return time.perf_counter() - start, status, lookups, prefetch
+
+async def session_with(prefetch, backend):
+    lookups = TurnLookups(warm=prefetch)
+    start = time.perf_counter()
+    status = await create_account(backend, "maria@gmail.com", lookups)
+    return time.perf_counter() - start, status, lookups, prefetch
+
+TURNS = [
+    ("I need a place to stay in compton", None),
+    ("the first one sounds good", RESOURCE_ID),           # org picked from RAG results
+    ("my email is maria at gmail dot com", None),
+    ("and my phone is 310 555 1234", None),
+]
+
+async def main():
+    results = []
+    report = []
+    for label, users, leads, expected in [
+        ("returning user", ["maria@gmail.com"], [], 'success'),
+        ("returning user, already applied", ["maria@gmail.com"], [("user-0", RESOURCE_ID)], 'exists'),
+        ("new user", [], [], 'success'),
+    ]:
+        cold, cold_status, _, _ = await session(FakeBackend(users, leads), False, TURNS)
+        warm, warm_status, lookups, _ = await session(FakeBackend(users, leads), True, TURNS)
+        report.append((label, cold, warm))
+        print(f"📊 {label}: tool {cold * 1000:.0f} ms cold -> {warm * 1000:.0f} ms warm "
+              f"({lookups.stats['warm']} warm lookups)")
+        results.append(check(f"{label}: same outcome warm and cold", cold_status == warm_status == expected,
+                             f"({cold_status} / {warm_status})"))
+    cold_total = sum(c for _, c, _ in report)
+    warm_total = sum(w for _, _, w in report)
+    results.append(check("Tool execution faster with prefetch", warm_total < cold_total * 0.6,
+                         f"({cold_total * 1000:.0f} -> {warm_total * 1000:.0f} ms over {len(report)} sessions, "
+                         f"-{1 - warm_total / cold_total:.0%})"))
+
+    # Caller corrects the email: lookups for the old one are cancelled, the tool uses the new one
+    backend = FakeBackend(["maria@gmail.com"])
+    prefetch = Prefetch()
+    observe(prefetch, backend, "it's mario at gmail dot com", RESOURCE_ID)
+    await asyncio.sleep(0.01)
+    observe(prefetch, backend, "sorry, maria at gmail dot com")
+    old = prefetch.tasks.get(('user_id', "mario@gmail.com"))
+    await asyncio.sleep(TURN_GAP)
+    _, status, lookups, _ = await session_with(prefetch, backend)
+    results.append(check("Email correction cancels the old lookups", old is None and prefetch.stats['cancelled'] >= 1,
+                         f"({prefetch.stats})"))
+    results.append(check("Corrected email is served warm", lookups.stats['warm'] >= 1 and status == 'success'))
+
+    # A failed speculative lookup is ignored, the tool path runs it itself
+    backend = FakeBackend(["maria@gmail.com"])
+    backend.fail_lookups = True
+    prefetch = Prefetch()
+    observe(prefetch, backend, "maria at gmail dot com", RESOURCE_ID)
+    await asyncio.sleep(TURN_GAP)
+    backend.fail_lookups = False
+    _, status, _, _ = await session_with(prefetch, backend)
+    results.append(check("Failed prefetch falls back to the normal path", status == 'success'))
+
+    # Stale entries are not used
+    prefetch = Prefetch(max_age=0)
+    observe(prefetch, FakeBackend(), "maria at gmail dot com")
+    results.append(check("Stale prefetch is ignored", prefetch.get(('user_id', "maria@gmail.com")) is None))
+    if not all(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
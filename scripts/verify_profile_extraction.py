@@ -0,0 +1,72 @@
+import asyncio
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from profile_extractor import FakeModel, ProfileCache, ProfileExtractor, validate_profile
+from verify_program_matching import load_seed_catalog
+
+# Offline check of the profile extraction stage with the fake model:
+# batching, bounded concurrency, schema validation + retry of corrupt output,
+# and a warm run that is served entirely from the cache.
+# Usage: python3 scripts/verify_profile_extraction.py
+
+CONCURRENCY = 2
+MAX_PER_REQUEST = 4
+
+def check(label, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {label} {detail}")
+    return ok
+
+def org_text(org):
+    programs = " ".join(f"{p['name']}: {p['description']}" for p in org.get('programs', []))
+    area = org.get('contact_info', {}).get('service_area', '')
+    return f"{org['description']} Serving {area}. {programs}"
+
+async def main():
+    catalog = load_seed_catalog()
+    items = [{'id': org['id'], 'name': org['name'], 'text': org_text(org)} for org in catalog]
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = Path(tmp) / 'profiles.sqlite'
+
+        # 1. Cold run; every 5th org comes back with an invalid category and must be retried alone
+        model = FakeModel(corrupt_every=5, latency=0.05)
+        cold = ProfileExtractor(model, ProfileCache(cache_path), concurrency=CONCURRENCY, max_per_request=MAX_PER_REQUEST)
+        profiles = await cold.extract(items)
+        report = cold.report()
+        print(f"📊 Cold: {json.dumps(report)}")
+        results.append(check("Every org extracted", len(profiles) == len(items), f"({len(profiles)}/{len(items)})"))
+        results.append(check("All profiles pass validation", all(validate_profile(p)[0] == p for p in profiles.values())))
+        results.append(check("Corrupt output retried", report['invalid'] > 0 and report['retried'] == report['invalid']
+                             and report['failed'] == 0, f"({report['invalid']} invalid)"))
+        results.append(check("Batched requests", report['requests'] - report['retried'] == -(-len(items) // MAX_PER_REQUEST),
+                             f"({report['requests']} requests incl. {report['retried']} retries)"))
+        results.append(check("Concurrency bounded", model.max_in_flight <= CONCURRENCY, f"(max {model.max_in_flight})"))
+
+        shields = profiles[catalog[0]['id']]
+        results.append(check("Programs parsed into structure", len(shields['programs']) == len(catalog[0]['programs']),
+                             f"({[p['name'] for p in shields['programs']]})"))
+        results.append(check("Service area captured", shields['service_area'] and 'Compton' in shields['service_area'],
+                             f"({shields['service_area']})"))
+
+        # 2. Warm run: unchanged texts never reach the model
+        warm_model = FakeModel()
+        warm = ProfileExtractor(warm_model, ProfileCache(cache_path))
+        again = await warm.extract(items)
+        results.append(check("Warm run served from cache", warm.stats['requests'] == 0 and again == profiles,
+                             f"({warm.stats['cache_hits']} hits)"))
+
+        # 3. Validator rejects schema violations
+        bad = [{'category': 'General Aid', 'secondary_categories': [], 'programs': [], 'service_area': None},
+               {'category': 'food', 'secondary_categories': 'youth', 'programs': [], 'service_area': None},
+               {'category': 'food', 'secondary_categories': [], 'programs': [{'description': 'x'}], 'service_area': None}]
+        results.append(check("Validator rejects bad profiles", all(validate_profile(b)[0] is None for b in bad)))
+
+    if not all(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
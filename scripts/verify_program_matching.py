@@ -0,0 +1,56 @@
+import ast
+import json
+import sys
+import time
+from pathlib import Path
+
+from resource_matcher import CatalogIndex, resolve_program
+
+# Offline accuracy check for create_account program resolution.
+# Uses the 17 orgs from seed_real_data.py plus data/program_match_extra_orgs.json as the catalog
+# (parsed, not imported, so no Supabase client is created) and data/program_match_cases.json as
+# the test set. expected: null means the name is ambiguous or unknown and must not resolve;
+# any case resolved to a different org than expected would file a lead against the wrong org.
+
+SCRIPTS_DIR = Path(__file__).parent
+MIN_ACCURACY = 0.9
+
+def load_seed_catalog():
+    tree = ast.parse((SCRIPTS_DIR / 'seed_real_data.py').read_text())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, 'id', None) == 'REAL_DATA' for t in node.targets):
+            rows = ast.literal_eval(node.value)
+            rows += json.loads((SCRIPTS_DIR / 'data' / 'program_match_extra_orgs.json').read_text())
+            return [dict(org, id=f"res-{i}") for i, org in enumerate(rows)]
+    raise RuntimeError("REAL_DATA not found in seed_real_data.py")
+
+def main():
+    catalog = load_seed_catalog()
+    by_name = {r['name']: r for r in catalog}
+    index = CatalogIndex()
+    index.load(catalog)
+
+    cases = json.loads((SCRIPTS_DIR / 'data' / 'program_match_cases.json').read_text())
+    correct = misfiled = 0
+    timings = []
+    for case in cases:
+        session = {by_name[n]['id']: by_name[n] for n in case['session']}
+        start = time.perf_counter()
+        hit = resolve_program(case['program'], session, index)
+        timings.append(time.perf_counter() - start)
+
+        got = hit[1] if hit else None
+        if got == case['expected']:
+            correct += 1
+        else:
+            misfiled += got is not None
+            print(f"❌ '{case['program']}' -> {got} (expected {case['expected']})")
+
+    accuracy = correct / len(cases)
+    avg_us = sum(timings) / len(timings) * 1e6
+    print(f"📊 Accuracy: {correct}/{len(cases)} ({accuracy:.0%}) | wrong org: {misfiled} | avg resolve: {avg_us:.0f}µs")
+    if accuracy < MIN_ACCURACY or misfiled:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+from generate_catalog import CatalogGenerator
+from query_normalizer import QueryNormalizer
+from resource_matcher import CatalogIndex
+from search_ranking import lexemes
+from verify_program_matching import load_seed_catalog
+
+# Offline check of query normalization on recorded speech-to-text queries (data/recorded_queries.json).
+# The catalog is the 17 seed orgs plus a synthetic catalog; the spelling dictionary is built the way
+# the worker builds it (CatalogIndex.vocabulary). A document "matches" a query the way wfts on
+# search_doc would: every query lexeme appears in the document (AND semantics).
+# "Fallback fires" = no document matches, so rag_search_fallback drops to ilike '%...%' scans.
+# Usage: python3 scripts/verify_query_normalization.py
+
+SCRIPTS_DIR = Path(__file__).parent
+SYNTHETIC_ROWS = 3000
+MIN_TERM_ACCURACY = 0.9
+
+def check(label, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {label} {detail}")
+    return ok
+
+def document_lexemes(res):
+    programs = " ".join(f"{p.get('name', '')} {p.get('description', '')}" for p in res.get('programs') or [] if isinstance(p, dict))
+    text = " ".join([res.get('name') or '', res.get('category') or '', " ".join(res.get('secondary_categories') or []),
+                     res.get('description') or '', programs])
+    return frozenset(lexemes(text))
+
+def wfts_matches(query_lexemes, documents):
+    if not query_lexemes:
+        return False
+    return any(query_lexemes <= doc for doc in documents)
+
+def main():
+    catalog = load_seed_catalog() + [dict(r) for r in CatalogGenerator(seed=45).resources(SYNTHETIC_ROWS)]
+    index = CatalogIndex()
+    index.load(catalog)
+    start = time.perf_counter()
+    normalizer = QueryNormalizer(index.vocabulary)
+    build_ms = (time.perf_counter() - start) * 1000
+    documents = [document_lexemes(r) for r in catalog]
+    cases = json.loads((SCRIPTS_DIR / 'data' / 'recorded_queries.json').read_text())
+
+    fallback_before = fallback_after = no_term_before = no_term_after = 0
+    correct_terms = total_terms = 0
+    timings = []
+    for case in cases:
+        raw = set(lexemes(case['heard']))
+        t0 = time.perf_counter()
+        normalized = normalizer.normalize(case['heard'])
+        timings.append(time.perf_counter() - t0)
+        fixed = set(lexemes(normalized.text))
+
+        fallback_before += not wfts_matches(frozenset(raw), documents)
+        fallback_after += not wfts_matches(frozenset(fixed), documents)
+        vocabulary = set().union(*documents)
+        no_term_before += not (raw & vocabulary)
+        no_term_after += not (fixed & vocabulary)
+
+        expected = set(lexemes(" ".join(case['expect'])))
+        correct_terms += len(expected & fixed)
+        total_terms += len(expected)
+        if not expected <= fixed:
+            print(f"   ⚠️ {case['heard']!r} -> {normalized.text!r} (missing {sorted(expected - fixed)})")
+
+    n = len(cases)
+    print(f"📚 {len(catalog)} resources, {len(normalizer.spell.counts)} dictionary words (built in {build_ms:.0f} ms)")
+    print(f"📊 ilike fallback fires: {fallback_before}/{n} raw -> {fallback_after}/{n} normalized")
+    print(f"📊 no query term in catalog: {no_term_before}/{n} raw -> {no_term_after}/{n} normalized")
+    print(f"📊 normalize: avg {sum(timings) / n * 1e6:.0f}µs, max {max(timings) * 1e6:.0f}µs")
+
+    results = [
+        check("Fallback fires less often after normalization", fallback_after < fallback_before,
+              f"({fallback_before / n:.0%} -> {fallback_after / n:.0%})"),
+        check("Expected terms recovered", correct_terms / total_terms >= MIN_TERM_ACCURACY,
+              f"({correct_terms}/{total_terms} = {correct_terms / total_terms:.0%})"),
+    ]
+    if not all(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
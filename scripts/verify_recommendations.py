@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+import uuid
+
+import psycopg
+from dotenv import load_dotenv
+from psycopg.types.json import Jsonb
+
+from generate_catalog import RESOURCE_COLUMNS, RESOURCE_JSONB, CatalogGenerator, copy_rows
+from local_db import bootstrap
+from recommendations import recommendation_key
+
+# Incremental maintenance of resource_recommendations against a local Postgres:
+# after each write the trigger-maintained table must equal a full rebuild, and writes that
+# don't touch ranking inputs must not rewrite any key.
+# Usage: DATABASE_URL=postgresql://postgres@localhost/keith_scale python3 scripts/verify_recommendations.py
+
+load_dotenv('.env.local')
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    print("❌ Set DATABASE_URL to a scratch Postgres database")
+    sys.exit(1)
+
+CATALOG_ROWS = 5000
+COMPTON = {'lat': 33.8958, 'long': -118.2201}
+SAMPLE_TURNS = [
+    "I need food in Compton", "looking for housing in Long Beach", "legal aid in Carson please",
+    "mental health services near Pasadena", "food pantry for veterans in Compton", "I need help",
+    "any shelters around Inglewood", "I need food and a place to stay in Watts", "childcare in Lakewood",
+    "where can I get free food near Long Beach",
+]
+
+def check(label, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {label} {detail}")
+    return ok
+
+def snapshot(conn):
+    return conn.execute(
+        "select category, area, rank, resource_id from public.resource_recommendations order by 1, 2, 3").fetchall()
+
+def matches_rebuild(conn):
+    """Compares the incrementally maintained table with a from-scratch rebuild (which then stays)."""
+    before = snapshot(conn)
+    conn.execute("select public.refresh_resource_recommendations()")
+    return before == snapshot(conn)
+
+def top(conn, category, area):
+    row = conn.execute("select resource_id from public.resource_recommendations where category = %s and area = %s and rank = 1",
+                       (category, area)).fetchone()
+    return row[0] if row else None
+
+def main():
+    bootstrap(DATABASE_URL)
+    results = []
+    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+        have = conn.execute("select count(*) from public.resources").fetchone()[0]
+        if have < CATALOG_ROWS:
+            copy_rows(conn, 'public.resources', RESOURCE_COLUMNS, CatalogGenerator(seed=44).resources(CATALOG_ROWS - have), RESOURCE_JSONB)
+        start = time.perf_counter()
+        keys = conn.execute("select public.refresh_resource_recommendations()").fetchone()[0]
+        print(f"📚 {max(have, CATALOG_ROWS)} resources -> {keys} keys rebuilt in {time.perf_counter() - start:.2f}s")
+
+        test_id = uuid.uuid4()
+        try:
+            # 1. A food bank on Compton's doorstep takes (food, compton) #1
+            start = time.perf_counter()
+            conn.execute(
+                "insert into public.resources (id, name, category, secondary_categories, description, contact_info, location) "
+                "values (%s, 'Aaa Verify Food Bank', 'food', '{families}', 'Groceries for families.', %s, %s)",
+                (test_id, Jsonb({'service_area': 'Compton'}), Jsonb(COMPTON)))
+            insert_ms = (time.perf_counter() - start) * 1000
+            results.append(check("Insert: new nearest food bank ranks first in (food, compton)", top(conn, 'food', 'compton') == test_id,
+                                 f"({insert_ms:.1f} ms incl. trigger)"))
+            results.append(check("Insert: incremental == full rebuild", matches_rebuild(conn)))
+
+            # 2. Writes that don't change ranking inputs leave every key alone
+            before = conn.execute("select xmin::text from public.resource_recommendations order by category, area, rank").fetchall()
+            conn.execute("update public.resources set content_hash = 'verify' where id = %s", (test_id,))
+            after = conn.execute("select xmin::text from public.resource_recommendations order by category, area, rank").fetchall()
+            results.append(check("Non-ranking update rewrites no keys", before == after))
+
+            # 3. Recategorised: leaves food keys, enters housing keys
+            conn.execute("update public.resources set category = 'housing' where id = %s", (test_id,))
+            results.append(check("Update: moved from (food, compton) to (housing, compton)",
+                                 top(conn, 'food', 'compton') != test_id and top(conn, 'housing', 'compton') == test_id))
+            results.append(check("Update: incremental == full rebuild", matches_rebuild(conn)))
+
+            # 4. Deleted: keys refill from the next best
+            conn.execute("delete from public.resources where id = %s", (test_id,))
+            full = conn.execute("select count(*) from public.resource_recommendations where category = 'housing' and area = 'compton'").fetchone()[0]
+            results.append(check("Delete: (housing, compton) refilled to 10", full == 10, f"({full})"))
+            results.append(check("Delete: incremental == full rebuild", matches_rebuild(conn)))
+        finally:
+            conn.execute("delete from public.resources where id = %s", (test_id,))
+
+    hits = [t for t in SAMPLE_TURNS if recommendation_key(t)]
+    print(f"📊 {len(hits)}/{len(SAMPLE_TURNS)} sample turns answered by key lookup")
+    if not all(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import random
+import sys
+import time
+
+from response_cache import ResponseCache
+
+# Offline check of the small-talk response cache: simulated callers open with paraphrased FAQs,
+# a cache hit must return the reply to an equivalent question, and personal data, RAG results
+# and tool calls must keep a conversation out of the cache. TTL and LRU eviction are exercised.
+# Model replies are stand-ins with a fixed latency; no API key needed.
+# Usage: python3 scripts/verify_response_cache.py
+
+CALLERS = 300
+MODEL_LATENCY = 0.9  # Seconds per round trip credited to a hit
+MIN_HIT_RATE = 0.6
+SYSTEM = {'role': 'system', 'content': 'You are KEITH.'}
+
+# Paraphrases callers use for the same question; a hit must come from the same group
+GROUPS = {
+    'greeting': ["hi", "hello", "hey", "hi there", "hello?", "um hi", "hey there", "hi keith", "hello keith"],
+    'identity': ["who are you", "who are you?", "um who are you", "who is this", "who am i talking to",
+                 "what are you", "are you a real person", "are you a robot", "are you a bot"],
+    'purpose': ["what do you do", "what do you guys do", "so what do you do", "what can you do",
+                "what can you help with", "what is this", "what is this service", "how does this work"],
+    'cost': ["is this free", "is this free?", "is it free", "is this service free", "does this cost anything",
+             "how much does this cost", "do i have to pay"],
+    'language': ["do you speak spanish", "habla espanol", "can we talk in spanish", "hablas espanol"],
+}
+FOLLOW_UPS = ["yes", "ok", "sure", "no", "thanks"]
+
+def check(label, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {label} {detail}")
+    return ok
+
+def reply_for(group, question):
+    return f"[{group}] answer to {question!r}"
+
+def main():
+    rng = random.Random(48)
+    cache = ResponseCache()
+    wrong, timings = [], []
+    calls = 0
+    for _ in range(CALLERS):
+        history = [SYSTEM]
+        for _turn in range(2):
+            group = rng.choice(list(GROUPS)) if len(history) == 1 else 'follow-up'
+            text = rng.choice(GROUPS.get(group, FOLLOW_UPS))
+            start = time.perf_counter()
+            key = cache.key(history, text)
+            hit = cache.get(key)
+            timings.append(time.perf_counter() - start)
+            history.append({'role': 'user', 'content': text})
+            if hit:
+                content = hit.content
+                # Follow-ups are only reused under the same preceding reply
+                if group != 'follow-up' and not content.startswith(f"[{group}]"):
+                    wrong.append((text, content))
+            else:
+                calls += 1
+                content = reply_for(group, text) if group != 'follow-up' else f"[follow-up to {history[-2]['content'][:30]!r}] {text}"
+                cache.put(key, content, MODEL_LATENCY)
+            history.append({'role': 'assistant', 'content': content})
+
+    stats = cache.snapshot()
+    turns = CALLERS * 2
+    print(f"📊 {turns} turns from {CALLERS} callers: {calls} model calls, {stats['hits']} cache hits "
+          f"({stats['similar_hits']} by similarity), {stats['entries']} entries")
+    print(f"📊 hit rate {stats['hit_rate']:.0%}, saved {stats['saved_ms'] / 1000:.0f}s of model latency, "
+          f"lookup avg {sum(timings) / len(timings) * 1e6:.0f}µs")
+    for text, content in wrong[:5]:
+        print(f"   ⚠️ {text!r} served {content!r}")
+
+    results = [
+        check("Hit rate on repeated small talk", stats['hit_rate'] >= MIN_HIT_RATE, f"({stats['hit_rate']:.0%})"),
+        check("Hits answer an equivalent question", not wrong, f"({len(wrong)} wrong)"),
+    ]
+
+    # Personal data, RAG results and tool calls keep the turn out of the cache
+    opening = [SYSTEM]
+    personal = [SYSTEM, {'role': 'user', 'content': "my name is maria"}, {'role': 'assistant', 'content': "Hi Maria!"}]
+    matching = [SYSTEM, {'role': 'user', 'content': "food in compton"},
+                {'role': 'system', 'content': "SYSTEM_RAG_RESULT: Found the following resources:\n..."},
+                {'role': 'assistant', 'content': "Try the Compton food bank."}]
+    handoff = [SYSTEM, {'role': 'assistant', 'content': None, 'tool_calls': [{'id': 'call_1'}]},
+               {'role': 'tool', 'content': '{"status": "success"}'}]
+    results += [
+        check("Turn with an email is not cacheable", cache.key(opening, "its maria at gmail dot com") is None),
+        check("Turn with a phone number is not cacheable", cache.key(opening, "call me 310 555 1234") is None),
+        check("Turn with a name is not cacheable", cache.key(opening, "hi my name is maria") is None),
+        check("Conversation with personal data is not cacheable", cache.key(personal, "who are you") is None),
+        check("Matching phase is not cacheable", cache.key(matching, "is this free") is None),
+        check("Tool phase is not cacheable", cache.key(handoff, "thanks") is None),
+    ]
+
+    # No false hits between different questions
+    fresh = ResponseCache()
+    fresh.put(fresh.key(opening, "is this free"), "free", MODEL_LATENCY)
+    results.append(check("Different question misses", fresh.get(fresh.key(opening, "is this safe")) is None))
+    results.append(check("Paraphrase hits", fresh.get(fresh.key(opening, "um is this free?")) is not None))
+
+    # TTL and LRU
+    expiring = ResponseCache(ttl_seconds=0)
+    expiring.put(expiring.key(opening, "who are you"), "Keith", MODEL_LATENCY)
+    results.append(check("Expired entries are not served", expiring.get(expiring.key(opening, "who are you")) is None))
+    small = ResponseCache(max_entries=2)
+    for text in ("who are you", "is this free", "what do you do"):
+        small.put(small.key(opening, text), text, MODEL_LATENCY)
+    results.append(check("LRU evicts the oldest entry", small.get(small.key(opening, "who are you")) is None
+                         and small.get(small.key(opening, "what do you do")) is not None
+                         and small.snapshot()['evictions'] == 1))
+    if not all(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
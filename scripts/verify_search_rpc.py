@@ -0,0 +1,130 @@
+import os
+import statistics
+import sys
+import time
+
+import psycopg
+from dotenv import load_dotenv
+from psycopg.rows import dict_row
+
+from generate_catalog import RESOURCE_COLUMNS, RESOURCE_JSONB, CatalogGenerator, copy_rows
+from local_db import bootstrap
+from search_ranking import rank_resources, search_params
+
+# Parity + latency check for public.search_resources against a local Postgres.
+# Parity: the RPC's top-k vs search_ranking.rank_resources (the worker's fallback) over the whole catalog.
+# Latency: one RPC round trip vs the REST fallback's 2-5 queries + Python ranking.
+# Usage: DATABASE_URL=postgresql://postgres@localhost/keith_scale python3 scripts/verify_search_rpc.py [rows]
+
+load_dotenv('.env.local')
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    print("❌ Set DATABASE_URL to a scratch Postgres database")
+    sys.exit(1)
+
+CATALOG_ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+K = 5
+REPEATS = 20
+MIN_OVERLAP = 0.6   # Mean share of the RPC's top-k that the Python ranking also returns
+MIN_TOP1 = 0.7      # Share of queries where both put the same resource first
+RANK_COLUMNS = 'id, name, category, secondary_categories, description, programs, contact_info, location'
+
+QUERIES = [
+    "I need food for my family in Compton",
+    "looking for a food pantry near long beach",
+    "help with rent, I might get evicted in Inglewood",
+    "emergency shelter tonight in downtown LA",
+    "free legal aid for an eviction notice",
+    "mental health counseling for my teenage son in Pasadena",
+    "job training and resume help in Carson",
+    "computer coding class for adults",
+    "childcare for a single mom in Lakewood",
+    "rides to medical appointments for seniors in Torrance",
+    "community clinic without insurance in Santa Ana",
+    "hope food bank",
+    "workforce center el monte",
+    "I just got out and need a job",
+    "veterans housing assistance in Long Beach",
+]
+
+def check(label, ok, detail=""):
+    print(f"{'✅' if ok else '❌'} {label} {detail}")
+    return ok
+
+def ensure_catalog(conn):
+    have = conn.execute("select count(*) from public.resources").fetchone()['count']
+    if have < CATALOG_ROWS:
+        gen = CatalogGenerator(seed=43)
+        copy_rows(conn, 'public.resources', RESOURCE_COLUMNS, gen.resources(CATALOG_ROWS - have), RESOURCE_JSONB)
+        conn.execute("analyze public.resources")
+    return conn.execute("select count(*) from public.resources").fetchone()['count']
+
+def rpc(conn, params):
+    return conn.execute(
+        "select id, name, score from public.search_resources(%(p_query)s, %(p_lat)s, %(p_lon)s, "
+        "%(p_categories)s, %(p_k)s, %(p_place)s)", params).fetchall()
+
+def rest_fallback(conn, query, params):
+    """What rag_search_fallback sends: one query per REST call, then ranking in Python."""
+    rows = conn.execute(
+        f"select {RANK_COLUMNS} from public.resources where search_doc @@ websearch_to_tsquery('english', %s) limit 20",
+        (query,)).fetchall()
+    if len(rows) < 2:
+        rows += conn.execute(f"select {RANK_COLUMNS} from public.resources where name ilike %s limit 3", (f"%{query}%",)).fetchall()
+    for cat in params['p_categories'] or []:
+        rows += conn.execute(
+            f"select {RANK_COLUMNS} from public.resources where category ilike %s or secondary_categories @> array[%s] limit 10",
+            (cat, cat)).fetchall()
+    unique = {r['id']: r for r in rows}
+    return rank_resources(unique.values(), query, params['p_lat'], params['p_lon'], params['p_categories'], K, params['p_place'])
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+def main():
+    bootstrap(DATABASE_URL)
+    results = []
+    with psycopg.connect(DATABASE_URL, autocommit=True, row_factory=dict_row) as conn:
+        total = ensure_catalog(conn)
+        catalog = conn.execute(f"select {RANK_COLUMNS} from public.resources").fetchall()
+        print(f"📚 {total} resources")
+
+        # 1. Parity
+        overlaps, top1 = [], 0
+        for query in QUERIES:
+            params = search_params(query, K)
+            sql_ids = [r['id'] for r in rpc(conn, params)]
+            py = rank_resources(catalog, query, params['p_lat'], params['p_lon'], params['p_categories'], K, params['p_place'])
+            py_ids = [res['id'] for res, _, _ in py]
+            overlap = len(set(sql_ids) & set(py_ids)) / max(len(sql_ids), 1)
+            overlaps.append(overlap)
+            top1 += bool(sql_ids and py_ids and sql_ids[0] == py_ids[0])
+            print(f"   {overlap:>4.0%} {'=' if sql_ids[:1] == py_ids[:1] else '≠'} {query!r}")
+        mean_overlap = statistics.mean(overlaps)
+        results.append(check("Top-k overlap with Python ranking", mean_overlap >= MIN_OVERLAP, f"({mean_overlap:.0%} mean @ k={K})"))
+        results.append(check("Same top result", top1 / len(QUERIES) >= MIN_TOP1, f"({top1}/{len(QUERIES)})"))
+        results.append(check("Every query returns results", all(rpc(conn, search_params(q, K)) for q in QUERIES)))
+
+        # 2. Latency (each statement is one round trip, as each REST call would be)
+        timings = {'rpc': [], 'rest fallback': []}
+        for _ in range(REPEATS):
+            for query in QUERIES:
+                params = search_params(query, K)
+                start = time.perf_counter()
+                rpc(conn, params)
+                timings['rpc'].append(time.perf_counter() - start)
+                start = time.perf_counter()
+                rest_fallback(conn, query, params)
+                timings['rest fallback'].append(time.perf_counter() - start)
+        for label, values in timings.items():
+            print(f"📊 {label:<14} p50 {percentile(values, 50) * 1000:>7.2f} ms   p95 {percentile(values, 95) * 1000:>7.2f} ms")
+        speedup = percentile(timings['rest fallback'], 50) / percentile(timings['rpc'], 50)
+        results.append(check("RPC faster than REST fallback (p50)", speedup > 1, f"({speedup:.1f}x)"))
+
+    if not all(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+import asyncio
+import datetime
+import os
+import sys
+import time
+import uuid
+import threading
+from collections import Counter
+from pathlib import Path
+
+import psycopg
+from psycopg.rows import dict_row
+from psycopg.types.json import Jsonb
+from dotenv import load_dotenv
+
+from task_queue import TaskRunner, claim_next_task, claim_pending_fallback, finish_task
+
+# Multi-worker exactly-once check for agent_tasks claiming (plus lease expiry and
+# dead-lettering), against a local Postgres. The shipped task_queue code is driven through
+# PgClient, a minimal stand-in for the Supabase client that runs the same filters as SQL.
+# Usage: DATABASE_URL=postgresql://postgres@localhost/keith_test python3 scripts/verify_task_claiming.py
+
+load_dotenv('.env.local')
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    print("❌ Set DATABASE_URL to a scratch Postgres database")
+    sys.exit(1)
+
+ROOT = Path(__file__).resolve().parent.parent
+WORKERS = 8
+TASKS = 200
+RUNNERS = 4
+RUNNER_TIMEOUT = 60
+MIGRATIONS = ['20260201_agent_task_claiming.sql', '20260202_agent_task_leases.sql']
+
+AGENT_TASKS_DDL = """
+create table if not exists public.agent_tasks (
+  id uuid primary key default gen_random_uuid(),
+  title text not null,
+  status text not null default 'pending',
+  assigned_agent text not null,
+  payload jsonb default '{}'::jsonb,
+  result jsonb default '{}'::jsonb,
+  created_at timestamptz default now(),
+  updated_at timestamptz default now()
+);
+"""
+
+class Result:
+    def __init__(self, data):
+        self.data = data
+
+def _json_value(value):
+    """Values as PostgREST returns them: uuids and timestamps are strings."""
+    if isinstance(value, uuid.UUID): return str(value)
+    if isinstance(value, datetime.datetime): return value.isoformat()
+    return value
+
+class PgQuery:
+    """table(...).select/update(...).eq(...).order(...).limit(...).execute(), as used by task_queue."""
+
+    def __init__(self, conn, table):
+        self.conn = conn
+        self.table = table
+        self.columns = '*'
+        self.values = None
+        self.filters = []
+        self.order_by = None
+        self.max_rows = None
+
+    def select(self, columns='*'):
+        self.columns = columns
+        return self
+
+    def update(self, values):
+        self.values = values
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def order(self, column):
+        self.order_by = column
+        return self
+
+    def limit(self, n):
+        self.max_rows = n
+        return self
+
+    def execute(self):
+        where = ' and '.join(f"{column} = %s" for column, _ in self.filters) or 'true'
+        params = [value for _, value in self.filters]
+        if self.values is not None:
+            assignments = ', '.join(f"{column} = %s" for column in self.values)
+            values = [Jsonb(v) if isinstance(v, (dict, list)) else v for v in self.values.values()]
+            sql = f"update public.{self.table} set {assignments} where {where} returning *"
+            params = values + params
+        else:
+            sql = f"select {self.columns} from public.{self.table} where {where}"
+            if self.order_by: sql += f" order by {self.order_by}"
+            if self.max_rows: sql += f" limit {int(self.max_rows)}"
+        with self.conn.cursor(row_factory=dict_row) as cur:
+            rows = cur.execute(sql, params).fetchall()
+        return Result([{k: _json_value(v) for k, v in row.items()} for row in rows])
+
+class PgRpc:
+    def __init__(self, conn, name, params):
+        self.conn = conn
+        self.name = name
+        self.params = params or {}
+
+    def execute(self):
+        args = ', '.join(f"{name} => %s" for name in self.params)
+        with self.conn.cursor(row_factory=dict_row) as cur:
+            rows = cur.execute(f"select * from public.{self.name}({args})", list(self.params.values())).fetchall()
+        # Scalar functions (extend_task_lease) come back as the bare value, like PostgREST
+        if len(rows) == 1 and list(rows[0]) == [self.name]:
+            return Result(rows[0][self.name])
+        return Result([{k: _json_value(v) for k, v in row.items()} for row in rows])
+
+class PgClient:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def table(self, name):
+        return PgQuery(self.conn, name)
+
+    def rpc(self, name, params=None):
+        return PgRpc(self.conn, name, params)
+
+def connect():
+    return PgClient(psycopg.connect(DATABASE_URL, autocommit=True))
+
+def setup(agent, tasks=TASKS):
+    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+        conn.execute(AGENT_TASKS_DDL)
+        for migration in MIGRATIONS:
+            conn.execute((ROOT / 'supabase/migrations' / migration).read_text())
+        with conn.cursor() as cur:
+            cur.executemany(
+                "insert into public.agent_tasks (title, assigned_agent, status) values (%s, %s, 'pending')",
+                [(f"claim test {i}", agent) for i in range(tasks)],
+            )
+
+def cleanup(agent):
+    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+        conn.execute("delete from public.agent_tasks where assigned_agent = %s", (agent,))
+
+def task_rows(agent):
+    with psycopg.connect(DATABASE_URL, row_factory=dict_row) as conn:
+        return conn.execute(
+            "select id, status, claimed_by, attempts, lease_until, result from public.agent_tasks where assigned_agent = %s", (agent,)
+        ).fetchall()
+
+def run_workers(target):
+    claims = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(WORKERS)
+
+    def worker(n):
+        client = connect()
+        try:
+            barrier.wait()
+            for task in target(client, f"worker-{n}"):
+                with lock:
+                    claims.append(task['id'])
+        finally:
+            client.conn.close()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(WORKERS)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return claims
+
+def check(label, claims, agent, final='in-progress'):
+    counts = Counter(claims)
+    dupes = [tid for tid, c in counts.items() if c > 1]
+    left = sum(row['status'] != final for row in task_rows(agent))
+    ok = len(counts) == TASKS and not dupes and left == 0
+    print(f"{'✅' if ok else '❌'} {label}: {len(claims)} claims, {len(counts)} unique, {len(dupes)} duplicated, {left} not {final}")
+    return ok
+
+def check_leased(label, agent):
+    """Every claim took a lease and counted one attempt, so the reaper can recover it."""
+    rows = task_rows(agent)
+    unleased = sum(row['lease_until'] is None or row['attempts'] != 1 for row in rows)
+    ok = unleased == 0
+    print(f"{'✅' if ok else '❌'} {label} leases: {len(rows) - unleased}/{len(rows)} leased with attempts 1")
+    return ok
+
+def rpc_claims(agent):
+    def target(client, worker_id):
+        while True:
+            task = claim_next_task(client, agent, worker_id, lease_seconds=60)
+            if not task: return
+            yield task
+    return target
+
+def guarded_update_claims(agent):
+    def target(client, worker_id):
+        while True:
+            claimed = claim_pending_fallback(client, agent, worker_id, lease_seconds=60)
+            yield from claimed
+            # Losing every race in a listing is not the end of the queue
+            if not claimed and not client.table('agent_tasks').select('id').eq('assigned_agent', agent).eq('status', 'pending').limit(1).execute().data:
+                return
+    return target
+
+async def run_runners(agent, make_handler, done, runners=RUNNERS, **kwargs):
+    """Runs `runners` TaskRunners (one connection each) until done() is true or RUNNER_TIMEOUT passes."""
+    clients = [connect() for _ in range(runners)]
+    pool = [
+        TaskRunner(client, agent, make_handler(client), worker_id=f"runner-{n}", poll_interval=0.2, **kwargs)
+        for n, client in enumerate(clients)
+    ]
+    loops = [asyncio.create_task(runner.run()) for runner in pool]
+    deadline = time.time() + RUNNER_TIMEOUT
+    try:
+        while time.time() < deadline and not await asyncio.to_thread(done):
+            await asyncio.sleep(0.1)
+    finally:
+        tasks = loops + [t for runner in pool for t in runner._workers + [runner._reaper] if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.wait(tasks, timeout=5)
+        for client in clients:
+            client.conn.close()
+
+def all_terminal(agent):
+    return lambda: all(row['status'] in ('completed', 'failed') for row in task_rows(agent))
+
+async def check_runner_pool(agent):
+    """RUNNERS TaskRunners drain the queue; every task is handled once and completed through finish_task."""
+    handled = []
+
+    def make_handler(client):
+        async def handler(task):
+            handled.append(task['id'])
+            await asyncio.sleep(0.01)
+            await asyncio.to_thread(finish_task, client, task, 'completed', {'ok': True})
+        return handler
+
+    await run_runners(agent, make_handler, all_terminal(agent), concurrency=4)
+    return check(f"TaskRunner pool ({RUNNERS} runners x 4 workers)", handled, agent, final='completed')
+
+async def check_dead_letter(max_attempts=3):
+    """A handler that keeps crashing is re-queued by the runner, then dead-lettered after max_attempts."""
+    agent = f"CrashTest-{uuid.uuid4().hex[:8]}"
+    runs = []
+
+    def make_handler(client):
+        async def handler(task):
+            runs.append(task['id'])
+            raise RuntimeError("handler crash")
+        return handler
+
+    try:
+        setup(agent, tasks=1)
+        await run_runners(agent, make_handler, all_terminal(agent), runners=2, concurrency=1, max_attempts=max_attempts)
+        row = task_rows(agent)[0]
+    finally:
+        cleanup(agent)
+    ok = len(runs) == max_attempts and row['status'] == 'failed' and (row['result'] or {}).get('dead_letter') is True
+    print(f"{'✅' if ok else '❌'} Dead-lettering: {len(runs)} runs, status {row['status']}, attempts {row['attempts']}")
+    return ok
+
+async def check_lease_expiry():
+    """A task claimed by a worker that never heartbeats is re-queued by a runner's reaper and finished by it."""
+    agent = f"LeaseTest-{uuid.uuid4().hex[:8]}"
+
+    def make_handler(client):
+        async def handler(task):
+            await asyncio.to_thread(finish_task, client, task, 'completed', {'ok': True})
+        return handler
+
+    try:
+        setup(agent, tasks=1)
+        crashed = connect()
+        try:
+            claim_next_task(crashed, agent, 'crashed-worker', lease_seconds=1)
+        finally:
+            crashed.conn.close()
+        await run_runners(agent, make_handler, all_terminal(agent), runners=1, concurrency=1, lease_seconds=2)
+        row = task_rows(agent)[0]
+    finally:
+        cleanup(agent)
+    ok = row['status'] == 'completed' and row['claimed_by'] == 'runner-0' and row['attempts'] == 2
+    print(f"{'✅' if ok else '❌'} Lease expiry: status {row['status']}, claimed by {row['claimed_by']}, attempts {row['attempts']}")
+    return ok
+
+def main():
+    print(f"🧪 {WORKERS} workers racing for {TASKS} tasks")
+    results = []
+    for label, strategy in [("claim_next_task RPC", rpc_claims), ("Guarded update fallback", guarded_update_claims)]:
+        agent = f"ClaimTest-{uuid.uuid4().hex[:8]}"
+        try:
+            setup(agent)
+            results.append(check(label, run_workers(strategy(agent)), agent))
+            results.append(check_leased(label, agent))
+        finally:
+            cleanup(agent)
+
+    agent = f"RunnerTest-{uuid.uuid4().hex[:8]}"
+    try:
+        setup(agent)
+        results.append(asyncio.run(check_runner_pool(agent)))
+    finally:
+        cleanup(agent)
+    results.append(asyncio.run(check_dead_letter()))
+    results.append(asyncio.run(check_lease_expiry()))
+    if not all(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+-- Migration: Atomic agent_tasks claiming + push notifications
+-- Lets several Keith workers share the queue without processing a task twice.
+
+-- 1. Track which worker owns an in-progress task
+ALTER TABLE public.agent_tasks ADD COLUMN IF NOT EXISTS claimed_by text;
+
+-- 2. Claim the oldest pending task for an agent.
+-- FOR UPDATE SKIP LOCKED means concurrent callers never block on, or receive, the same row.
+CREATE OR REPLACE FUNCTION public.claim_next_task(p_agent text, p_worker text)
+RETURNS SETOF public.agent_tasks
+LANGUAGE sql
+AS $$
+  UPDATE public.agent_tasks t
+  SET status = 'in-progress',
+      claimed_by = p_worker,
+      updated_at = now()
+  WHERE t.id = (
+    SELECT id FROM public.agent_tasks
+    WHERE assigned_agent = p_agent
+      AND status = 'pending'
+    ORDER BY created_at
+    FOR UPDATE SKIP LOCKED
+    LIMIT 1
+  )
+  RETURNING t.*;
+$$;
+
+-- 3. Wake listening workers whenever a task becomes pending
+CREATE OR REPLACE FUNCTION public.notify_agent_task()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF NEW.status = 'pending' THEN
+    PERFORM pg_notify('agent_tasks', json_build_object('id', NEW.id, 'agent', NEW.assigned_agent)::text);
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS agent_tasks_notify ON public.agent_tasks;
+CREATE TRIGGER agent_tasks_notify
+  AFTER INSERT OR UPDATE OF status ON public.agent_tasks
+  FOR EACH ROW EXECUTE FUNCTION public.notify_agent_task();
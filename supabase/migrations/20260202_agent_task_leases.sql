@@ -0,0 +1,74 @@
+-- Migration: Leased agent_tasks execution
+-- A claimed task is owned only until lease_until. Workers heartbeat to extend it;
+-- expired leases are re-queued, and tasks that keep failing are dead-lettered.
+
+-- 1. Lease + retry bookkeeping
+ALTER TABLE public.agent_tasks
+ADD COLUMN IF NOT EXISTS lease_until timestamptz,
+ADD COLUMN IF NOT EXISTS attempts integer NOT NULL DEFAULT 0;
+
+-- 2. Claiming now takes a lease and counts the attempt
+DROP FUNCTION IF EXISTS public.claim_next_task(text, text);
+
+CREATE OR REPLACE FUNCTION public.claim_next_task(p_agent text, p_worker text, p_lease_seconds integer DEFAULT 60)
+RETURNS SETOF public.agent_tasks
+LANGUAGE sql
+AS $$
+  UPDATE public.agent_tasks t
+  SET status = 'in-progress',
+      claimed_by = p_worker,
+      lease_until = now() + make_interval(secs => p_lease_seconds),
+      attempts = t.attempts + 1,
+      updated_at = now()
+  WHERE t.id = (
+    SELECT id FROM public.agent_tasks
+    WHERE assigned_agent = p_agent
+      AND status = 'pending'
+    ORDER BY created_at
+    FOR UPDATE SKIP LOCKED
+    LIMIT 1
+  )
+  RETURNING t.*;
+$$;
+
+-- 3. Heartbeat: only the current owner can extend its lease
+CREATE OR REPLACE FUNCTION public.extend_task_lease(p_task uuid, p_worker text, p_lease_seconds integer DEFAULT 60)
+RETURNS boolean
+LANGUAGE sql
+AS $$
+  WITH extended AS (
+    UPDATE public.agent_tasks
+    SET lease_until = now() + make_interval(secs => p_lease_seconds),
+        updated_at = now()
+    WHERE id = p_task
+      AND claimed_by = p_worker
+      AND status = 'in-progress'
+    RETURNING id
+  )
+  SELECT EXISTS (SELECT 1 FROM extended);
+$$;
+
+-- 4. Reaper: re-queue expired leases, dead-letter after p_max_attempts.
+-- Dead-lettered tasks are 'failed' with result.dead_letter = true so existing clients still see a terminal state.
+CREATE OR REPLACE FUNCTION public.requeue_expired_tasks(p_max_attempts integer DEFAULT 3)
+RETURNS TABLE (id uuid, status text, attempts integer)
+LANGUAGE sql
+AS $$
+  WITH expired AS (
+    SELECT t.id FROM public.agent_tasks t
+    WHERE t.status = 'in-progress'
+      AND t.lease_until < now()
+    FOR UPDATE SKIP LOCKED
+  )
+  UPDATE public.agent_tasks t
+  SET status = CASE WHEN t.attempts >= p_max_attempts THEN 'failed' ELSE 'pending' END,
+      result = CASE WHEN t.attempts >= p_max_attempts
+                    THEN jsonb_build_object('error', 'Lease expired after ' || t.attempts || ' attempts', 'dead_letter', true)
+                    ELSE t.result END,
+      claimed_by = NULL,
+      lease_until = NULL,
+      updated_at = now()
+  FROM expired
+  WHERE t.id = expired.id
+  RETURNING t.id, t.status, t.attempts;
+$$;
@@ -0,0 +1,70 @@
+-- Migration: Catalog statistics without scanning resources
+-- Per-category counts are maintained by trigger, so diagnostics read O(categories) rows.
+
+-- 1. Counts table (one row per category)
+CREATE TABLE IF NOT EXISTS public.resource_category_counts (
+  category text primary key,
+  count bigint not null default 0
+);
+
+-- Backfill from the current catalog
+INSERT INTO public.resource_category_counts (category, count)
+SELECT category, count(*) FROM public.resources GROUP BY category
+ON CONFLICT (category) DO UPDATE SET count = EXCLUDED.count;
+
+-- 2. Keep counts in sync on insert / delete / category change.
+-- SECURITY DEFINER: the counts table only has a read policy, and portal edits to resources
+-- fire this trigger as the org owner.
+CREATE OR REPLACE FUNCTION public.track_resource_category_counts()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE public.resource_category_counts SET count = count - 1 WHERE category = OLD.category;
+    DELETE FROM public.resource_category_counts WHERE category = OLD.category AND count <= 0;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO public.resource_category_counts (category, count) VALUES (NEW.category, 1)
+    ON CONFLICT (category) DO UPDATE SET count = public.resource_category_counts.count + 1;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS resources_category_counts ON public.resources;
+CREATE TRIGGER resources_category_counts
+  AFTER INSERT OR DELETE OR UPDATE OF category ON public.resources
+  FOR EACH ROW EXECUTE FUNCTION public.track_resource_category_counts();
+
+-- 3. Recent additions come from an index, not a sort over the table
+CREATE INDEX IF NOT EXISTS resources_created_at_idx ON public.resources (created_at DESC);
+
+-- 4. Everything the systems test needs in one call
+CREATE OR REPLACE FUNCTION public.catalog_stats(p_recent integer DEFAULT 15)
+RETURNS jsonb
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT jsonb_build_object(
+    'total', (SELECT coalesce(sum(count), 0) FROM public.resource_category_counts),
+    'categories', (
+      SELECT coalesce(jsonb_agg(jsonb_build_object('category', category, 'count', count) ORDER BY category), '[]'::jsonb)
+      FROM public.resource_category_counts
+    ),
+    'recent', (
+      SELECT coalesce(jsonb_agg(r), '[]'::jsonb) FROM (
+        SELECT name, category, created_at FROM public.resources
+        ORDER BY created_at DESC
+        LIMIT p_recent
+      ) r
+    )
+  );
+$$;
+
+ALTER TABLE public.resource_category_counts ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Allow public read access" ON public.resource_category_counts;
+CREATE POLICY "Allow public read access" ON public.resource_category_counts
+  FOR SELECT USING (true);
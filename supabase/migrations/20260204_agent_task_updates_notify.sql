@@ -0,0 +1,18 @@
+-- Migration: Notify on agent_tasks progress
+-- Clients waiting on a task (e.g. scripts/ask_keith.py) LISTEN instead of polling.
+-- Payload is kept small (pg_notify caps at 8000 bytes); listeners re-read the row.
+
+CREATE OR REPLACE FUNCTION public.notify_agent_task_update()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM pg_notify('agent_task_updates', json_build_object('id', NEW.id, 'status', NEW.status)::text);
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS agent_tasks_notify_update ON public.agent_tasks;
+CREATE TRIGGER agent_tasks_notify_update
+  AFTER UPDATE OF status, result ON public.agent_tasks
+  FOR EACH ROW EXECUTE FUNCTION public.notify_agent_task_update();
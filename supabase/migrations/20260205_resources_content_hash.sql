@@ -0,0 +1,58 @@
+-- Migration: Incremental ingest keys
+-- Ingestion upserts on scrape_url and skips rows whose content_hash is unchanged.
+
+-- 1. Hash of the normalized scraped text the row was built from
+ALTER TABLE public.resources ADD COLUMN IF NOT EXISTS content_hash text;
+
+-- 2. Older ingests stored the source URL in contact_info.url only.
+-- Backfill scrape_url from it, keeping the newest row per URL (re-runs inserted duplicates).
+UPDATE public.resources r
+SET scrape_url = r.contact_info ->> 'url'
+WHERE r.scrape_url IS NULL
+  AND r.contact_info ->> 'url' IS NOT NULL
+  AND r.id = (
+    SELECT id FROM public.resources d
+    WHERE d.contact_info ->> 'url' = r.contact_info ->> 'url'
+    ORDER BY d.created_at DESC
+    LIMIT 1
+  )
+  AND NOT EXISTS (
+    SELECT 1 FROM public.resources e WHERE e.scrape_url = r.contact_info ->> 'url'
+  );
+
+-- 3. Blank URLs (the portal clears the field to '') mean "no URL", now and on every later write
+UPDATE public.resources SET scrape_url = NULLIF(btrim(scrape_url), '')
+WHERE scrape_url IS DISTINCT FROM NULLIF(btrim(scrape_url), '');
+
+CREATE OR REPLACE FUNCTION public.normalize_resource_scrape_url()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.scrape_url := NULLIF(btrim(NEW.scrape_url), '');
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS resources_normalize_scrape_url ON public.resources;
+CREATE TRIGGER resources_normalize_scrape_url
+  BEFORE INSERT OR UPDATE OF scrape_url ON public.resources
+  FOR EACH ROW EXECUTE FUNCTION public.normalize_resource_scrape_url();
+
+-- 4. One row per URL before the constraint: keep the org-owned row, else the newest, and
+-- detach the URL from the others (rows are kept, leads reference them)
+UPDATE public.resources r
+SET scrape_url = NULL
+FROM (
+  SELECT id, row_number() OVER (
+    PARTITION BY scrape_url
+    ORDER BY (owner_id IS NOT NULL) DESC, created_at DESC, id
+  ) AS n
+  FROM public.resources
+  WHERE scrape_url IS NOT NULL
+) d
+WHERE r.id = d.id AND d.n > 1;
+
+-- 5. Upsert target (NULLs stay allowed for hand-entered orgs)
+ALTER TABLE public.resources DROP CONSTRAINT IF EXISTS resources_scrape_url_key;
+ALTER TABLE public.resources ADD CONSTRAINT resources_scrape_url_key UNIQUE (scrape_url);
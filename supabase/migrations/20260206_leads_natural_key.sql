@@ -0,0 +1,51 @@
+-- Migration: Natural key for leads
+-- A seeker has at most one *active* application per org: the worker's create_account and the
+-- bulk loader (scripts/load_catalog.py) both treat an active lead for (user_id, resource_id) as
+-- a duplicate. Closed/cancelled leads don't count, so a seeker can re-apply after a close.
+-- Active statuses: new, submitted, acknowledged, contacted, accepted, enrolled, on_hold.
+
+-- 1. Archive for the duplicates removed below (service role only: RLS on, no policies)
+CREATE TABLE IF NOT EXISTS public.leads_duplicates_archive (
+  LIKE public.leads,
+  kept_lead_id uuid,
+  archived_at timestamptz not null default now()
+);
+ALTER TABLE public.leads_duplicates_archive ENABLE ROW LEVEL SECURITY;
+
+-- 2. One active application per (user_id, resource_id): among the active rows keep the one an
+-- org has moved furthest (accepted/enrolled > on_hold > acknowledged/contacted > new/submitted),
+-- then the newest; the other active rows are copied to the archive and deleted in the same
+-- statement. Closed/cancelled history is left alone.
+WITH ranked AS (
+  SELECT id,
+         first_value(id) OVER w AS kept_id,
+         row_number() OVER w AS n
+  FROM public.leads
+  WHERE status IN ('new', 'submitted', 'acknowledged', 'contacted', 'accepted', 'enrolled', 'on_hold')
+  WINDOW w AS (
+    PARTITION BY user_id, resource_id
+    ORDER BY CASE status
+               WHEN 'accepted' THEN 3 WHEN 'enrolled' THEN 3
+               WHEN 'on_hold' THEN 2
+               WHEN 'acknowledged' THEN 1 WHEN 'contacted' THEN 1
+               ELSE 0 END DESC,
+             created_at DESC NULLS LAST,
+             id
+  )
+),
+archived AS (
+  INSERT INTO public.leads_duplicates_archive
+  SELECT l.*, r.kept_id, now()
+  FROM public.leads l
+  JOIN ranked r ON r.id = l.id
+  WHERE r.n > 1
+  RETURNING id
+)
+DELETE FROM public.leads l
+USING archived a
+WHERE l.id = a.id;
+
+-- 3. Enforced for active rows only (an earlier draft of this migration had a full unique index)
+DROP INDEX IF EXISTS public.leads_user_resource_key;
+CREATE UNIQUE INDEX IF NOT EXISTS leads_user_resource_active_key ON public.leads (user_id, resource_id)
+  WHERE status IN ('new', 'submitted', 'acknowledged', 'contacted', 'accepted', 'enrolled', 'on_hold');
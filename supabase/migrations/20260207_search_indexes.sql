@@ -0,0 +1,59 @@
+-- Migration: Indexes for the worker's query paths
+-- Every RAG lookup, fuzzy name match and queue poll was a sequential scan.
+-- Measured with scripts/bench_query_plans.py against a seeded local database.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 1. Weighted search document: name (A) > categories + programs (B) > description (C).
+-- Wrapped in an IMMUTABLE function because array_to_string is only STABLE,
+-- which a generated column does not accept.
+CREATE OR REPLACE FUNCTION public.resource_search_doc(
+  p_name text, p_description text, p_programs jsonb, p_category text, p_secondary text[]
+)
+RETURNS tsvector
+LANGUAGE sql
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+  SELECT setweight(to_tsvector('english'::regconfig, coalesce(p_name, '')), 'A')
+      || setweight(to_tsvector('english'::regconfig, coalesce(p_category, '') || ' ' || coalesce(array_to_string(p_secondary, ' '), '')), 'B')
+      || setweight(jsonb_to_tsvector('english'::regconfig, coalesce(p_programs, '[]'::jsonb), '["string"]'), 'B')
+      || setweight(to_tsvector('english'::regconfig, coalesce(p_description, '')), 'C');
+$$;
+
+ALTER TABLE public.resources
+ADD COLUMN IF NOT EXISTS search_doc tsvector
+GENERATED ALWAYS AS (public.resource_search_doc(name, description, programs, category, secondary_categories)) STORED;
+
+CREATE INDEX IF NOT EXISTS resources_search_doc_idx ON public.resources USING gin (search_doc);
+
+-- 2. ilike '%q%' on name / description, and category.ilike.<cat> in the category filter
+CREATE INDEX IF NOT EXISTS resources_name_trgm_idx ON public.resources USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS resources_description_trgm_idx ON public.resources USING gin (description gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS resources_category_trgm_idx ON public.resources USING gin (category gin_trgm_ops);
+
+-- 3. secondary_categories.cs.{x} (array containment) and category in (...)
+CREATE INDEX IF NOT EXISTS resources_secondary_categories_idx ON public.resources USING gin (secondary_categories);
+CREATE INDEX IF NOT EXISTS resources_category_idx ON public.resources (category);
+
+-- 4. Org portal: an owner's resources, then their leads newest first.
+-- leads (user_id, resource_id) is already covered by leads_user_resource_key.
+CREATE INDEX IF NOT EXISTS resources_owner_idx ON public.resources (owner_id) WHERE owner_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS leads_resource_created_idx ON public.leads (resource_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS leads_new_idx ON public.leads (created_at DESC) WHERE status = 'new';
+
+-- 5. Queue: claim_next_task's pending scan and the lease reaper only ever touch a small slice of agent_tasks
+CREATE INDEX IF NOT EXISTS agent_tasks_pending_idx ON public.agent_tasks (assigned_agent, created_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS agent_tasks_leases_idx ON public.agent_tasks (lease_until) WHERE status = 'in-progress';
+
+-- 6. Nearest-neighbour search on embeddings (pgvector >= 0.5). Skipped where embedding is not a vector column.
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_schema = 'public' AND table_name = 'resources'
+      AND column_name = 'embedding' AND udt_name = 'vector'
+  ) THEN
+    EXECUTE 'CREATE INDEX IF NOT EXISTS resources_embedding_hnsw_idx ON public.resources USING hnsw (embedding vector_cosine_ops)';
+  END IF;
+END $$;
@@ -0,0 +1,90 @@
+-- Migration: Ranked resource search in one call
+-- perform_rag_search used 3-5 REST queries (full text, ilike fallbacks, category, tech expansion)
+-- and ranked the union in Python. search_resources gathers the same candidates through the
+-- 20260207 indexes and returns them ranked and limited.
+-- The ranking is mirrored in scripts/search_ranking.py (used when the RPC is unavailable) and
+-- compared with it by scripts/verify_search_rpc.py.
+
+-- 1. Great-circle distance (km); resources.location holds {lat, long}
+CREATE OR REPLACE FUNCTION public.haversine_km(lat1 double precision, lon1 double precision,
+                                               lat2 double precision, lon2 double precision)
+RETURNS double precision
+LANGUAGE sql
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+  SELECT 6371.0 * 2 * asin(least(1.0, sqrt(
+    sin(radians(lat2 - lat1) / 2) ^ 2
+    + cos(radians(lat1)) * cos(radians(lat2)) * sin(radians(lon2 - lon1) / 2) ^ 2
+  )));
+$$;
+
+-- 2. score = text rank (0..1) + 0.5 * how much of the name the query mentions + 0.3 category (0.15 secondary)
+--            + 0.4 proximity (1 at the caller, 0.5 at 10 km), or 0.2 when a row without coordinates
+--              lists the caller's place in contact_info.service_area
+CREATE OR REPLACE FUNCTION public.search_resources(
+  p_query text,
+  p_lat double precision DEFAULT NULL,
+  p_lon double precision DEFAULT NULL,
+  p_categories text[] DEFAULT NULL,
+  p_k integer DEFAULT 5,
+  p_place text DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid, name text, category text, secondary_categories text[], description text,
+  application_process text, programs jsonb, contact_info jsonb, location jsonb,
+  distance_km double precision, score double precision
+)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH q AS (
+    -- Any query term may match (a caller's sentence rarely contains every term of a description)
+    SELECT replace(plainto_tsquery('english', coalesce(p_query, ''))::text, '&', '|')::tsquery AS tsq,
+           lower(coalesce(p_query, '')) AS text,
+           coalesce(p_categories, '{}'::text[]) AS cats
+  ),
+  candidates AS (
+    (SELECT r.id FROM public.resources r, q
+     WHERE r.search_doc @@ q.tsq
+     ORDER BY ts_rank_cd(r.search_doc, q.tsq, 32) DESC
+     LIMIT 200)
+    UNION
+    (SELECT r.id FROM public.resources r, q
+     WHERE q.text <% r.name  -- the query is (nearly) part of a name: "food bnk", "salvation army"
+     LIMIT 50)
+    UNION
+    (SELECT r.id FROM public.resources r, q
+     WHERE cardinality(q.cats) > 0
+       AND (r.category = ANY (q.cats) OR r.secondary_categories && q.cats)
+     ORDER BY CASE WHEN p_lat IS NULL OR p_lon IS NULL OR r.location ->> 'lat' IS NULL THEN 0
+                   ELSE public.haversine_km(p_lat, p_lon, (r.location ->> 'lat')::double precision,
+                                            (r.location ->> 'long')::double precision) END
+     LIMIT 200)
+  ),
+  scored AS (
+    SELECT r.*,
+           CASE WHEN p_lat IS NULL OR p_lon IS NULL
+                  OR r.location ->> 'lat' IS NULL OR r.location ->> 'long' IS NULL THEN NULL
+                ELSE public.haversine_km(p_lat, p_lon, (r.location ->> 'lat')::double precision,
+                                         (r.location ->> 'long')::double precision)
+           END AS km
+    FROM public.resources r
+    JOIN candidates c ON c.id = r.id
+  )
+  SELECT s.id, s.name, s.category, s.secondary_categories, s.description,
+         s.application_process, s.programs, s.contact_info, s.location,
+         s.km,
+         ts_rank_cd(s.search_doc, q.tsq, 32)
+         + 0.5 * word_similarity(lower(s.name), q.text)
+         + CASE WHEN s.category = ANY (q.cats) THEN 0.3
+                WHEN s.secondary_categories && q.cats THEN 0.15
+                ELSE 0 END
+         + CASE WHEN s.km IS NOT NULL THEN 0.4 / (1 + s.km / 10)
+                WHEN p_place IS NOT NULL AND s.contact_info ->> 'service_area' ILIKE '%' || p_place || '%' THEN 0.2
+                ELSE 0 END
+         AS score
+  FROM scored s, q
+  ORDER BY score DESC, s.name, s.id
+  LIMIT greatest(coalesce(p_k, 5), 1);
+$$;
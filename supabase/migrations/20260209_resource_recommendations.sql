@@ -0,0 +1,200 @@
+-- Migration: Precomputed top-k per (category, service area)
+-- "food near Compton" has the same answer until the catalog changes, so it is kept in a table
+-- and looked up by key instead of being ranked on every turn. Statement-level triggers on resources
+-- refresh only the keys a write can affect. Scoring matches search_resources without a text term.
+
+-- 1. Areas callers name (keep in sync with PLACES in scripts/gazetteer.py)
+CREATE TABLE IF NOT EXISTS public.service_areas (
+  name text primary key,
+  lat double precision not null,
+  lon double precision not null
+);
+
+INSERT INTO public.service_areas (name, lat, lon) VALUES
+  ('los angeles', 34.0522, -118.2437), ('downtown la', 34.0407, -118.2468), ('south la', 33.9897, -118.2916),
+  ('long beach', 33.7701, -118.1937), ('compton', 33.8958, -118.2201), ('lakewood', 33.8536, -118.1340),
+  ('hollywood', 34.0928, -118.3287), ('carson', 33.8317, -118.2820), ('inglewood', 33.9617, -118.3531),
+  ('pasadena', 34.1478, -118.1445), ('santa ana', 33.7455, -117.8677), ('torrance', 33.8358, -118.3406),
+  ('bellflower', 33.8817, -118.1170), ('paramount', 33.8894, -118.1598), ('san pedro', 33.7361, -118.2923),
+  ('downey', 33.9401, -118.1332), ('norwalk', 33.9022, -118.0817), ('whittier', 33.9792, -118.0328),
+  ('el monte', 34.0686, -118.0276), ('pomona', 34.0551, -117.7500), ('glendale', 34.1425, -118.2551),
+  ('burbank', 34.1808, -118.3090), ('watts', 33.9395, -118.2426), ('lynwood', 33.9303, -118.2115),
+  ('gardena', 33.8883, -118.3090), ('hawthorne', 33.9164, -118.3526), ('wilmington', 33.7802, -118.2626),
+  ('anaheim', 33.8366, -117.9143), ('van nuys', 34.1899, -118.4514), ('east la', 34.0239, -118.1720)
+ON CONFLICT (name) DO UPDATE SET lat = EXCLUDED.lat, lon = EXCLUDED.lon;
+
+-- 2. Top 10 per key (the worker reads the first 5)
+CREATE TABLE IF NOT EXISTS public.resource_recommendations (
+  category text not null,
+  area text not null references public.service_areas (name) on delete cascade,
+  rank smallint not null,
+  resource_id uuid not null references public.resources (id) on delete cascade,
+  score double precision not null,
+  distance_km double precision,
+  primary key (category, area, rank)
+);
+CREATE INDEX IF NOT EXISTS resource_recommendations_resource_idx ON public.resource_recommendations (resource_id);
+
+-- 3. One formula for the refresh and the trigger's "could this row enter the key?" test
+CREATE OR REPLACE FUNCTION public.recommendation_score(
+  p_category text, p_secondary text[], p_location jsonb, p_contact jsonb,
+  p_key_category text, p_area text, p_lat double precision, p_lon double precision
+)
+RETURNS double precision
+LANGUAGE sql
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+  SELECT CASE WHEN p_category = p_key_category THEN 0.3
+              WHEN p_secondary @> ARRAY[p_key_category] THEN 0.15
+              ELSE NULL END
+       + CASE WHEN p_location ->> 'lat' IS NOT NULL AND p_location ->> 'long' IS NOT NULL
+              THEN 0.4 / (1 + public.haversine_km(p_lat, p_lon, (p_location ->> 'lat')::double precision,
+                                                  (p_location ->> 'long')::double precision) / 10)
+              WHEN p_contact ->> 'service_area' ILIKE '%' || p_area || '%' THEN 0.2
+              ELSE 0 END;
+$$;
+
+-- SECURITY DEFINER (here and in the trigger below): resource_recommendations only has a read
+-- policy, and portal edits to resources run the refresh as the org owner.
+CREATE OR REPLACE FUNCTION public.refresh_recommendation_key(p_category text, p_area text)
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  DELETE FROM public.resource_recommendations WHERE category = p_category AND area = p_area;
+  INSERT INTO public.resource_recommendations (category, area, rank, resource_id, score, distance_km)
+  SELECT p_category, p_area, row_number() OVER (ORDER BY x.score DESC, x.name, x.id), x.id, x.score, x.km
+  FROM (
+    SELECT r.id, r.name,
+           public.recommendation_score(r.category, r.secondary_categories, r.location, r.contact_info,
+                                       p_category, a.name, a.lat, a.lon) AS score,
+           CASE WHEN r.location ->> 'lat' IS NOT NULL AND r.location ->> 'long' IS NOT NULL
+                THEN public.haversine_km(a.lat, a.lon, (r.location ->> 'lat')::double precision,
+                                         (r.location ->> 'long')::double precision) END AS km
+    FROM public.resources r
+    JOIN public.service_areas a ON a.name = p_area
+    WHERE r.category = p_category OR r.secondary_categories @> ARRAY[p_category]
+    ORDER BY score DESC, r.name, r.id
+    LIMIT 10
+  ) x;
+$$;
+
+-- Only reachable through the trigger, not as an RPC
+REVOKE EXECUTE ON FUNCTION public.refresh_recommendation_key(text, text) FROM PUBLIC, anon, authenticated;
+
+-- Full rebuild: every category (primary or secondary) x every area
+CREATE OR REPLACE FUNCTION public.refresh_resource_recommendations()
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_key record;
+  v_keys integer := 0;
+BEGIN
+  TRUNCATE public.resource_recommendations;
+  FOR v_key IN
+    SELECT c.category, a.name AS area
+    FROM (SELECT category FROM public.resources
+          UNION SELECT unnest(secondary_categories) FROM public.resources) c
+    CROSS JOIN public.service_areas a
+    WHERE c.category IS NOT NULL
+  LOOP
+    PERFORM public.refresh_recommendation_key(v_key.category, v_key.area);
+    v_keys := v_keys + 1;
+  END LOOP;
+  RETURN v_keys;
+END;
+$$;
+
+-- 4. Incremental refresh. A key is recomputed when a changed row (old or new version) would rank
+-- inside it, or when the key is short (a deleted member was already removed by the cascade).
+-- Updates that leave the ranking inputs alone (embedding backfills, content_hash) refresh nothing.
+-- Transition tables cannot be shared across events, hence one trigger per event.
+CREATE OR REPLACE FUNCTION public.track_resource_recommendations()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_keys text[] := '{}';
+  v_key text;
+  v_changed uuid[];
+BEGIN
+  IF TG_OP = 'UPDATE' THEN
+    v_changed := ARRAY(
+      SELECT n.id FROM new_rows n JOIN old_rows o ON o.id = n.id
+      WHERE (n.name, n.category, n.secondary_categories, n.location, n.contact_info)
+            IS DISTINCT FROM (o.name, o.category, o.secondary_categories, o.location, o.contact_info)
+    );
+    IF cardinality(v_changed) = 0 THEN
+      RETURN NULL;
+    END IF;
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    v_keys := v_keys || ARRAY(
+      SELECT DISTINCT c.cat || '|' || a.name
+      FROM old_rows o
+      CROSS JOIN LATERAL unnest(array_prepend(o.category, coalesce(o.secondary_categories, '{}'))) AS c(cat)
+      CROSS JOIN public.service_areas a
+      LEFT JOIN LATERAL (
+        SELECT count(*) AS n, min(rr.score) AS floor FROM public.resource_recommendations rr
+        WHERE rr.category = c.cat AND rr.area = a.name
+      ) k ON true
+      WHERE c.cat IS NOT NULL
+        AND (v_changed IS NULL OR o.id = ANY (v_changed))
+        AND (k.n < 10 OR public.recommendation_score(o.category, o.secondary_categories, o.location, o.contact_info,
+                                                       c.cat, a.name, a.lat, a.lon) >= k.floor)
+    );
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    v_keys := v_keys || ARRAY(
+      SELECT DISTINCT c.cat || '|' || a.name
+      FROM new_rows n
+      CROSS JOIN LATERAL unnest(array_prepend(n.category, coalesce(n.secondary_categories, '{}'))) AS c(cat)
+      CROSS JOIN public.service_areas a
+      LEFT JOIN LATERAL (
+        SELECT count(*) AS n, min(rr.score) AS floor FROM public.resource_recommendations rr
+        WHERE rr.category = c.cat AND rr.area = a.name
+      ) k ON true
+      WHERE c.cat IS NOT NULL
+        AND (v_changed IS NULL OR n.id = ANY (v_changed))
+        AND (k.n < 10 OR public.recommendation_score(n.category, n.secondary_categories, n.location, n.contact_info,
+                                                       c.cat, a.name, a.lat, a.lon) >= k.floor)
+    );
+  END IF;
+  FOR v_key IN SELECT DISTINCT unnest(v_keys) LOOP
+    PERFORM public.refresh_recommendation_key(split_part(v_key, '|', 1), split_part(v_key, '|', 2));
+  END LOOP;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS resources_recommendations_insert ON public.resources;
+CREATE TRIGGER resources_recommendations_insert
+  AFTER INSERT ON public.resources
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION public.track_resource_recommendations();
+
+DROP TRIGGER IF EXISTS resources_recommendations_update ON public.resources;
+CREATE TRIGGER resources_recommendations_update
+  AFTER UPDATE ON public.resources
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION public.track_resource_recommendations();
+
+DROP TRIGGER IF EXISTS resources_recommendations_delete ON public.resources;
+CREATE TRIGGER resources_recommendations_delete
+  AFTER DELETE ON public.resources
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION public.track_resource_recommendations();
+
+SELECT public.refresh_resource_recommendations();
+
+ALTER TABLE public.service_areas ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow public read access" ON public.service_areas
+  FOR SELECT USING (true);
+ALTER TABLE public.resource_recommendations ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow public read access" ON public.resource_recommendations
+  FOR SELECT USING (true);